@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for `/add` directory ingestion.
+
+Generates a synthetic source tree (10k files by default) and times the
+scandir-based ingestion engine against a cold file cache.
+
+    python benchmarks/bench_add_directory.py --files 20000 --json
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from deepseek_engineer import files, ingest  # noqa: E402
+
+
+def build_tree(root: Path, files: int, fanout: int, file_size: int, seed: int) -> int:
+    """Create 'files' source files spread over nested directories; return total bytes."""
+    rng = random.Random(seed)
+    line = "def function_{0}(value):\n    return value * {0}\n\n"
+    total = 0
+    (root / ".gitignore").write_text("*.generated.py\nbuild_cache/\n")
+    for i in range(files):
+        depth = rng.randint(1, 4)
+        directory = root.joinpath(*(f"pkg{rng.randrange(fanout)}" for _ in range(depth)))
+        directory.mkdir(parents=True, exist_ok=True)
+        if i % 50 == 0:
+            name = f"asset_{i}.png"  # Excluded by extension
+        elif i % 37 == 0:
+            name = f"module_{i}.generated.py"  # Excluded by .gitignore
+        else:
+            name = f"module_{i}.py"
+        body = "".join(line.format(n) for n in range(max(1, file_size // 40)))
+        (directory / name).write_text(body)
+        total += len(body)
+    return total
+
+
+def run(args) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="deepseek-bench-add-"))
+    try:
+        total_bytes = build_tree(workdir, args.files, args.fanout, args.file_size, args.seed)
+        root = files.normalize_path(str(workdir))
+        timings = []
+        added_count = skipped_count = 0
+        for _ in range(args.repeat):
+            files.file_cache.clear()  # Cold cache for every run
+            start = time.perf_counter()
+            added, skipped, _ = ingest.ingest_directory(root, max_files=args.files, workers=args.workers)
+            timings.append(time.perf_counter() - start)
+            added_count, skipped_count = len(added), len(skipped)
+        best = min(timings)
+        return {
+            "benchmark": "add_directory",
+            "files": args.files,
+            "workers": args.workers,
+            "added": added_count,
+            "skipped": skipped_count,
+            "bytes": total_bytes,
+            "seconds_best": best,
+            "seconds_median": statistics.median(timings),
+            "files_per_second": added_count / best if best else None,
+            "mb_per_second": total_bytes / best / 1_000_000 if best else None,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--fanout", type=int, default=8, help="Subdirectories per level")
+    parser.add_argument("--file-size", type=int, default=2_000, help="Approximate bytes per file")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable result")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Ingested {result['added']:,} files ({result['skipped']:,} skipped) "
+              f"in {result['seconds_best']:.3f}s best / {result['seconds_median']:.3f}s median")
+        print(f"  {result['files_per_second']:,.0f} files/s, {result['mb_per_second']:.1f} MB/s "
+              f"with {result['workers']} workers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
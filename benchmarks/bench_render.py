@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Microbenchmark of terminal render cost per 10k streamed tokens.
+
+Compares the original per-delta `console.print` loop with StreamRenderer in full
+and collapsed reasoning modes. Output goes to an in-memory terminal console, and
+a simulated clock advances at --tokens-per-second, so frame limiting behaves as
+it would against the live API.
+
+    python benchmarks/bench_render.py --tokens 10000 --json
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from deepseek_engineer.render import StreamRenderer  # noqa: E402
+
+
+def make_deltas(tokens: int):
+    """Half reasoning, half content; roughly one newline every 15 tokens."""
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+    deltas = []
+    for i in range(tokens):
+        text = words[i % len(words)] + ("\n" if i % 15 == 14 else " ")
+        deltas.append(("reasoning" if i < tokens // 2 else "content", text))
+    return deltas
+
+
+def terminal() -> Console:
+    return Console(file=io.StringIO(), force_terminal=True, width=120, color_system="truecolor")
+
+
+def naive(deltas, _tokens_per_second):
+    """The original loop: one console.print and one string concatenation per delta."""
+    console = terminal()
+    reasoning_started = False
+    reasoning_content = ""
+    final_content = ""
+    for kind, text in deltas:
+        if kind == "reasoning":
+            if not reasoning_started:
+                console.print("\n[bold blue]💭 Reasoning:[/bold blue]")
+                reasoning_started = True
+            console.print(text, end="")
+            reasoning_content += text
+        else:
+            if reasoning_started:
+                console.print("\n")
+                console.print("\n[bold bright_blue]🤖 Assistant>[/bold bright_blue] ", end="")
+                reasoning_started = False
+            final_content += text
+            console.print(text, end="")
+    return len(final_content)
+
+
+def buffered(collapse: bool):
+    def run(deltas, tokens_per_second):
+        now = [0.0]
+        step = 1.0 / tokens_per_second
+        renderer = StreamRenderer(output=terminal(), collapse_reasoning=collapse, clock=lambda: now[0])
+        for kind, text in deltas:
+            now[0] += step
+            if kind == "reasoning":
+                renderer.add_reasoning(text)
+            else:
+                renderer.add_content(text)
+        renderer.finish()
+        return len(renderer.content_text)
+    return run
+
+
+def measure(fn, deltas, tokens_per_second, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(deltas, tokens_per_second)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="Simulated stream rate")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable result")
+    args = parser.parse_args(argv)
+
+    deltas = make_deltas(args.tokens)
+    per_10k = 10_000 / args.tokens
+    results = {
+        "benchmark": "render",
+        "tokens": args.tokens,
+        "tokens_per_second": args.tokens_per_second,
+        "seconds_per_10k_tokens": {
+            "per_delta_print": measure(naive, deltas, args.tokens_per_second, args.repeat) * per_10k,
+            "buffered": measure(buffered(False), deltas, args.tokens_per_second, args.repeat) * per_10k,
+            "buffered_collapsed": measure(buffered(True), deltas, args.tokens_per_second, args.repeat) * per_10k,
+        },
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"Render cost per 10k tokens at {args.tokens_per_second:g} tokens/s:")
+        for name, seconds in results["seconds_per_10k_tokens"].items():
+            print(f"  {name:<20} {seconds * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Latency benchmark for the search_code index.
+
+Generates a synthetic source tree with varied identifiers, then times the cold
+index build, an incremental refresh after touching a few files, a reload from
+the on-disk index in a fresh SearchIndex, and literal and regex queries.
+
+    python benchmarks/bench_search.py --files 100000 --json
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from deepseek_engineer import search  # noqa: E402
+
+WORDS = ["alpha", "beta", "gamma", "delta", "render", "stream", "token", "index", "value", "cache",
+         "parse", "build", "fetch", "store", "route", "queue", "event", "frame", "scope", "shard"]
+NEEDLE = "needle_function_that_is_rare"
+
+
+def build_tree(root: Path, files: int, fanout: int, lines: int, seed: int) -> int:
+    """Create 'files' Python modules with random identifiers; one of them defines NEEDLE."""
+    rng = random.Random(seed)
+    total = 0
+    for i in range(files):
+        directory = root.joinpath(*(f"pkg{rng.randrange(fanout)}" for _ in range(rng.randint(1, 3))))
+        directory.mkdir(parents=True, exist_ok=True)
+        body = "".join(
+            f"def {rng.choice(WORDS)}_{rng.choice(WORDS)}_{n}(x):\n    return {rng.choice(WORDS)}(x) + {n}\n"
+            for n in range(lines)
+        )
+        if i == files // 2:
+            body += f"def {NEEDLE}():\n    pass\n"
+        (directory / f"module_{i}.py").write_text(body)
+        total += len(body)
+    return total
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run(args) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="deepseek-bench-search-"))
+    try:
+        tree = workdir / "tree"
+        total_bytes = build_tree(tree, args.files, args.fanout, args.lines, args.seed)
+        root = str(tree.resolve())
+        cache_dir = str(workdir / "cache")
+
+        index = search.SearchIndex(root, cache_dir)
+        build_ms, _ = timed(index.refresh)
+        for path in sorted(tree.rglob("*.py"))[:args.touch]:
+            path.write_text(path.read_text() + "# touched\n")
+        refresh_ms, _ = timed(index.refresh)
+        reloaded = search.SearchIndex(root, cache_dir)
+        load_ms, _ = timed(reloaded.load)
+        reloaded.refreshed_at = time.monotonic()
+        reloaded._loaded = True  # Loaded above; queries below measure the index alone
+
+        queries = {
+            "rare_literal": dict(query=NEEDLE),
+            "rare_regex": dict(query=r"def needle_\w+\(", regex=True),
+            "common_literal": dict(query="render_stream_1(", max_results=50),
+            "case_insensitive": dict(query=NEEDLE.upper(), case_sensitive=False),
+        }
+        query_ms = {}
+        for name, query in queries.items():
+            samples = [timed(reloaded.search, **query)[0] for _ in range(args.repeat)]
+            query_ms[name] = statistics.median(samples)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "benchmark": "search",
+        "files": args.files,
+        "mb": total_bytes / 1_000_000,
+        "workers": search.SEARCH_WORKERS,
+        "build_ms": build_ms,
+        "refresh_ms": refresh_ms,
+        "touched": args.touch,
+        "load_ms": load_ms,
+        "query_ms_median": query_ms,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--fanout", type=int, default=16, help="Subdirectories per level")
+    parser.add_argument("--lines", type=int, default=40, help="Functions per file")
+    parser.add_argument("--touch", type=int, default=10, help="Files modified before the incremental refresh")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable result")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Indexed {result['files']:,} files ({result['mb']:.1f} MB) in {result['build_ms'] / 1000:.2f}s "
+              f"with {result['workers']} workers")
+        print(f"  incremental refresh after touching {result['touched']} files: {result['refresh_ms']:.0f} ms")
+        print(f"  reload from disk: {result['load_ms']:.0f} ms")
+        for name, ms in result["query_ms_median"].items():
+            print(f"  query {name:<18} {ms:8.1f} ms median")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""End-to-end session benchmark against the local mock streaming server.
+
+Starts benchmarks/mock_server.py in a subprocess, points the client at it and
+drives stream_openai_response through scripted turns. Reports:
+
+  * time to first render: turn start (and server send) to the first streamed token on the console
+  * client overhead per token: CPU time spent by this process per streamed token, unpaced
+  * tool execution latency: per-call wall time and the gap between the end of the
+    tool-calling stream and the follow-up request
+  * /add ingestion throughput through the real command handler
+  * peak RSS and history size after a long session of file-reading turns
+
+    python benchmarks/bench_session.py --json --output results.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from bench_add_directory import build_tree
+from mock_server import WORDS
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+FIRST_TOKEN = WORDS[0]
+
+
+class TimedWriter(io.TextIOBase):
+    """Console sink that records when the first streamed token is written after arm()."""
+
+    def __init__(self):
+        self.first_render = None
+        self.bytes = 0
+
+    def arm(self) -> None:
+        self.first_render = None
+
+    def write(self, text: str) -> int:
+        if self.first_render is None and FIRST_TOKEN in text:
+            self.first_render = time.time()
+        self.bytes += len(text)
+        return len(text)
+
+    def isatty(self) -> bool:
+        return True  # Render as on a real terminal, styles included
+
+    def flush(self) -> None:
+        pass
+
+
+class MockServer:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).with_name("mock_server.py")), "--port", "0"],
+            stdout=subprocess.PIPE, text=True,
+        )
+        line = self.process.stdout.readline()
+        if not line.startswith("PORT "):
+            self.process.kill()
+            raise RuntimeError(f"mock server failed to start: {line!r}")
+        self.url = f"http://127.0.0.1:{int(line.split()[1])}"
+
+    def _call(self, path: str, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def scenario(self, scenario: dict) -> None:
+        self._call("/__scenario", scenario)
+        self._call("/__reset", {})
+
+    def requests(self):
+        return self._call("/__stats")["requests"]
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def write_files(directory: Path, count: int, size: int):
+    paths = []
+    for i in range(count):
+        path = directory / f"module_{i}.py"
+        path.write_text("".join(f"def function_{i}_{n}(value):\n    return value * {n}\n\n" for n in range(size // 40)))
+        paths.append(str(path))
+    return paths
+
+
+async def bench_first_render(app, server, writer, args):
+    server.scenario({"initial": {"reasoning_tokens": 100, "content_tokens": 100, "tokens_per_second": args.rate}})
+    from_start, from_server = [], []
+    for i in range(args.turns):
+        app.conversation_history.truncate(1)
+        writer.arm()
+        start = time.time()
+        await app.stream_openai_response(f"first render turn {i}")
+        first_chunk = server.requests()[-1]["first_chunk"]
+        from_start.append((writer.first_render - start) * 1000)
+        from_server.append((writer.first_render - first_chunk) * 1000)
+    return {
+        "turns": args.turns,
+        "tokens_per_second": args.rate,
+        "ms_from_turn_start_median": statistics.median(from_start),
+        "ms_from_server_send_median": statistics.median(from_server),
+    }
+
+
+async def bench_token_overhead(app, server, args):
+    half = args.tokens // 2
+    server.scenario({"initial": {"reasoning_tokens": half, "content_tokens": args.tokens - half, "tokens_per_second": 0}})
+    app.conversation_history.truncate(1)
+    wall, cpu = time.perf_counter(), time.process_time()
+    await app.stream_openai_response("token overhead turn")
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return {
+        "tokens": args.tokens,
+        "cpu_us_per_token": cpu / args.tokens * 1e6,
+        "wall_us_per_token": wall / args.tokens * 1e6,
+        "tokens_per_second": args.tokens / wall,
+    }
+
+
+async def bench_tools(app, server, workdir, args):
+    paths = write_files(workdir, args.tool_calls, 50_000)
+    calls = [{"name": "read_file", "arguments": {"file_path": p}, "fragments": 16} for p in paths]
+    server.scenario({
+        "initial": {"reasoning_tokens": 20, "tool_calls": calls, "tokens_per_second": 0},
+        "follow_up": {"content_tokens": 20, "tokens_per_second": 0},
+    })
+    timings = []
+    original = app.scheduler.execute_function_call_dict
+
+    def timed(tool_call_dict):
+        start = time.perf_counter()
+        try:
+            return original(tool_call_dict)
+        finally:
+            timings.append((time.perf_counter() - start) * 1000)
+
+    app.scheduler.execute_function_call_dict = timed
+    try:
+        app.conversation_history.truncate(1)
+        app.files.file_cache.clear()
+        await app.stream_openai_response("tool latency turn")
+    finally:
+        app.scheduler.execute_function_call_dict = original
+    initial, follow_up = server.requests()[-2:]
+    return {
+        "tool_calls": len(timings),
+        "per_call_ms_mean": statistics.mean(timings) if timings else None,
+        "per_call_ms_max": max(timings) if timings else None,
+        "stream_end_to_follow_up_ms": (follow_up["received"] - initial["done"]) * 1000,
+    }
+
+
+def bench_add(app, workdir, args):
+    tree = workdir / "tree"
+    tree.mkdir()
+    total_bytes = build_tree(tree, args.add_files, fanout=8, file_size=2_000, seed=0)
+    app.conversation_history.truncate(1)
+    app.files.file_cache.clear()
+    start = time.perf_counter()
+    app.commands.try_handle_add_command(f"/add {tree}")
+    elapsed = time.perf_counter() - start
+    added = len(app.conversation_history) - 1
+    app.conversation_history.truncate(1)
+    return {
+        "files": args.add_files,
+        "added": added,
+        "seconds": elapsed,
+        "files_per_second": added / elapsed if elapsed else None,
+        "mb_per_second": total_bytes / elapsed / 1_000_000 if elapsed else None,
+    }
+
+
+async def bench_large_session(app, server, workdir, args):
+    paths = write_files(workdir, 50, 20_000)
+    app.conversation_history.truncate(1)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    for i in range(args.session_turns):
+        server.scenario({
+            "initial": {"tool_calls": [{"name": "read_file", "arguments": {"file_path": paths[i % len(paths)]}, "fragments": 4}]},
+            "follow_up": {"content_tokens": 200},
+        })
+        await app.stream_openai_response(f"session turn {i}")
+    elapsed = time.perf_counter() - start
+    history = app.conversation_history
+    return {
+        "turns": args.session_turns,
+        "seconds_per_turn": elapsed / args.session_turns,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_growth_mb": peak_rss_mb() - rss_before,
+        "history_messages": len(history),
+        "history_chars": sum(app.context.content_length(msg.get("content")) for msg in history),
+        "history_estimated_tokens": app.context_manager.total_tokens(history),
+        "blob_store": history.blobs.stats(),
+    }
+
+
+class App:
+    """The package modules the harness drives, imported after the environment points at the mock server."""
+
+    def __init__(self):
+        from deepseek_engineer import commands, context, files, scheduler, transport, turns, ui, __version__
+
+        self.commands, self.context, self.files, self.scheduler = commands, context, files, scheduler
+        self.transport, self.ui, self.version = transport, ui, __version__
+        self.stream_openai_response = turns.stream_openai_response
+        self.conversation_history = context.conversation_history
+        self.context_manager = context.context_manager
+
+
+async def run_all(app, server, writer, workdir, args) -> dict:
+    results = {
+        "time_to_first_render": await bench_first_render(app, server, writer, args),
+        "client_overhead": await bench_token_overhead(app, server, args),
+        "tool_execution": await bench_tools(app, server, workdir, args),
+        "add_ingestion": bench_add(app, workdir, args),
+        "large_session": await bench_large_session(app, server, workdir, args),
+    }
+    await app.transport.close_client()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="Paced tokens per second for the first-render turns")
+    parser.add_argument("--turns", type=int, default=5, help="Turns used for time to first render")
+    parser.add_argument("--tokens", type=int, default=20_000, help="Streamed tokens for the overhead measurement")
+    parser.add_argument("--tool-calls", type=int, default=8)
+    parser.add_argument("--add-files", type=int, default=2_000)
+    parser.add_argument("--session-turns", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable result")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    server = MockServer()
+    os.environ.update(DEEPSEEK_BASE_URL=server.url, DEEPSEEK_API_KEY="benchmark", DEEPSEEK_PRECONNECT="0")
+    workdir = Path(tempfile.mkdtemp(prefix="deepseek-bench-session-"))
+    try:
+        app = App()
+        writer = TimedWriter()
+        app.ui.console.file = writer
+        results = asyncio.run(run_all(app, server, writer, workdir, args))
+    finally:
+        server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "benchmark": "session",
+        "version": app.version,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(result))
+    else:
+        ttfr, overhead, tools, add, session = (results[k] for k in results)
+        print(f"Time to first render:  {ttfr['ms_from_turn_start_median']:.1f} ms from turn start, "
+              f"{ttfr['ms_from_server_send_median']:.1f} ms after the server sent it")
+        print(f"Client overhead:       {overhead['cpu_us_per_token']:.1f} µs CPU / token "
+              f"({overhead['tokens_per_second']:,.0f} tokens/s unpaced)")
+        print(f"Tool execution:        {tools['per_call_ms_mean']:.2f} ms mean, {tools['per_call_ms_max']:.2f} ms max per call; "
+              f"{tools['stream_end_to_follow_up_ms']:.1f} ms from stream end to follow-up request")
+        print(f"/add ingestion:        {add['files_per_second']:,.0f} files/s, {add['mb_per_second']:.1f} MB/s")
+        print(f"Large session:         {session['turns']} turns, peak RSS {session['peak_rss_mb']:.1f} MB "
+              f"(+{session['peak_rss_growth_mb']:.1f} MB), {session['history_messages']} messages, "
+              f"~{session['history_estimated_tokens']:,} tokens in history")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
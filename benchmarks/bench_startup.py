@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark with a regression budget.
+
+Launches `python -m deepseek_engineer --startup-profile json` in fresh
+interpreters and measures wall time to a ready prompt, plus the in-process
+import and phase timings it reports. Exits with status 1 when the median wall
+time exceeds the budget or when a deferred module (openai, httpx, pydantic,
+rich.table) is imported before the prompt is ready.
+
+The budget is calibrated on the machine running the benchmark: each run is
+paired with a reference interpreter that only imports the libraries the prompt
+cannot start without (rich.console, prompt_toolkit), and the median startup may
+be at most --budget-ratio times the reference median. --budget-ms sets a fixed
+budget instead.
+
+    python benchmarks/bench_startup.py --runs 10 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REFERENCE_IMPORTS = "import rich.console, prompt_toolkit"
+
+
+def run_once() -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "deepseek_engineer", "--startup-profile", "json"],
+        cwd=ROOT, env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    report = json.loads(completed.stdout.strip().splitlines()[-1])  # The banner is printed first
+    report["wall_ms"] = wall * 1000
+    return report
+
+
+def run_reference() -> float:
+    """Wall time (ms) of a fresh interpreter importing only the libraries the prompt needs."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", REFERENCE_IMPORTS], cwd=ROOT, stdin=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ratio", type=float, default=1.6,
+                        help="Maximum median wall time to a ready prompt, relative to the reference interpreter")
+    parser.add_argument("--budget-ms", type=float, help="Fixed maximum median wall time instead of the calibrated one")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable result")
+    args = parser.parse_args(argv)
+
+    run_once()  # Populate the bytecode cache so every measured run is comparable
+    run_reference()
+    reports, reference_ms = [], []
+    for _ in range(args.runs):
+        # Interleaved, so both medians see the same machine load
+        reference_ms.append(run_reference())
+        reports.append(run_once())
+    reference = statistics.median(reference_ms)
+    budget_ms = args.budget_ms if args.budget_ms is not None else reference * args.budget_ratio
+    last = reports[-1]
+    top_level = sorted((r for r in last["imports"] if r["depth"] == 0), key=lambda r: r["cumulative_ms"], reverse=True)
+    result = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "budget_ms": budget_ms,
+        "reference_ms_median": reference,
+        "wall_ms_median": statistics.median(r["wall_ms"] for r in reports),
+        "wall_ms_best": min(r["wall_ms"] for r in reports),
+        "profiled_ms_median": statistics.median(r["total_ms"] for r in reports),
+        "phases_ms": last["phases_ms"],
+        "slowest_imports": [{"module": r["module"], "cumulative_ms": r["cumulative_ms"]} for r in top_level[:args.top]],
+        "deferred_loaded": sorted({name for r in reports for name in r["deferred_loaded"]}),
+    }
+    result["within_budget"] = result["wall_ms_median"] <= budget_ms and not result["deferred_loaded"]
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        basis = "fixed" if args.budget_ms is not None else f"{args.budget_ratio:g} x {reference:.0f} ms reference"
+        print(f"Startup to ready prompt: {result['wall_ms_median']:.1f} ms median, {result['wall_ms_best']:.1f} ms best "
+              f"(budget {budget_ms:.0f} ms, {basis}); {result['profiled_ms_median']:.1f} ms after interpreter start")
+        for name, ms in result["phases_ms"].items():
+            print(f"  {name:<20} {ms:8.1f} ms")
+        print("Slowest top-level imports:")
+        for entry in result["slowest_imports"]:
+            print(f"  {entry['module']:<40} {entry['cumulative_ms']:8.1f} ms")
+        if result["deferred_loaded"]:
+            print(f"Imported before the prompt was ready: {', '.join(result['deferred_loaded'])}")
+        print("OK" if result["within_budget"] else "FAIL: startup regression")
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
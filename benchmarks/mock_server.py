@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Local OpenAI-compatible streaming server that replays scripted DeepSeek responses.
+
+Each POST to /chat/completions is answered with a server-sent event stream built
+from the active scenario: reasoning deltas, content deltas and tool calls whose
+argument JSON is split into fragments, paced at a configurable token rate. When
+the request's last message is a tool result, the scenario's "follow_up" response
+is used, otherwise its "initial" one. An optional "errors" list of HTTP status
+codes answers that many requests with those errors first, for retry tests. A
+scenario looks like:
+
+    {
+      "initial": {"reasoning_tokens": 200, "content_tokens": 100,
+                  "tool_calls": [{"name": "read_file", "arguments": {"file_path": "a.py"}, "fragments": 8}],
+                  "tokens_per_second": 60, "first_token_delay": 0.3},
+      "follow_up": {"content_tokens": 50}
+    }
+
+Control endpoints for harnesses: POST /__scenario replaces the scenario,
+GET /__stats returns per-request timings (time.time() seconds), POST /__reset
+clears them. Run standalone and point the client at it:
+
+    python benchmarks/mock_server.py --port 8765 --scenario scenario.json
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8765 deepseek-engineer
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The first word of every response, so harnesses can spot the first rendered token
+WORDS = ["Considering", "alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+DEFAULT_SCENARIO = {
+    "initial": {"reasoning_tokens": 50, "content_tokens": 50, "tokens_per_second": 0},
+    "follow_up": {"content_tokens": 20, "tokens_per_second": 0},
+}
+
+
+def token_text(i: int) -> str:
+    return WORDS[i % len(WORDS)] + ("\n" if i % 15 == 14 else " ")
+
+
+def fragments(text: str, count: int):
+    count = max(1, min(count, len(text)))
+    size = -(-len(text) // count)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def build_events(response: dict):
+    """Yield (delta, counts_as_token) pairs for one scripted response."""
+    word = 0
+    for _ in range(response.get("reasoning_tokens", 0)):
+        yield {"reasoning_content": token_text(word)}, True
+        word += 1
+    for _ in range(response.get("content_tokens", 0)):
+        yield {"content": token_text(word)}, True
+        word += 1
+    for index, call in enumerate(response.get("tool_calls", [])):
+        arguments = json.dumps(call.get("arguments", {}))
+        for n, piece in enumerate(fragments(arguments, call.get("fragments", 1))):
+            tool_delta = {"index": index, "function": {"arguments": piece}}
+            if n == 0:
+                tool_delta.update(id=call.get("id", f"call_{index}"), type="function")
+                tool_delta["function"]["name"] = call["name"]
+            yield {"tool_calls": [tool_delta]}, True
+
+
+class MockState:
+    def __init__(self, scenario: dict):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.set_scenario(scenario)
+
+    def set_scenario(self, scenario: dict) -> None:
+        self.scenario = scenario
+        self.errors = list(scenario.get("errors", []))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Like real API servers; otherwise small SSE writes wait for delayed ACKs
+    state: MockState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            with self.state.lock:
+                return self._json(200, {"requests": list(self.state.requests)})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        received = time.time()
+        payload = self._body()
+        if self.path == "/__scenario":
+            with self.state.lock:
+                self.state.set_scenario(payload)
+            return self._json(200, {"ok": True})
+        if self.path == "/__reset":
+            with self.state.lock:
+                self.state.requests.clear()
+            return self._json(200, {"ok": True})
+        if not self.path.endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+
+        with self.state.lock:
+            error = self.state.errors.pop(0) if self.state.errors else None
+            if error is not None:
+                self.state.requests.append({"phase": "error", "status": error, "received": received})
+        if error is not None:
+            return self._json(error, {"error": {"message": f"mock error {error}", "type": "mock_error"}})
+
+        messages = payload.get("messages", [])
+        phase = "follow_up" if messages and messages[-1].get("role") == "tool" else "initial"
+        with self.state.lock:
+            response = self.state.scenario.get(phase) or {}
+        record = {"phase": phase, "messages": len(messages), "received": received}
+        self._stream(payload, response, record)
+        with self.state.lock:
+            self.state.requests.append(record)
+
+    def _write_event(self, data: str) -> None:
+        chunk = f"data: {data}\n\n".encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+
+    def _stream(self, payload: dict, response: dict, record: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(response.get("first_token_delay", 0))
+        rate = response.get("tokens_per_second", 0)
+        interval = 1.0 / rate if rate else 0.0
+        start = time.time()
+        tokens = 0
+        base = {"id": "mock", "object": "chat.completion.chunk", "created": int(start), "model": payload.get("model", "mock")}
+        for delta, is_token in build_events(response):
+            if interval:
+                # Pace against the schedule rather than sleeping per token, so drift does not accumulate
+                delay = start + tokens * interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            self._write_event(json.dumps(dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}])))
+            if tokens == 0:
+                record["first_chunk"] = time.time()
+            tokens += is_token
+        finish = "tool_calls" if response.get("tool_calls") else "stop"
+        self._write_event(json.dumps(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": finish}])))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            prompt_tokens = sum(len(str(m.get("content") or "")) for m in payload.get("messages", [])) // 4
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": tokens, "total_tokens": prompt_tokens + tokens,
+                     "prompt_cache_hit_tokens": 0, "prompt_cache_miss_tokens": prompt_tokens}
+            self._write_event(json.dumps(dict(base, choices=[], usage=usage)))
+        self._write_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        record.update(tokens=tokens, done=time.time())
+
+
+def serve(port: int = 0, scenario: dict = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start the mock server on a background thread and return it; server_port holds the bound port."""
+    handler = type("BoundHandler", (Handler,), {"state": MockState(scenario or DEFAULT_SCENARIO)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--scenario", help="Path to a scenario JSON file")
+    args = parser.parse_args(argv)
+
+    scenario = DEFAULT_SCENARIO
+    if args.scenario:
+        with open(args.scenario, encoding="utf-8") as f:
+            scenario = json.load(f)
+    server = serve(args.port, scenario, args.host)
+    print(f"PORT {server.server_port}", flush=True)  # Harnesses read the bound port from this line
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""DeepSeek Engineer: an interactive coding assistant built on the DeepSeek API.
+
+Importing the package only loads the standard library and python-dotenv; the
+OpenAI client, httpx, pydantic and prompt_toolkit are imported on first use so
+the REPL can draw its banner quickly.
+"""
+
+from dotenv import load_dotenv
+
+__version__ = "0.1.0"
+
+load_dotenv()  # Load environment variables from .env before any module reads its settings
@@ -0,0 +1,182 @@
+# --------------------------------------------------------------------------------
+# Headless batch mode
+# --------------------------------------------------------------------------------
+import os
+import sys
+import json
+import time
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, IO, Iterable, List, Optional, Set
+
+from .context import ContextManager, ContextStore, context_manager, conversation_history, new_conversation
+from .files import normalize_path, read_local_file, workspace_root, write_listeners
+from .ingest import ingest_directory
+from .tracing import tracer
+from .ui import console
+
+BATCH_WORKERS = max(1, int(os.getenv("DEEPSEEK_BATCH_WORKERS", "4")))
+
+# Paths written by the task running in this context
+_touched_files: ContextVar[Optional[Set[str]]] = ContextVar("touched_files", default=None)
+
+def _record_writes(paths: List[str]) -> None:
+    touched = _touched_files.get()
+    if touched is not None:
+        touched.update(paths)
+
+write_listeners.append(_record_writes)
+
+class TaskLog:
+    """ContextStore log hook that keeps every tool call of a task, even ones trimmed from history later."""
+
+    def __init__(self):
+        self.tool_calls: List[Dict[str, Any]] = []
+
+    def appended(self, msg: Dict[str, Any]) -> None:
+        for call in msg.get("tool_calls") or ():
+            self.tool_calls.append({"id": call["id"], "name": call["function"]["name"],
+                                    "arguments": call["function"]["arguments"]})
+
+    def removed(self, messages: List[Dict[str, Any]]) -> None:
+        pass
+
+    def replaced(self, messages: List[Dict[str, Any]], msg: Dict[str, Any]) -> None:
+        pass
+
+def parse_tasks(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parse JSONL tasks: {"id", "prompt" or "prompts", "root", "add"}; blank lines are skipped."""
+    tasks = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            task = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Task line {number}: invalid JSON ({e})") from None
+        if isinstance(task, str):
+            task = {"prompt": task}
+        prompts = task.get("prompts") or ([task["prompt"]] if task.get("prompt") else [])
+        if not prompts:
+            raise ValueError(f"Task line {number}: needs 'prompt' or 'prompts'")
+        task["prompts"] = prompts
+        task.setdefault("id", str(number))
+        tasks.append(task)
+    return tasks
+
+def _add_to_context(history: ContextStore, path: str) -> None:
+    normalized_path = normalize_path(path)
+    if os.path.isdir(normalized_path):
+        added, _, _ = ingest_directory(normalized_path)
+        for file_path, content in added:
+            history.add_file(file_path, content)
+    else:
+        history.add_file(normalized_path, read_local_file(normalized_path))
+
+async def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one task as an independent session and return its result record.
+
+    The conversation, context manager, working root and touched-file set are bound
+    in this task's context only; the file cache and HTTP connection pool are shared.
+    """
+    from .turns import stream_openai_response
+
+    started = time.perf_counter()
+    root = os.path.abspath(os.path.expanduser(task.get("root") or os.getcwd()))
+    history = new_conversation()
+    log = TaskLog()
+    history.log = log
+    touched: Set[str] = set()
+    result: Dict[str, Any] = {"id": task["id"], "status": "ok", "root": root}
+    turns = []
+    try:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Task root '{root}' is not a directory")
+        workspace_root.set(root)
+        conversation_history.bind(history)
+        context_manager.bind(ContextManager())
+        _touched_files.set(touched)
+        for path in task.get("add") or ():
+            await asyncio.to_thread(_add_to_context, history, path)
+        for prompt in task["prompts"]:
+            response = await stream_openai_response(prompt)
+            if tracer.last_turn is not None:
+                turns.append(tracer.last_turn)
+            if response and response.get("error"):
+                raise RuntimeError(response["error"])
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e) if isinstance(e, RuntimeError) else f"{type(e).__name__}: {e}"
+
+    final = next((msg for msg in reversed(history) if msg["role"] == "assistant" and msg.get("content")), None)
+    result.update(
+        final_content=history.materialize(final)["content"] if final is not None else None,
+        tool_calls=log.tool_calls,
+        files_touched=sorted(touched),
+        timings={
+            "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+            "turns": [{key: turn[key] for key in ("turn", "status", "wall_ms", "streams", "tools", "prompt_cache", "routing")
+                       if key in turn}
+                      for turn in turns],
+        },
+    )
+    return result
+
+async def run_batch(tasks: List[Dict[str, Any]], output: IO[str], workers: int = BATCH_WORKERS) -> int:
+    """Run 'tasks' on 'workers' concurrent sessions, writing one JSON line per finished task.
+
+    Returns the number of failed tasks.
+    """
+    from .transport import close_client
+
+    queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    for task in tasks:
+        queue.put_nowait(task)
+    failed = 0
+
+    async def worker() -> None:
+        nonlocal failed
+        while not queue.empty():
+            task = queue.get_nowait()
+            # Each task runs in its own asyncio task, and so in its own copy of the context
+            result = await asyncio.create_task(run_task(task))
+            failed += result["status"] != "ok"
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(tasks))))))
+    finally:
+        await close_client()
+    return failed
+
+def main_batch(source: str, output_path: Optional[str] = None, workers: int = BATCH_WORKERS,
+               verbose: bool = False) -> int:
+    """Entry point of --batch: read tasks from 'source' (a JSONL file, or - for stdin) and run them."""
+    from . import render
+
+    if verbose:
+        console.file = sys.stderr
+    else:
+        console.quiet = True
+    # The collapsed reasoning spinner is a live display, and concurrent tasks cannot share one
+    render.REASONING_DISPLAY = "full"
+    try:
+        if source == "-":
+            tasks = parse_tasks(sys.stdin)
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                tasks = parse_tasks(f)
+    except (OSError, ValueError) as e:
+        print(f"deepseek-engineer: {e}", file=sys.stderr)
+        return 2
+    if not tasks:
+        return 0
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    try:
+        failed = asyncio.run(run_batch(tasks, output, workers))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
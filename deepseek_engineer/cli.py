@@ -0,0 +1,68 @@
+# --------------------------------------------------------------------------------
+# Command-line entry point
+# --------------------------------------------------------------------------------
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+from . import __version__
+from .startup import ImportProfiler, print_startup_report
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="deepseek-engineer", description="DeepSeek Engineer coding assistant")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument(
+        "--startup-profile", nargs="?", const="table", choices=["table", "json"],
+        help="Start up to the prompt, report per-import and per-phase timings, then exit",
+    )
+    parser.add_argument(
+        "--session", metavar="NAME",
+        help="Record the conversation as session NAME, resuming it if it already exists",
+    )
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument(
+        "--batch", metavar="TASKS",
+        help="Run the tasks in a JSONL file (- for stdin) as independent sessions without prompting, "
+             "printing one JSON result per task",
+    )
+    batch.add_argument("--workers", type=int, default=None,
+                       help="Tasks run concurrently in batch mode (default: DEEPSEEK_BATCH_WORKERS or 4)")
+    batch.add_argument("--output", metavar="FILE", help="Write batch results to FILE instead of stdout")
+    batch.add_argument("--verbose", action="store_true", help="Show the usual terminal output on stderr in batch mode")
+    return parser.parse_args(argv)
+
+def profile_startup(output: str) -> int:
+    """Run every startup step the REPL takes before reading input, under the import profiler."""
+    with ImportProfiler() as profiler:
+        with profiler.phase("import application"):
+            from . import repl
+        with profiler.phase("welcome banner"):
+            repl.print_welcome()
+        with profiler.phase("prompt session"):
+            from .ui import get_prompt_session
+            get_prompt_session()
+    if output == "json":
+        print(json.dumps(profiler.to_dict()))
+    else:
+        print_startup_report(profiler)
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.startup_profile:
+        return profile_startup(args.startup_profile)
+
+    if args.batch:
+        from .batch import BATCH_WORKERS, main_batch
+
+        return main_batch(args.batch, args.output, args.workers or BATCH_WORKERS, args.verbose)
+
+    import asyncio
+    from .repl import run_session
+
+    asyncio.run(run_session(args.session))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
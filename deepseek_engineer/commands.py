@@ -0,0 +1,249 @@
+# --------------------------------------------------------------------------------
+# Slash commands
+# --------------------------------------------------------------------------------
+import os
+
+from .context import conversation_history, history_stats
+from .files import current_root, file_cache, normalize_path, read_local_file
+from .ingest import ADD_MAX_FILES, ingest_directory
+from .repomap import build_repo_map
+from .sessions import session_log
+from .tracing import tracer
+from .ui import console
+
+def try_handle_add_command(user_input: str) -> bool:
+    prefix = "/add "
+    if user_input.strip().lower().startswith(prefix):
+        path_to_add = user_input[len(prefix):].strip()
+        try:
+            normalized_path = normalize_path(path_to_add)
+            if os.path.isdir(normalized_path):
+                # Handle entire directory
+                add_directory_to_conversation(normalized_path)
+            else:
+                # Handle a single file as before
+                content = read_local_file(normalized_path)
+                conversation_history.add_file(normalized_path, content)
+                console.print(f"[bold blue]✓[/bold blue] Added file '[bright_cyan]{normalized_path}[/bright_cyan]' to conversation.\n")
+        except OSError as e:
+            console.print(f"[bold red]✗[/bold red] Could not add path '[bright_cyan]{path_to_add}[/bright_cyan]': {e}\n")
+        return True
+    return False
+
+def try_handle_map_command(user_input: str) -> bool:
+    """/map [path]: add a ranked map of the Python modules (or those below 'path') to the conversation."""
+    stripped = user_input.strip()
+    if stripped.lower() != "/map" and not stripped.lower().startswith("/map "):
+        return False
+    path = stripped[len("/map"):].strip() or None
+    try:
+        with console.status("[bold bright_blue]🗺 Mapping repository...[/bold bright_blue]"):
+            repo_map = build_repo_map(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]✗[/bold red] Could not map '[bright_cyan]{path or current_root()}[/bright_cyan]': {e}\n")
+        return True
+    root = normalize_path(path or current_root())
+    label = f"repository map of {root}"
+    # The map is a plain system message tagged with its root, so a newer map of the same root replaces it
+    previous = [msg for msg in conversation_history[1:] if msg.get("map_root") == root]
+    if any(conversation_history.materialize(msg)["content"] == repo_map for msg in previous):
+        console.print(f"[dim]The {label} in context is already up to date.[/dim]\n")
+        return True
+    for msg in previous:
+        conversation_history.remove(msg)
+    conversation_history.append({"role": "system", "content": repo_map, "map_root": root})
+    console.print(f"[bold blue]✓[/bold blue] Added {label} to conversation "
+                  f"[dim](~{len(repo_map) // 4 + 1:,} tokens)[/dim]\n")
+    return True
+
+def _session_argument(user_input: str, command: str):
+    """Return the argument of 'command' ("" when bare), or None when the input is another command."""
+    stripped = user_input.strip()
+    if stripped.lower() != command and not stripped.lower().startswith(command + " "):
+        return None
+    return stripped[len(command):].strip()
+
+def try_handle_save_command(user_input: str) -> bool:
+    """/save [name]: keep the current session, optionally under a new name."""
+    name = _session_argument(user_input, "/save")
+    if name is None:
+        return False
+    if not session_log.recording:
+        console.print("[yellow dim]⚠ Sessions are off; set DEEPSEEK_SESSIONS=1 or start with --session <name>[/yellow dim]\n")
+        return True
+    try:
+        saved = session_log.save(name or None)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]✗[/bold red] Could not save session: {e}\n")
+        return True
+    console.print(f"[bold blue]✓[/bold blue] Session saved as '[bright_cyan]{saved}[/bright_cyan]' "
+                  f"[dim](resume with /resume {saved} or --session {saved})[/dim]\n")
+    return True
+
+def try_handle_resume_command(user_input: str) -> bool:
+    """/resume [name]: list recent sessions, or replace the conversation with session 'name'."""
+    name = _session_argument(user_input, "/resume")
+    if name is None:
+        return False
+    if not session_log.recording:
+        console.print("[yellow dim]⚠ Sessions are off; set DEEPSEEK_SESSIONS=1 or start with --session <name>[/yellow dim]\n")
+        return True
+    if not name:
+        import time
+        from rich.table import Table
+
+        table = Table(title="💾 Sessions", show_header=True, header_style="bold bright_blue", border_style="blue")
+        table.add_column("Name", style="bright_cyan")
+        table.add_column("Prompts", justify="right")
+        table.add_column("Last used")
+        table.add_column("Saved")
+        for session in session_log.list_sessions():
+            label = f"{session['name']} [dim](current)[/dim]" if session["current"] else session["name"]
+            table.add_row(label, f"{session['prompts']:,}",
+                          time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"])),
+                          "✓" if session["saved"] else "")
+        console.print(table)
+        console.print("[dim]Unsaved sessions are kept until newer ones replace them; use /resume <name> to continue one.[/dim]\n")
+        return True
+    try:
+        with console.status("[bold bright_blue]📂 Resuming session...[/bold bright_blue]"):
+            restored = session_log.resume(name)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]✗[/bold red] Could not resume session: {e}\n")
+        return True
+    console.print(f"[bold blue]✓[/bold blue] Resumed session '[bright_cyan]{name}[/bright_cyan]' "
+                  f"[dim]({restored:,} messages)[/dim]\n")
+    return True
+
+def try_handle_cache_command(user_input: str) -> bool:
+    if user_input.strip().lower() != "/cache":
+        return False
+    from rich.table import Table
+
+    stats = file_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{stats['hits'] / lookups:.1%}" if lookups else "n/a"
+    table = Table(title="🗂 File Cache", show_header=True, header_style="bold bright_blue", border_style="blue")
+    table.add_column("Metric", style="bright_cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("Hits", f"{stats['hits']:,}")
+    table.add_row("Misses", f"{stats['misses']:,}")
+    table.add_row("Hit rate", hit_rate)
+    table.add_row("Cached files", f"{stats['files']:,}")
+    table.add_row("Cached bytes", f"{stats['bytes']:,} / {stats['max_bytes']:,}")
+    console.print(table)
+    console.print()
+    return True
+
+def _format_ms(value) -> str:
+    return "-" if value is None else f"{value:,.0f} ms"
+
+def try_handle_stats_command(user_input: str) -> bool:
+    if user_input.strip().lower() != "/stats":
+        return False
+    from rich.table import Table
+
+    if tracer.turns:
+        last = tracer.turns[-1]
+        streams = Table(title=f"⏱ Last turn (#{last['turn']}, {last['status']}, {_format_ms(last['wall_ms'])})",
+                        show_header=True, header_style="bold bright_blue", border_style="blue")
+        for column in ("Stream", "Request", "First reasoning", "First content", "Total", "Tokens/s"):
+            streams.add_column(column, style="bright_cyan" if column == "Stream" else None,
+                               justify="left" if column == "Stream" else "right")
+        for stream in last["streams"]:
+            label = f"{stream['phase']} [dim]({stream['model']})[/dim]" if stream.get("model") else stream["phase"]
+            streams.add_row(label, _format_ms(stream["request_ms"]), _format_ms(stream["first_reasoning_ms"]),
+                            _format_ms(stream["first_content_ms"]), _format_ms(stream["stream_ms"]),
+                            "-" if stream["tokens_per_second"] is None else f"{stream['tokens_per_second']:,.1f}")
+        console.print(streams)
+
+        if last["tools"] or last["spans"]:
+            tools = Table(title="🔧 Tool calls", show_header=True, header_style="bold bright_blue", border_style="blue")
+            tools.add_column("Operation", style="bright_cyan")
+            tools.add_column("Wall", justify="right")
+            tools.add_column("Read", justify="right")
+            tools.add_column("Written", justify="right")
+            for span in last["tools"] + last["spans"]:
+                tools.add_row(span.get("tool", span["name"]), f"{span['wall_ms']:,.1f} ms",
+                              f"{span['bytes_read']:,}", f"{span['bytes_written']:,}")
+            console.print(tools)
+
+    totals = Table(title="📊 Session", show_header=True, header_style="bold bright_blue", border_style="blue")
+    totals.add_column("Metric", style="bright_cyan")
+    totals.add_column("Value", justify="right")
+    totals.add_row("Turns", f"{tracer.turn_count:,}")
+    first_tokens = [
+        min(t for t in (s["first_reasoning_ms"], s["first_content_ms"]) if t is not None)
+        for turn in tracer.turns for s in turn["streams"]
+        if s["first_reasoning_ms"] is not None or s["first_content_ms"] is not None
+    ]
+    rates = [s["tokens_per_second"] for turn in tracer.turns for s in turn["streams"] if s["tokens_per_second"]]
+    tool_ms = sum(span["wall_ms"] for turn in tracer.turns for span in turn["tools"])
+    totals.add_row("Avg time to first token", _format_ms(sum(first_tokens) / len(first_tokens) if first_tokens else None))
+    totals.add_row("Avg tokens/s", f"{sum(rates) / len(rates):,.1f}" if rates else "-")
+    totals.add_row(f"Tool time (last {len(tracer.turns)} turns)", _format_ms(tool_ms))
+    stats = history_stats()
+    totals.add_row("History messages", f"{stats['messages']:,}")
+    totals.add_row("History size", f"{stats['content_chars']:,} chars (~{stats['estimated_tokens']:,} tokens)")
+    if stats["spilled_chars"]:
+        totals.add_row("Spilled to disk", f"{stats['spilled_chars']:,} chars")
+    if tracer.turns and "tracemalloc" in tracer.turns[-1]:
+        memory = tracer.turns[-1]["tracemalloc"]
+        totals.add_row("Traced memory", f"{memory['current_bytes']:,} bytes (peak {memory['peak_bytes']:,})")
+    for event in list(tracer.events)[-1:]:
+        totals.add_row("Last /add", f"{event.get('files', 0):,} files in {_format_ms(event['wall_ms'])}")
+    totals.add_row("Trace file", tracer.trace_file or "[dim]off (set DEEPSEEK_TRACE_FILE)[/dim]")
+    from .compaction import compactor
+    from .replay import replay_cache
+    from .routing import router
+
+    if compactor.enabled:
+        compaction = compactor.stats()
+        totals.add_row("Compaction", f"{compaction['applied']:,} digest(s), ~{compaction['saved_tokens']:,} tokens saved"
+                       + (" [dim](running)[/dim]" if compaction["running"] else ""))
+
+    if router.enabled:
+        routing = router.stats()
+        totals.add_row("Model routing savings (est.)",
+                       f"~{routing['saved_tokens_est']:,} tokens, {_format_ms(routing['saved_ms_est'])}"
+                       if routing["baseline_streams"] else "[dim]no baseline request yet[/dim]")
+
+    if replay_cache.enabled:
+        replay = replay_cache.stats()
+        totals.add_row("Replay cache", f"{replay['mode']}: {replay['hits']:,} hits, {replay['misses']:,} misses, "
+                                       f"{replay['recorded']:,} recorded")
+    console.print(totals)
+    console.print()
+    return True
+
+def add_directory_to_conversation(directory_path: str):
+    with tracer.span("add_directory", path=directory_path) as span, \
+            console.status("[bold bright_blue]🔍 Scanning directory...[/bold bright_blue]") as status:
+        def report_progress(added_count: int, skipped_count: int):
+            status.update(f"[bold bright_blue]📥 Reading files... {added_count} added, {skipped_count} skipped[/bold bright_blue]")
+
+        added, skipped_files, limit_reached = ingest_directory(directory_path, on_progress=report_progress)
+        # Files are read on the ingestion pool, outside the span's thread, so count them here
+        span.bytes_read = sum(len(content) for _, content in added)
+        span.attrs.update(files=len(added), skipped=len(skipped_files))
+        if limit_reached:
+            console.print(f"[bold yellow]⚠[/bold yellow] Reached maximum file limit ({ADD_MAX_FILES})")
+
+        added_files = []
+        for normalized_path, content in added:
+            conversation_history.add_file(normalized_path, content)
+            added_files.append(normalized_path)
+        total_files_processed = len(added_files)
+
+        console.print(f"[bold blue]✓[/bold blue] Added folder '[bright_cyan]{directory_path}[/bright_cyan]' to conversation.")
+        if added_files:
+            console.print(f"\n[bold bright_blue]📁 Added files:[/bold bright_blue] [dim]({len(added_files)} of {total_files_processed})[/dim]")
+            for f in added_files:
+                console.print(f"  [bright_cyan]📄 {f}[/bright_cyan]")
+        if skipped_files:
+            console.print(f"\n[bold yellow]⏭ Skipped files:[/bold yellow] [dim]({len(skipped_files)})[/dim]")
+            for f in skipped_files[:10]:  # Show only first 10 to avoid clutter
+                console.print(f"  [yellow dim]⚠ {f}[/yellow dim]")
+            if len(skipped_files) > 10:
+                console.print(f"  [dim]... and {len(skipped_files) - 10} more[/dim]")
+        console.print()
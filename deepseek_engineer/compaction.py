@@ -0,0 +1,192 @@
+# --------------------------------------------------------------------------------
+# Background compaction of older turns
+# --------------------------------------------------------------------------------
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .context import (
+    BlobRef, ContextManager, ContextStore, FileDiff, TextRef, context_manager, conversation_history,
+    file_message_path,
+)
+from .prompts import COMPACTION_PROMPT
+from .transport import create_chat_stream
+from .ui import console
+
+COMPACTION_ENABLED = os.getenv("DEEPSEEK_COMPACTION", "1").lower() not in ("0", "false", "no", "off")
+COMPACT_AT = float(os.getenv("DEEPSEEK_COMPACT_AT", "0.5"))  # Share of the prompt budget that starts a compaction
+COMPACT_KEEP_TURNS = max(1, int(os.getenv("DEEPSEEK_COMPACT_KEEP_TURNS", "3")))  # Recent turns kept verbatim
+COMPACT_MIN_TOKENS = int(os.getenv("DEEPSEEK_COMPACT_MIN_TOKENS", "2000"))  # Smaller prefixes are not worth a request
+COMPACT_MODEL = os.getenv("DEEPSEEK_COMPACT_MODEL", "deepseek-chat")
+COMPACT_MAX_TOKENS = int(os.getenv("DEEPSEEK_COMPACT_MAX_TOKENS", "2000"))
+EXCERPT_CHARS = 2000  # Longest excerpt of one message in the transcript sent for summarising
+DIGEST_PREFIX = "Digest of the earlier conversation"
+
+def is_digest(msg: Dict[str, Any]) -> bool:
+    content = msg.get("content")
+    return msg["role"] == "system" and isinstance(content, str) and content.startswith(DIGEST_PREFIX)
+
+def _excerpt(text: str, limit: int = EXCERPT_CHARS) -> str:
+    text = text.strip()
+    return text if len(text) <= limit else f"{text[:limit]} [... {len(text) - limit:,} chars omitted]"
+
+def _content_text(history: ContextStore, content: Any) -> str:
+    """Message text for the transcript, with file bodies reduced to a mention of the file."""
+    if not isinstance(content, list):
+        return content or ""
+    text = []
+    for part in content:
+        if isinstance(part, str):
+            text.append(part)
+        elif isinstance(part, BlobRef):
+            text.append(f"[contents of '{part.path}']")
+        elif isinstance(part, TextRef):
+            text.append(_excerpt(history.blobs.get(part.digest)))
+        elif isinstance(part, FileDiff):
+            text.append(part.diff)
+    return "".join(text)
+
+def build_transcript(history: ContextStore, messages: List[Dict[str, Any]]) -> str:
+    """Plain-text transcript of 'messages' for the summarising request."""
+    tool_names = {call["id"]: call["function"]["name"]
+                  for msg in messages for call in msg.get("tool_calls") or ()}
+    lines = []
+    for msg in messages:
+        text = _excerpt(_content_text(history, msg.get("content")))
+        if is_digest(msg):
+            lines.append(f"[Earlier digest]\n{text}")
+        elif msg["role"] == "tool":
+            lines.append(f"[Result of {tool_names.get(msg.get('tool_call_id'), 'tool')}]\n{text}")
+        elif msg["role"] == "assistant":
+            calls = [f"{call['function']['name']}({_excerpt(call['function']['arguments'], 300)})"
+                     for call in msg.get("tool_calls") or ()]
+            lines.append("[Assistant]\n" + "\n".join(filter(None, [text] + [f"Called {call}" for call in calls])))
+        else:
+            lines.append(f"[{msg['role'].capitalize()}]\n{text}")
+    return "\n\n".join(lines)
+
+class Compactor:
+    """Condenses older turns into a digest while the user is at the prompt.
+
+    schedule() snapshots the turns before the last COMPACT_KEEP_TURNS once the
+    history passes COMPACT_AT of the prompt budget, and summarises them in a
+    background task. apply() never waits: if the digest is ready and every message
+    it covers is still in the history, it replaces them in one step; otherwise the
+    digest is dropped. File-content messages are left alone, since the context
+    manager already evicts and reloads them by use.
+    """
+
+    def __init__(self, enabled: bool = COMPACTION_ENABLED, threshold: float = COMPACT_AT,
+                 keep_turns: int = COMPACT_KEEP_TURNS, min_tokens: int = COMPACT_MIN_TOKENS):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.keep_turns = keep_turns
+        self.min_tokens = min_tokens
+        self.task: Optional[asyncio.Task] = None
+        self.messages: List[Dict[str, Any]] = []  # Messages the running task summarises
+        self.runs = 0
+        self.applied = 0
+        self.discarded = 0
+        self.failed = 0
+        self.saved_tokens = 0
+        self.last_ms: Optional[float] = None
+
+    def candidates(self, history: ContextStore) -> List[Dict[str, Any]]:
+        """Messages before the last 'keep_turns' turns, apart from the system prompt and file messages."""
+        users = [i for i, msg in enumerate(history) if msg["role"] == "user"]
+        if len(users) <= self.keep_turns:
+            return []
+        return [msg for msg in history[1:users[-self.keep_turns]] if file_message_path(msg) is None]
+
+    def schedule(self, history: ContextStore = conversation_history, manager: ContextManager = context_manager) -> bool:
+        """Start summarising older turns in the background if the history is large enough; returns whether it started."""
+        if not self.enabled or self.task is not None:
+            return False
+        if manager.total_tokens(history) < self.threshold * manager.budget:
+            return False
+        messages = self.candidates(history)
+        if not any(msg["role"] == "user" for msg in messages) or manager.total_tokens(messages) < self.min_tokens:
+            return False
+        self.messages = messages
+        self.runs += 1
+        self.task = asyncio.create_task(self._summarize(build_transcript(history, messages)))
+        return True
+
+    async def _summarize(self, transcript: str) -> str:
+        started = time.perf_counter()
+        stream = await create_chat_stream(
+            model=COMPACT_MODEL,
+            messages=[
+                {"role": "system", "content": COMPACTION_PROMPT.format(max_words=COMPACT_MAX_TOKENS // 3)},
+                {"role": "user", "content": transcript},
+            ],
+            max_completion_tokens=COMPACT_MAX_TOKENS,
+            stream=True,
+        )
+        parts = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            await stream.close()
+        self.last_ms = (time.perf_counter() - started) * 1000
+        return "".join(parts).strip()
+
+    def apply(self, history: ContextStore = conversation_history, manager: ContextManager = context_manager) -> int:
+        """Swap a finished digest into 'history' without waiting for one; returns the tokens saved."""
+        task = self.task
+        if task is None or not task.done():
+            return 0
+        self.task = None
+        messages, self.messages = self.messages, []
+        if task.cancelled():
+            return 0
+        if task.exception() is not None:
+            self.failed += 1
+            console.print(f"[yellow dim]⚠ Background compaction failed: {task.exception()}[/yellow dim]")
+            return 0
+
+        summary = task.result()
+        live = {id(msg) for msg in history}
+        if not summary or not all(id(msg) in live for msg in messages):
+            # The history was cleared, resumed or trimmed while the digest was being written
+            self.discarded += 1
+            return 0
+        digest = {
+            "role": "system",
+            "content": f"{DIGEST_PREFIX} ({len(messages)} messages condensed; their full text is no longer "
+                       f"available, so read files again when details matter):\n\n{summary}",
+        }
+        saved = manager.total_tokens(messages) - manager.total_tokens([digest])
+        if saved <= 0:
+            self.discarded += 1
+            return 0
+        history.replace(messages, digest)
+        self.applied += 1
+        self.saved_tokens += saved
+        console.print(f"[dim]🗜 Condensed {len(messages)} earlier message(s) into a digest (~{saved:,} tokens saved)[/dim]")
+        return saved
+
+    def cancel(self) -> None:
+        if self.task is None:
+            return
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            self.task.exception()  # Retrieved, so an unused failure is not reported at exit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "runs": self.runs,
+            "applied": self.applied,
+            "discarded": self.discarded,
+            "failed": self.failed,
+            "saved_tokens": self.saved_tokens,
+            "last_ms": self.last_ms,
+            "running": self.task is not None and not self.task.done(),
+        }
+
+compactor = Compactor()
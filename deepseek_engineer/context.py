@@ -0,0 +1,719 @@
+# --------------------------------------------------------------------------------
+# Conversation state
+# --------------------------------------------------------------------------------
+import os
+import json
+import bisect
+import hashlib
+import difflib
+import threading
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .prompts import system_PROMPT
+from .ui import console
+
+FILE_CONTENT_PREFIX = "Content of file '"
+
+class FileContent(NamedTuple):
+    """A file body produced by a read, interned into the blob store when its message is stored."""
+    path: str
+    text: str
+
+class BlobRef(NamedTuple):
+    """Reference from a stored message to a file body held once in the blob store."""
+    path: str
+    digest: str
+    length: int
+
+class FileDiff(NamedTuple):
+    """A unified diff that brings a file in context up to date; 'text' is the new content until stored,
+    after which 'digest' names it in the blob store."""
+    path: str
+    diff: str
+    text: Optional[str]
+    digest: Optional[str] = None
+
+class TextRef(NamedTuple):
+    """A large message body moved into the blob store so it can be spilled to disk."""
+    digest: str
+    length: int
+
+# Message content is either a plain string or a list of parts (str, FileContent, BlobRef, FileDiff or TextRef)
+ContentParts = List[Union[str, FileContent, BlobRef, FileDiff, TextRef]]
+
+# Message keys kept in the store and the session log but never sent to the API;
+# "map_root" marks a /map message with the root it maps, so a newer map replaces it
+LOCAL_MESSAGE_KEYS = ("map_root",)
+
+# "stable" keeps an append-only prompt prefix for the API's prefix cache: system prompt,
+# then pinned file context in a fixed order, then the turns. "interleaved" sends file
+# messages where they were added.
+HISTORY_LAYOUT = os.getenv("DEEPSEEK_HISTORY_LAYOUT", "stable").lower()
+
+# Blobs and message bodies of at least this many characters are kept on disk while a
+# session log is attached (see sessions.py) and read back only when a request is built
+SPILL_CHARS = int(os.getenv("DEEPSEEK_SPILL_CHARS", "16384"))
+
+DIFF_MAX_CHANGED_LINES = 20_000  # Beyond this the file is re-sent in full instead
+DIFF_MATCHER_CELLS = 4_000_000  # Largest unanchored region (old lines x new lines) handed to difflib
+
+Opcode = Tuple[str, int, int, int, int]
+
+def _unique_anchors(a: List[str], b: List[str], a_lo: int, a_hi: int, b_lo: int, b_hi: int) -> List[Tuple[int, int]]:
+    """Lines occurring exactly once in both ranges, as (i, j) pairs increasing in both (patience diff)."""
+    a_counts = Counter(a[a_lo:a_hi])
+    b_counts = Counter(b[b_lo:b_hi])
+    b_index = dict(zip(b[b_lo:b_hi], range(b_lo, b_hi)))
+    pairs = [(i, b_index[line]) for i, line in enumerate(a[a_lo:a_hi], a_lo)
+             if a_counts[line] == 1 and b_counts[line] == 1]
+    # Longest subsequence of the pairs that also increases in j
+    tail_js: List[int] = []
+    tails: List[int] = []
+    links: List[int] = []
+    for index, (_, j) in enumerate(pairs):
+        position = bisect.bisect_left(tail_js, j)
+        links.append(tails[position - 1] if position else -1)
+        if position == len(tails):
+            tails.append(index)
+            tail_js.append(j)
+        else:
+            tails[position] = index
+            tail_js[position] = j
+    anchors = []
+    index = tails[-1] if tails else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = links[index]
+    return anchors[::-1]
+
+def _diff_opcodes(a: List[str], b: List[str], a_lo: int, a_hi: int, b_lo: int, b_hi: int, opcodes: List[Opcode]) -> None:
+    """Append opcodes turning a[a_lo:a_hi] into b[b_lo:b_hi], aligning on unique lines first."""
+    start_a, start_b = a_lo, b_lo
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        a_lo += 1
+        b_lo += 1
+    if a_lo > start_a:
+        opcodes.append(("equal", start_a, a_lo, start_b, b_lo))
+    end_a, end_b = a_hi, b_hi
+    while a_hi > a_lo and b_hi > b_lo and a[a_hi - 1] == b[b_hi - 1]:
+        a_hi -= 1
+        b_hi -= 1
+    if a_lo == a_hi or b_lo == b_hi:
+        if a_lo < a_hi or b_lo < b_hi:
+            opcodes.append(("delete" if b_lo == b_hi else "insert", a_lo, a_hi, b_lo, b_hi))
+    else:
+        anchors = _unique_anchors(a, b, a_lo, a_hi, b_lo, b_hi)
+        if anchors:
+            i, j = a_lo, b_lo
+            for anchor_i, anchor_j in anchors:
+                if anchor_i > i or anchor_j > j:
+                    _diff_opcodes(a, b, i, anchor_i, j, anchor_j, opcodes)
+                opcodes.append(("equal", anchor_i, anchor_i + 1, anchor_j, anchor_j + 1))
+                i, j = anchor_i + 1, anchor_j + 1
+            _diff_opcodes(a, b, i, a_hi, j, b_hi, opcodes)
+        elif (a_hi - a_lo) * (b_hi - b_lo) <= DIFF_MATCHER_CELLS:
+            matcher = difflib.SequenceMatcher(None, a[a_lo:a_hi], b[b_lo:b_hi], autojunk=False)
+            opcodes.extend((tag, a_lo + i1, a_lo + i2, b_lo + j1, b_lo + j2)
+                           for tag, i1, i2, j1, j2 in matcher.get_opcodes())
+        else:
+            opcodes.append(("replace", a_lo, a_hi, b_lo, b_hi))
+    if a_hi < end_a:
+        opcodes.append(("equal", a_hi, end_a, b_hi, end_b))
+
+def _grouped_opcodes(opcodes: List[Opcode], context: int) -> List[List[Opcode]]:
+    """Split opcodes into hunks with 'context' lines of context, as SequenceMatcher.get_grouped_opcodes() does."""
+    codes: List[Opcode] = []
+    for code in opcodes:
+        if codes and code[0] == "equal" and codes[-1][0] == "equal":
+            codes[-1] = ("equal", codes[-1][1], code[2], codes[-1][3], code[4])
+        elif code[1] < code[2] or code[3] < code[4]:
+            codes.append(code)
+    if not codes:
+        return []
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+    groups: List[List[Opcode]] = []
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, i1 + context, j1, j1 + context))
+            groups.append(group)
+            group = []
+            i1, j1 = i2 - context, j2 - context
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return [group for group in groups if any(code[0] != "equal" for code in group)]
+
+def unified_file_diff(path: str, old: str, new: str, context: int = 3) -> Optional[str]:
+    """Return a unified diff from 'old' to 'new', or None when more than DIFF_MAX_CHANGED_LINES lines changed.
+
+    Lines are aligned on lines that occur once in both versions (patience diff), and
+    only the unaligned regions between them go through difflib, so the cost depends
+    on how much changed rather than on the size of the file or the distance between
+    edits.
+    """
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    if abs(len(a) - len(b)) > DIFF_MAX_CHANGED_LINES:
+        return None
+    opcodes: List[Opcode] = []
+    _diff_opcodes(a, b, 0, len(a), 0, len(b), opcodes)
+    if sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal") > DIFF_MAX_CHANGED_LINES:
+        return None
+
+    lines = [f"--- {path}\n", f"+++ {path}\n"]
+    for group in _grouped_opcodes(opcodes, context):
+        i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+        lines.append(f"@@ -{i1 + 1},{i2 - i1} +{j1 + 1},{j2 - j1} @@\n")
+        for tag, ai1, ai2, bj1, bj2 in group:
+            if tag == "equal":
+                lines.extend(" " + line for line in a[ai1:ai2])
+                continue
+            lines.extend("-" + line for line in a[ai1:ai2])
+            lines.extend("+" + line for line in b[bj1:bj2])
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+
+def file_content_parts(path: str, content: str) -> ContentParts:
+    return [f"{FILE_CONTENT_PREFIX}{path}':\n\n", FileContent(path, content)]
+
+def join_content_parts(separator: str, items: List[Union[str, ContentParts]]) -> Union[str, ContentParts]:
+    if all(isinstance(item, str) for item in items):
+        return separator.join(items)
+    parts: ContentParts = []
+    for i, item in enumerate(items):
+        if i:
+            parts.append(separator)
+        parts.extend(item if isinstance(item, list) else [item])
+    return parts
+
+def content_length(content: Union[None, str, ContentParts]) -> int:
+    if not content:
+        return 0
+    if isinstance(content, str):
+        return len(content)
+    return sum(len(part) if isinstance(part, str) else len(part.text) if isinstance(part, FileContent)
+               else len(part.diff) if isinstance(part, FileDiff) else part.length
+               for part in content)
+
+class BlobStore:
+    """Content-addressed, reference-counted storage for file bodies.
+
+    When a spill backend is set (any object with put_blob(digest, text) and
+    get_blob(digest)), blobs of SPILL_CHARS or more are written to it and only
+    their length stays in memory; get() reads them back on demand.
+    """
+
+    def __init__(self, spill: Any = None):
+        self.spill = spill
+        self._blobs: Dict[str, List[Any]] = {}  # digest -> [text or None when spilled, refcount, length]
+        self._digest_by_id: Dict[int, str] = {}  # id(text) -> digest for interned, resident strings
+
+    def digest(self, text: str) -> str:
+        # Cached file reads hand back the same str object, so interned texts skip hashing
+        digest = self._digest_by_id.get(id(text))
+        if digest is not None and self._blobs[digest][0] is text:
+            return digest
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def acquire(self, text: str) -> str:
+        digest = self.digest(text)
+        blob = self._blobs.get(digest)
+        if blob is None:
+            if self.spill is not None and len(text) >= SPILL_CHARS:
+                self.spill.put_blob(digest, text)
+                self._blobs[digest] = [None, 1, len(text)]
+            else:
+                self._blobs[digest] = [text, 1, len(text)]
+                self._digest_by_id[id(text)] = digest
+        else:
+            blob[1] += 1
+        return digest
+
+    def retain(self, digest: str) -> str:
+        """Take another reference to a stored blob."""
+        self._blobs[digest][1] += 1
+        return digest
+
+    def adopt(self, digest: str, text: Optional[str], length: int) -> None:
+        """Make a blob known without referencing it; 'text' is None when it stays in the spill backend."""
+        if digest not in self._blobs:
+            self._blobs[digest] = [text, 0, length]
+            if text is not None:
+                self._digest_by_id[id(text)] = digest
+
+    def prune(self) -> None:
+        """Forget adopted blobs that nothing ended up referencing."""
+        for digest in [digest for digest, blob in self._blobs.items() if blob[1] <= 0]:
+            self._digest_by_id.pop(id(self._blobs.pop(digest)[0]), None)
+
+    def release(self, digest: str) -> None:
+        blob = self._blobs.get(digest)
+        if blob is None:
+            return
+        blob[1] -= 1
+        if blob[1] <= 0:
+            del self._blobs[digest]
+            if blob[0] is not None:
+                self._digest_by_id.pop(id(blob[0]), None)
+
+    def get(self, digest: str) -> str:
+        text = self._blobs[digest][0]
+        return text if text is not None else self.spill.get_blob(digest)
+
+    def stats(self) -> Dict[str, int]:
+        resident = sum(length for text, _, length in self._blobs.values() if text is not None)
+        total = sum(length for _, _, length in self._blobs.values())
+        return {"blobs": len(self._blobs), "bytes": resident, "spilled_bytes": total - resident}
+
+class ContextStore(list):
+    """Conversation history with a path index and deduplicated file bodies.
+
+    Messages may carry their content as a list of parts; file bodies in those parts
+    are interned into a content-addressed BlobStore when the message is stored, so a
+    file mentioned many times is held once. The store indexes which message holds
+    the newest copy of each path. When a different version of a file arrives, the
+    stale system copy is dropped and stale copies inside tool results are replaced
+    by a short note. The store also tracks which version of each file the model has
+    seen, so changes can be sent as diffs against it (see file_change_note()).
+    Use to_messages() to build the plain dicts sent to the API; with the stable
+    layout, file messages are sent as pinned context right after the system prompt.
+    Removal goes through the overridden list methods, which release blob references.
+    An attached 'log' (see sessions.SessionLog) is told about every append,
+    removal and replacement; superseding is not logged since replaying the
+    appends repeats it.
+    """
+
+    def __init__(self, messages=(), layout: str = HISTORY_LAYOUT):
+        super().__init__()
+        self.layout = layout
+        self.blobs = BlobStore()
+        self._lock = threading.RLock()
+        self._latest: Dict[str, Tuple[str, Dict[str, Any]]] = {}  # path -> (digest, newest message)
+        self._refs: Dict[str, List[Dict[str, Any]]] = {}  # path -> messages referencing the path
+        self._seen: Dict[str, str] = {}  # path -> digest of the version the model knows (full copy plus diffs)
+        self.log: Any = None
+        for msg in messages:
+            self.append(msg)
+
+    # -- indexing ---------------------------------------------------------------
+
+    def _register(self, msg: Dict[str, Any]) -> None:
+        content = msg.get("content")
+        if isinstance(content, str) and self.blobs.spill is not None and len(content) >= SPILL_CHARS:
+            content = [TextRef(self.blobs.acquire(content), len(content))]
+            msg["content"] = content
+        if not isinstance(content, list):
+            return
+        interned = []
+        for part in content:
+            if isinstance(part, FileContent):
+                part = BlobRef(part.path, self.blobs.acquire(part.text), len(part.text))
+            elif isinstance(part, (BlobRef, TextRef)):
+                self.blobs.retain(part.digest)
+            elif isinstance(part, FileDiff) and part.text is not None:
+                # The diff carries the model's copy forward; the base copy stays in place
+                digest = self.blobs.acquire(part.text)
+                self._set_seen(part.path, digest)
+                part = part._replace(text=None, digest=digest)
+            elif isinstance(part, FileDiff) and part.digest is not None:
+                self._set_seen(part.path, self.blobs.retain(part.digest))
+            interned.append(part)
+        msg["content"] = interned
+        for part in interned:
+            if isinstance(part, BlobRef):
+                self._refs.setdefault(part.path, []).append(msg)
+                self._supersede(part.path, part.digest, msg)
+                self._latest[part.path] = (part.digest, msg)
+                self._set_seen(part.path, self.blobs.retain(part.digest))
+            elif isinstance(part, FileDiff):
+                self._refs.setdefault(part.path, []).append(msg)
+
+    def _set_seen(self, path: str, digest: Optional[str]) -> None:
+        """Record 'digest' (whose blob reference the caller already holds) as the model's version."""
+        previous = self._seen.pop(path, None)
+        if digest is not None:
+            self._seen[path] = digest
+        if previous is not None:
+            self.blobs.release(previous)
+
+    @staticmethod
+    def _index_of(messages: List[Dict[str, Any]], msg: Dict[str, Any]) -> int:
+        # Messages are compared by identity; equal dicts may be distinct messages
+        return next(i for i, candidate in enumerate(messages) if candidate is msg)
+
+    def _supersede(self, path: str, digest: str, newest: Dict[str, Any]) -> None:
+        """Drop or stub every copy of 'path' whose version differs from 'digest'."""
+        latest = self._latest.get(path)
+        if latest is None or latest[0] == digest:
+            return
+        for msg in list(self._refs.get(path, ())):
+            if msg is newest:
+                continue
+            if file_message_path(msg) == path:
+                list.__delitem__(self, self._index_of(self, msg))
+                self._forget(msg, keep_seen=True)
+                continue
+            stale = [
+                part for part in msg["content"]
+                if (isinstance(part, BlobRef) and part.path == path and part.digest != digest)
+                or (isinstance(part, FileDiff) and part.path == path)
+            ]
+            if not stale:
+                continue
+            # Assign a new list so cached token counts for this message are recomputed
+            msg["content"] = [
+                f"[Superseded: a newer version of '{path}' is loaded later in the conversation]"
+                if part in stale else part
+                for part in msg["content"]
+            ]
+            for part in stale:
+                if isinstance(part, BlobRef):
+                    self.blobs.release(part.digest)
+            if not any(isinstance(part, (BlobRef, FileDiff)) and part.path == path for part in msg["content"]):
+                refs = self._refs[path]
+                del refs[self._index_of(refs, msg)]
+
+    def _forget(self, msg: Dict[str, Any], keep_seen: bool = False) -> None:
+        content = msg.get("content")
+        if not isinstance(content, list):
+            return
+        for part in content:
+            if isinstance(part, TextRef):
+                self.blobs.release(part.digest)
+            if not isinstance(part, (BlobRef, FileDiff)):
+                continue
+            if isinstance(part, BlobRef):
+                self.blobs.release(part.digest)
+            refs = self._refs.get(part.path)
+            if refs and any(candidate is msg for candidate in refs):
+                del refs[self._index_of(refs, msg)]
+                if not refs:
+                    del self._refs[part.path]
+            latest = self._latest.get(part.path)
+            is_latest = latest is not None and latest[1] is msg
+            if is_latest:
+                del self._latest[part.path]
+            if not keep_seen and (is_latest or isinstance(part, FileDiff)):
+                # Without the newest full copy or one of its diffs the model's view of the file is incomplete
+                self._set_seen(part.path, None)
+
+    # -- list interface -----------------------------------------------------------
+
+    def append(self, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            self._register(msg)
+            super().append(msg)
+            if self.log is not None:
+                self.log.appended(msg)
+
+    def extend(self, messages) -> None:
+        for msg in messages:
+            self.append(msg)
+
+    def __delitem__(self, index) -> None:
+        with self._lock:
+            removed = self[index] if isinstance(index, slice) else [self[index]]
+            super().__delitem__(index)
+            for msg in removed:
+                self._forget(msg)
+            if self.log is not None and removed:
+                self.log.removed(removed)
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:
+        with self._lock:
+            msg = super().pop(index)
+            self._forget(msg)
+            if self.log is not None:
+                self.log.removed([msg])
+            return msg
+
+    def remove(self, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            super().__delitem__(self._index_of(self, msg))
+            self._forget(msg)
+            if self.log is not None:
+                self.log.removed([msg])
+
+    def replace(self, messages: List[Dict[str, Any]], msg: Dict[str, Any]) -> None:
+        """Swap 'messages' (in history order) for 'msg' in one step; 'msg' takes the place of the first of them."""
+        with self._lock:
+            index = self._index_of(self, messages[0])
+            removed = {id(candidate) for candidate in messages}
+            kept = [candidate for candidate in self if id(candidate) not in removed]
+            for candidate in messages:
+                self._forget(candidate)
+            self._register(msg)
+            super().__setitem__(slice(None), kept[:index] + [msg] + kept[index:])
+            if self.log is not None:
+                self.log.replaced(messages, msg)
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = list(self)
+            for msg in removed:
+                self._forget(msg)
+            super().clear()
+            if self.log is not None and removed:
+                self.log.removed(removed)
+
+    def reset(self) -> None:
+        """Drop every message and all file tracking without logging, keeping the blob spill backend."""
+        with self._lock:
+            super().clear()
+            self.blobs = BlobStore(self.blobs.spill)
+            self._latest.clear()
+            self._refs.clear()
+            self._seen.clear()
+
+    def truncate(self, length: int) -> None:
+        """Drop every message after the first 'length' messages."""
+        del self[length:]
+
+    # -- file lookups -------------------------------------------------------------
+
+    def has_file(self, path: str, content: Optional[str] = None) -> bool:
+        """Return whether 'path' is in context, and when 'content' is given, whether it is that version."""
+        seen = self._seen.get(path)
+        if seen is None:
+            return False
+        return content is None or seen == self.blobs.digest(content)
+
+    def add_file(self, path: str, content: str) -> bool:
+        """Load 'content' of 'path' as a system message unless that exact version is already in context."""
+        with self._lock:
+            if self.has_file(path, content):
+                return False
+            self.append({"role": "system", "content": file_content_parts(path, content)})
+            return True
+
+    def file_change_note(self, path: str, content: str) -> Union[str, ContentParts]:
+        """Describe a change to 'path' for a tool result, relative to the version the model has seen.
+
+        Returns "" when the file is not in context or unchanged, a unified diff when
+        that is smaller than the file, and the full new content otherwise.
+        """
+        with self._lock:
+            seen = self._seen.get(path)
+            if seen is None or seen == self.blobs.digest(content):
+                return ""
+            diff = unified_file_diff(path, self.blobs.get(seen), content)
+        if diff is None or len(diff) >= len(content):
+            return ["\n\n"] + file_content_parts(path, content)
+        return [f"\n\nDiff against the version of '{path}' in context:\n", FileDiff(path, diff, content)]
+
+    # -- API payloads -------------------------------------------------------------
+
+    def materialize(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        content = msg.get("content")
+        local = any(key in msg for key in LOCAL_MESSAGE_KEYS)
+        if not isinstance(content, list) and not local:
+            return msg
+        api_msg = {key: value for key, value in msg.items() if key not in LOCAL_MESSAGE_KEYS}
+        if not isinstance(content, list):
+            return api_msg
+        api_msg["content"] = "".join(
+            part if isinstance(part, str) else part.diff if isinstance(part, FileDiff) else self.blobs.get(part.digest)
+            for part in content
+        )
+        return api_msg
+
+    def to_messages(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self.layout != "stable":
+                return [self.materialize(msg) for msg in self]
+            # Pinned file context keeps its relative order, so the prefix only changes
+            # when a file is added, replaced or evicted
+            pinned, turns = [], []
+            for msg in self[1:]:
+                (pinned if file_message_path(msg) is not None else turns).append(self.materialize(msg))
+            return [self.materialize(msg) for msg in self[:1]] + pinned + turns
+
+def file_message_path(msg: Dict[str, Any]) -> Optional[str]:
+    """Return the path of a file-content system message, or None for any other message."""
+    content = msg.get("content")
+    if msg["role"] != "system" or not isinstance(content, list) or len(content) != 2:
+        return None
+    return content[1].path if isinstance(content[1], (BlobRef, FileContent)) else None
+
+class ContextLocal:
+    """Proxy to the object bound in the current context (see bind()), or to a default one.
+
+    The interactive session uses the defaults; each batch task binds its own
+    conversation and context manager, so modules keep using the module-level
+    names while concurrent tasks stay isolated. Tool threads see the binding of
+    the task that submitted them because the scheduler runs them in a copy of
+    its context.
+    """
+
+    __slots__ = ("_var", "_default")
+
+    def __init__(self, name: str, default: Any):
+        object.__setattr__(self, "_var", ContextVar(name, default=None))
+        object.__setattr__(self, "_default", default)
+
+    def _target(self) -> Any:
+        value = self._var.get()
+        return self._default if value is None else value
+
+    def bind(self, value: Any) -> Token:
+        return self._var.set(value)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target(), name, value)
+
+    def __len__(self) -> int:
+        return len(self._target())
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __getitem__(self, index):
+        return self._target()[index]
+
+    def __delitem__(self, index) -> None:
+        del self._target()[index]
+
+    def __repr__(self) -> str:
+        return repr(self._target())
+
+def new_conversation() -> ContextStore:
+    return ContextStore([{"role": "system", "content": system_PROMPT}])
+
+conversation_history = ContextLocal("conversation_history", new_conversation())
+
+# --------------------------------------------------------------------------------
+# Token-budget context management
+# --------------------------------------------------------------------------------
+PROMPT_TOKEN_BUDGET = int(os.getenv("DEEPSEEK_PROMPT_TOKEN_BUDGET", "60000"))
+# With the stable layout, trimming is a checkpoint: once over budget, history is cut down to
+# this fraction of it so the following turns stay append-only and keep hitting the prefix cache
+TRIM_TARGET_RATIO = float(os.getenv("DEEPSEEK_TRIM_TARGET", "0.7" if HISTORY_LAYOUT == "stable" else "1.0"))
+MESSAGE_TOKEN_OVERHEAD = 4  # Role and framing tokens added per message
+
+def estimate_tokens(content: Union[None, str, ContentParts]) -> int:
+    """Estimate the token count of message content locally (roughly four characters per token)."""
+    length = content_length(content)
+    if not length:
+        return 0
+    return length // 4 + 1
+
+class ContextManager:
+    """Keeps the prompt within a token budget by evicting whole units of history.
+
+    A unit is either a file-content system message or a turn: a user message together
+    with every assistant and tool message that follows it, so assistant tool_calls are
+    never separated from their tool replies. Units are evicted least recently used
+    first; file messages count as used whenever their file is read or edited again.
+    The system prompt and the current turn are never evicted. Token counts are
+    estimated once per message and cached, so each call only pays for new messages.
+    """
+
+    def __init__(self, budget: int = PROMPT_TOKEN_BUDGET, target_ratio: float = TRIM_TARGET_RATIO):
+        self.budget = budget
+        self.target = int(budget * min(1.0, max(0.0, target_ratio)))
+        self.tick = 0
+        self._entries: Dict[int, Tuple[Dict[str, Any], int, int, Any]] = {}  # id(msg) -> (msg, tokens, added tick, content)
+        self._file_last_used: Dict[str, int] = {}
+
+    def touch_file(self, path: str) -> None:
+        self.tick += 1
+        self._file_last_used[path] = self.tick
+
+    def _entry(self, msg: Dict[str, Any]) -> Tuple[Dict[str, Any], int, int, Any]:
+        entry = self._entries.get(id(msg))
+        content = msg.get("content")
+        if entry is None or entry[0] is not msg or entry[3] is not content:
+            # Content is replaced rather than mutated, so identity tells us when to re-estimate
+            added = entry[2] if entry is not None and entry[0] is msg else self.tick + 1
+            self.tick = max(self.tick, added)
+            tokens = MESSAGE_TOKEN_OVERHEAD + estimate_tokens(content)
+            if msg.get("tool_calls"):
+                tokens += estimate_tokens(json.dumps(msg["tool_calls"]))
+            entry = (msg, tokens, added, content)
+            self._entries[id(msg)] = entry
+        return entry
+
+    def total_tokens(self, history: List[Dict[str, Any]]) -> int:
+        return sum(self._entry(msg)[1] for msg in history)
+
+    def _units(self, history: List[Dict[str, Any]]) -> List[Tuple[int, int, int, int]]:
+        """Return evictable units as (last_used, start, end, tokens) with end exclusive."""
+        last_user = max((i for i, msg in enumerate(history) if msg["role"] == "user"), default=len(history))
+        units = []
+        turn = None  # [last_used, start, end, tokens] of the turn being collected
+        for i in range(1, last_user):
+            msg = history[i]
+            _, tokens, added, _ = self._entry(msg)
+            path = file_message_path(msg)
+            if path is not None:
+                units.append((max(added, self._file_last_used.get(path, 0)), i, i + 1, tokens))
+                continue
+            if msg["role"] == "system":
+                units.append((added, i, i + 1, tokens))
+                continue
+            if msg["role"] == "user" or turn is None:
+                if turn:
+                    units.append(tuple(turn))
+                turn = [added, i, i + 1, tokens]
+                continue
+            turn[0] = max(turn[0], added)
+            turn[2] = i + 1
+            turn[3] += tokens
+        if turn:
+            units.append(tuple(turn))
+        return units
+
+    def trim(self, history: List[Dict[str, Any]]) -> int:
+        """Once 'history' exceeds the budget, evict least recently used units down to the trim target.
+
+        Returns the number of tokens freed.
+        """
+        total = sum(self._entry(msg)[1] for msg in history)
+        if len(self._entries) > 2 * len(history):
+            # Drop entries for messages removed elsewhere (e.g. superseded file copies)
+            live = {id(msg) for msg in history}
+            self._entries = {key: entry for key, entry in self._entries.items() if key in live}
+        if total <= self.budget:
+            return 0
+
+        evicted = []
+        freed = 0
+        for last_used, start, end, tokens in sorted(self._units(history)):
+            if total - freed <= self.target:
+                break
+            evicted.append((start, end))
+            freed += tokens
+
+        # Turns may straddle file messages, so collect indices and delete from the back
+        indices = sorted({i for start, end in evicted for i in range(start, end)}, reverse=True)
+        for i in indices:
+            self._entries.pop(id(history[i]), None)
+            del history[i]
+        if total - freed > self.budget:
+            console.print(f"[yellow dim]⚠ Current turn needs ~{total - freed:,} tokens, above the {self.budget:,} token budget[/yellow dim]")
+        if indices:
+            console.print(f"[dim]🧹 Evicted {len(indices)} message(s) (~{freed:,} tokens) to stay within the prompt budget[/dim]")
+        return freed
+
+context_manager = ContextLocal("context_manager", ContextManager())
+
+def history_stats(history: ContextStore = conversation_history) -> Dict[str, int]:
+    """Size of the conversation history: messages, characters sent, estimated tokens and stored file text."""
+    blobs = history.blobs.stats()
+    return {
+        "messages": len(history),
+        "content_chars": sum(content_length(msg.get("content")) for msg in history),
+        "estimated_tokens": context_manager.total_tokens(history),
+        "blob_chars": blobs["bytes"],
+        "spilled_chars": blobs["spilled_bytes"],
+    }
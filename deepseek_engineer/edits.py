@@ -0,0 +1,353 @@
+# --------------------------------------------------------------------------------
+# Multi-hunk edit engine
+# --------------------------------------------------------------------------------
+import os
+import mmap
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .files import discard_staged, file_cache, finish_writes, stage_write
+from .tracing import tracer
+from .ui import console
+
+# Files at least this large are searched through a read-only mmap and rewritten
+# from it without being decoded into memory
+EDIT_MMAP_BYTES = int(os.getenv("DEEPSEEK_EDIT_MMAP_BYTES", str(1024 * 1024)))
+EDIT_WINDOW_LINES = 6  # Lines of context shown on each side of the closest match
+EDIT_WINDOW_MAX_CHARS = 2_000
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+Source = Union[str, mmap.mmap]
+
+class EditHunk(NamedTuple):
+    original_snippet: str
+    new_snippet: str
+
+class EditFailure(ValueError):
+    """A hunk could not be applied; nothing was written.
+
+    'hunk' is the 0-based index of the failing hunk, and 'window' (starting at
+    line 'line') is a bounded excerpt around the closest match in the file.
+    """
+
+    def __init__(self, path: str, message: str, hunk: Optional[int] = None,
+                 line: Optional[int] = None, window: Optional[str] = None):
+        super().__init__(message)
+        self.path = path
+        self.hunk = hunk
+        self.line = line
+        self.window = window
+
+def _signature(st: os.stat_result) -> Tuple[int, int, int]:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _line_number(source: Source, pos: int) -> int:
+    if isinstance(source, str):
+        return source.count("\n", 0, pos) + 1
+    lines = 1
+    for start in range(0, pos, COPY_CHUNK_BYTES):
+        lines += source[start:min(pos, start + COPY_CHUNK_BYTES)].count(b"\n")
+    return lines
+
+def _window(source: Source, pos: int, extra_lines: int = 0) -> Tuple[int, str]:
+    """Return (first line number, text) of the lines around 'pos', capped in size."""
+    newline = "\n" if isinstance(source, str) else b"\n"
+    start = pos
+    for _ in range(EDIT_WINDOW_LINES + 1):
+        start = source.rfind(newline, 0, start)
+        if start == -1:
+            break
+    start += 1
+    end = pos
+    for _ in range(EDIT_WINDOW_LINES + extra_lines + 1):
+        found = source.find(newline, end + 1)
+        if found == -1:
+            end = len(source)
+            break
+        end = found
+    end = min(end, start + EDIT_WINDOW_MAX_CHARS)
+    text = source[start:end]
+    if not isinstance(text, str):
+        text = text.decode("utf-8", errors="replace")
+    return _line_number(source, start), text
+
+def closest_match(source: Source, needle: Union[str, bytes]) -> Optional[int]:
+    """Return the position of the longest prefix of 'needle' found in 'source'.
+
+    The prefix length is binary searched, so this costs O(log n) scans of the file.
+    Falls back to the first non-blank line of the needle with its indentation
+    stripped, which catches whitespace-only mismatches.
+    """
+    low, high, best, longest = 1, len(needle), None, 0
+    while low <= high:
+        middle = (low + high) // 2
+        found = source.find(needle[:middle])
+        if found == -1:
+            high = middle - 1
+        else:
+            best, longest, low = found, middle, middle + 1
+    first_line = next((line.strip() for line in needle.splitlines() if line.strip()), None)
+    if first_line and longest < len(first_line):
+        found = source.find(first_line)
+        if found != -1:
+            return found
+    return best
+
+def _locate_hunk(path: str, source: Source, hunk: EditHunk, index: int) -> Tuple[int, int, int]:
+    encode = not isinstance(source, str)
+    needle = hunk.original_snippet.encode("utf-8") if encode else hunk.original_snippet
+    if not needle:
+        raise EditFailure(path, "Original snippet is empty", index)
+    start = source.find(needle)
+    if start == -1:
+        near = closest_match(source, needle)
+        if near is None:
+            raise EditFailure(path, "Original snippet not found", index)
+        line, window = _window(source, near, needle.count(b"\n" if encode else "\n"))
+        raise EditFailure(path, "Original snippet not found", index, line, window)
+    duplicate = source.find(needle, start + 1)
+    if duplicate != -1:
+        line, window = _window(source, duplicate)
+        raise EditFailure(
+            path,
+            f"Ambiguous edit: snippet matches at line {_line_number(source, start)} and again at line "
+            f"{_line_number(source, duplicate)}; include more surrounding lines so it is unique",
+            index, line, window,
+        )
+    return start, start + len(needle), index
+
+def locate_hunks(path: str, source: Source, hunks: Sequence[EditHunk],
+                 failures: Optional[List[EditFailure]] = None) -> List[Tuple[int, int, int]]:
+    """Find every hunk in 'source' and return (start, end, hunk index) sorted by position.
+
+    Each snippet must occur exactly once in the original content. The ambiguity
+    check resumes the scan just past the first match and stops at the second, so
+    a hunk costs at most one full pass. Overlapping hunks are rejected. The first
+    failure is raised, unless a 'failures' list is given to collect all of them.
+    """
+    matches = []
+    for index, hunk in enumerate(hunks):
+        try:
+            matches.append(_locate_hunk(path, source, hunk, index))
+        except EditFailure as failure:
+            if failures is None:
+                raise
+            failures.append(failure)
+    matches.sort()
+    for (_, first_end, first), (second_start, _, second) in zip(matches, matches[1:]):
+        if second_start < first_end:
+            failure = EditFailure(path, f"Overlaps hunk {first + 1}", second, _line_number(source, second_start))
+            if failures is None:
+                raise failure
+            failures.append(failure)
+    return matches
+
+class PreparedEdit:
+    """Hunks that were located in a file and can be written in a single pass.
+
+    Holds the file open (through a mmap for large files) until commit() or close().
+    Writing is refused if the file changed since it was prepared.
+    """
+
+    def __init__(self, path: str, source: Source, hunks: Sequence[EditHunk],
+                 matches: List[Tuple[int, int, int]], st: os.stat_result, newline: str = "\n"):
+        self.path = path
+        self.source = source
+        self.hunks = hunks
+        self.matches = matches
+        self.stat = st
+        self.newline = newline  # Line ending written back for text sources, which are read with '\n'
+        self.content: Optional[str] = None
+        self._lines: Optional[Dict[int, int]] = None
+
+    def _chunks(self) -> Iterator[bytes]:
+        previous = 0
+        for start, end, index in self.matches:
+            yield from self._copy(previous, start)
+            yield self.hunks[index].new_snippet.encode("utf-8")
+            previous = end
+        yield from self._copy(previous, len(self.source))
+
+    def _copy(self, start: int, end: int) -> Iterator[bytes]:
+        for offset in range(start, end, COPY_CHUNK_BYTES):
+            yield self.source[offset:min(end, offset + COPY_CHUNK_BYTES)]
+
+    def new_text(self) -> str:
+        """The edited content; only available for files that were read as text."""
+        parts = []
+        previous = 0
+        for start, end, index in self.matches:
+            parts.append(self.source[previous:start])
+            parts.append(self.hunks[index].new_snippet)
+            previous = end
+        parts.append(self.source[previous:])
+        return "".join(parts)
+
+    def match_lines(self) -> Dict[int, int]:
+        """Map each hunk index to the line where its snippet starts, counted in one pass."""
+        if self._lines is not None:
+            return self._lines
+        newline = "\n" if isinstance(self.source, str) else b"\n"
+        lines, line, previous = {}, 1, 0
+        for start, _, index in self.matches:
+            for offset in range(previous, start, COPY_CHUNK_BYTES):
+                line += self.source[offset:min(start, offset + COPY_CHUNK_BYTES)].count(newline)
+            lines[index] = line
+            previous = start
+        self._lines = lines
+        return lines
+
+    def stage(self) -> Tuple[str, int]:
+        """Write the edited file to a temporary file next to it; see files.stage_write."""
+        if _signature(os.stat(self.path)) != _signature(self.stat):
+            raise EditFailure(self.path, "File changed on disk while the edit was being prepared")
+        if isinstance(self.source, str):
+            self.content = self.new_text()
+            data = self.content if self.newline == "\n" else self.content.replace("\n", self.newline)
+            return stage_write(self.path, [data.encode("utf-8")], self.stat)
+        return stage_write(self.path, self._chunks(), self.stat)
+
+    def committed(self) -> None:
+        """Record the written content once the staged file has been moved into place."""
+        if self.content is not None:
+            file_cache.update(self.path, self.content)
+        else:
+            self.match_lines()  # The mmap is closed next; keep the lines for the tool result
+
+    def commit(self) -> None:
+        try:
+            temp_path, written = self.stage()
+            finish_writes([(temp_path, self.path)])
+            tracer.count_bytes(written=written)
+            self.committed()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if isinstance(self.source, mmap.mmap) and not self.source.closed:
+            self.source.close()
+
+def _file_newline(path: str) -> str:
+    """Line ending of a file whose text was read with carriage returns normalised away."""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    return "\r\n" if b"\r\n" in head or b"\r" not in head else "\r"
+
+def prepare_edit(path: str, hunks: Sequence[EditHunk],
+                 failures: Optional[List[EditFailure]] = None) -> Optional[PreparedEdit]:
+    """Locate all 'hunks' in the file at 'path' without writing anything.
+
+    Small files come from the shared file cache. Large ones are mapped and searched
+    as bytes; those containing carriage returns are read as text instead, since
+    snippets use the normalised '\\n' line endings the model sees. Text read that
+    way is written back with the file's own line ending. With a 'failures'
+    list, hunk failures are appended to it and None is returned instead of raising.
+    """
+    target = os.path.realpath(path)
+    st = os.stat(target)
+    source: Optional[Source] = None
+    if st.st_size >= EDIT_MMAP_BYTES:
+        with open(target, "rb") as f:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if source.find(b"\r") != -1:
+            source.close()
+            source = None
+        else:
+            tracer.count_bytes(read=st.st_size)
+    newline = "\n"
+    if source is None:
+        source = file_cache.read_text(target, resolved=True, stat_result=st)
+        tracer.count_bytes(read=len(source))
+        if len(source.encode("utf-8")) != st.st_size:
+            newline = _file_newline(target)
+    edit = PreparedEdit(target, source, hunks, [], st, newline)
+    failed = len(failures) if failures is not None else 0
+    try:
+        edit.matches = locate_hunks(path, source, hunks, failures)
+    except BaseException:
+        edit.close()
+        raise
+    if failures is not None and len(failures) > failed:
+        edit.close()
+        return None
+    return edit
+
+def apply_edits(path: str, hunks: Sequence[EditHunk]) -> None:
+    """Apply every hunk to 'path' in one atomic write, or none of them."""
+    prepare_edit(path, hunks).commit()
+
+def apply_edit_batch(files: Sequence[Tuple[str, Sequence[EditHunk]]]) -> Tuple[List[PreparedEdit], List[EditFailure]]:
+    """Apply hunks to several files: all of them are written, or none are.
+
+    Every hunk of every file is validated first and all failures are collected.
+    Only then are the new versions staged as temporary files, and once every
+    file is staged they are renamed into place one after another. Returns the
+    written edits (for their match_lines()) and the failures.
+    """
+    prepared: List[PreparedEdit] = []
+    requested: List[str] = []  # Path of each prepared edit as given, which failures are reported under
+    failures: List[EditFailure] = []
+    staged: List[Tuple[str, str]] = []
+    try:
+        for path, hunks in files:
+            try:
+                edit = prepare_edit(path, hunks, failures)
+            except OSError as e:
+                failures.append(EditFailure(path, f"Could not read file: {e.strerror or e}"))
+                continue
+            if edit is not None:
+                prepared.append(edit)
+                requested.append(path)
+        if failures:
+            return [], failures
+        written = 0
+        for edit, path in zip(prepared, requested):
+            try:
+                temp_path, size = edit.stage()
+            except EditFailure as failure:
+                failure.path = path
+                raise
+            except OSError as e:
+                raise EditFailure(path, f"Could not write file: {e.strerror or e}")
+            staged.append((temp_path, edit.path))
+            written += size
+        finish_writes(staged)
+        staged = []
+        tracer.count_bytes(written=written)
+        for edit in prepared:
+            edit.committed()
+        return prepared, []
+    except EditFailure as failure:
+        return [], [failure]
+    finally:
+        discard_staged(temp_path for temp_path, _ in staged)
+        for edit in prepared:
+            edit.close()
+
+def show_edit_failure(failure: EditFailure, snippet: Optional[str] = None) -> None:
+    """Print why an edit failed, with the bounded excerpt around the closest match."""
+    from rich.panel import Panel
+
+    console.print(f"[bold yellow]⚠[/bold yellow] {failure} in '[bright_cyan]{failure.path}[/bright_cyan]'. No changes made.")
+    if snippet is not None:
+        if len(snippet) > EDIT_WINDOW_MAX_CHARS:
+            snippet = snippet[:EDIT_WINDOW_MAX_CHARS] + "\n…"
+        console.print(Panel(snippet, title="Expected", border_style="blue", title_align="left"))
+    if failure.window is not None:
+        console.print(Panel(failure.window, title=f"Closest match (from line {failure.line})",
+                            border_style="yellow", title_align="left"))
+
+def apply_diff_edit(path: str, original_snippet: str, new_snippet: str):
+    """Replace the single occurrence of 'original_snippet' in 'path' with 'new_snippet', atomically.
+
+    Failures are shown on the console and re-raised so the tool result reports them.
+    """
+    with tracer.span("apply_diff_edit", path=path):
+        try:
+            apply_edits(path, [EditHunk(original_snippet, new_snippet)])
+        except FileNotFoundError:
+            console.print(f"[bold red]✗[/bold red] File not found for diff editing: '[bright_cyan]{path}[/bright_cyan]'")
+            raise
+        except EditFailure as failure:
+            show_edit_failure(failure, original_snippet)
+            raise
+        console.print(f"[bold blue]✓[/bold blue] Applied diff edit to '[bright_cyan]{path}[/bright_cyan]'")
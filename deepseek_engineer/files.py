@@ -0,0 +1,260 @@
+# --------------------------------------------------------------------------------
+# File helpers
+# --------------------------------------------------------------------------------
+import os
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import tracer
+from .ui import console
+
+if TYPE_CHECKING:
+    from .models import FileToEdit
+
+FILE_CACHE_MAX_BYTES = int(os.getenv("DEEPSEEK_FILE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Persistent caches (search index, repository map) live here rather than in the workspace
+CACHE_DIR = os.getenv("DEEPSEEK_CACHE_DIR") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "deepseek-engineer"
+)
+
+# Directory relative paths resolve against; batch tasks bind their own, everything else uses the cwd
+workspace_root: ContextVar[Optional[str]] = ContextVar("workspace_root", default=None)
+
+# Read once at import (os.umask can only be queried by setting it) so new files get the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+class FileCache:
+    """In-process cache of file contents shared by every read path.
+
+    Entries are keyed by resolved path and validated against (mtime_ns, size, inode)
+    on each lookup, so changes made outside the tool are always picked up. Total
+    cached size is capped and the least recently used files are dropped first.
+    """
+
+    def __init__(self, max_bytes: int = FILE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(st: os.stat_result) -> Tuple[int, int, int]:
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def read_text(self, file_path: str, skip_binary: bool = False, resolved: bool = False,
+                  stat_result: Optional[os.stat_result] = None) -> Optional[str]:
+        """Return the text of 'file_path', reading it from disk only when it changed.
+
+        With skip_binary, files that look binary or are not valid UTF-8 return None
+        instead of raising; the check runs on the same buffer that is decoded. Callers
+        that already hold a canonical path or a fresh stat (e.g. from os.scandir) can
+        pass resolved/stat_result to skip those syscalls.
+        """
+        key = file_path if resolved else os.path.realpath(file_path)
+        signature = self._signature(stat_result or os.stat(key))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(key, "rb") as f:
+            signature = self._signature(os.fstat(f.fileno()))
+            data = f.read()
+        if skip_binary and b"\0" in data[:1024]:
+            return None
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            if skip_binary:
+                return None
+            raise
+        if "\r" in text:
+            # Match the universal newline handling of text-mode reads
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self._store(key, signature, text)
+        return text
+
+    def update(self, file_path: str, content: str) -> None:
+        """Record 'content' as the current text of a file that was just written."""
+        key = os.path.realpath(file_path)
+        if "\r" in content:
+            # Cache what read_text() would return for the same file
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        self._store(key, self._signature(os.stat(key)), content)
+
+    def _store(self, key: str, signature: Tuple[int, int, int], text: str) -> None:
+        size = signature[1]
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[0][1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (signature, text)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (evicted_signature, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_signature[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "files": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+file_cache = FileCache()
+
+def read_local_file(file_path: str) -> str:
+    """Return the text content of a local file."""
+    content = file_cache.read_text(file_path)
+    tracer.count_bytes(read=len(content))
+    return content
+
+# Called with the target paths after every write, so indexes can refresh those files
+write_listeners: List[Callable[[List[str]], None]] = []
+
+def _fsync_directory(directory: str) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def stage_write(path: str, chunks: Iterable[bytes], like: Optional[os.stat_result] = None) -> Tuple[str, int]:
+    """Write 'chunks' to a fsynced temporary file next to 'path' and return (temp path, bytes written).
+
+    The permission bits of 'like' (the file being replaced) are copied; new files
+    get 0666 minus the umask. finish_writes() moves the file into place.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, stat.S_IMODE(like.st_mode) if like is not None else 0o666 & ~_UMASK)
+    except BaseException:
+        discard_staged([temp_path])
+        raise
+    return temp_path, written
+
+def discard_staged(temp_paths: Iterable[str]) -> None:
+    for temp_path in temp_paths:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+def finish_writes(staged: List[Tuple[str, str]]) -> None:
+    """Rename each staged (temp path, target) pair over its target, then fsync the directories.
+
+    Renames are atomic per file, so readers see either the old or the new
+    content, never a truncated file.
+    """
+    for done, (temp_path, target) in enumerate(staged):
+        try:
+            os.replace(temp_path, target)
+        except BaseException:
+            discard_staged(temp for temp, _ in staged[done:])
+            raise
+    for directory in {os.path.dirname(target) or "." for _, target in staged}:
+        _fsync_directory(directory)
+    for listener in write_listeners:
+        listener([target for _, target in staged])
+
+def atomic_write(path: str, chunks: Iterable[bytes], like: Optional[os.stat_result] = None) -> int:
+    """Replace 'path' with 'chunks' via a temporary file, fsync and rename; returns the bytes written."""
+    temp_path, written = stage_write(path, chunks, like)
+    finish_writes([(temp_path, path)])
+    return written
+
+def create_file(path: str, content: str):
+    """Create (or overwrite) a file at 'path' with the given 'content'."""
+    file_path = Path(path)
+    
+    # Security checks
+    if any(part.startswith('~') for part in file_path.parts):
+        raise ValueError("Home directory references not allowed")
+    normalized_path = normalize_path(str(file_path))
+    
+    # Validate reasonable file size for operations
+    if len(content) > 5_000_000:  # 5MB limit
+        raise ValueError("File content exceeds 5MB size limit")
+    
+    Path(normalized_path).parent.mkdir(parents=True, exist_ok=True)
+    # Write through symlinks to their target rather than replacing the link itself
+    target = os.path.realpath(normalized_path)
+    try:
+        existing = os.stat(target)
+    except FileNotFoundError:
+        existing = None
+    tracer.count_bytes(written=atomic_write(target, [content.encode("utf-8")], existing))
+    file_cache.update(target, content)
+    console.print(f"[bold blue]✓[/bold blue] Created/updated file at '[bright_cyan]{file_path}[/bright_cyan]'")
+
+def show_diff_table(files_to_edit: List["FileToEdit"]) -> None:
+    if not files_to_edit:
+        return
+    from rich.table import Table
+    
+    table = Table(title="📝 Proposed Edits", show_header=True, header_style="bold bright_blue", show_lines=True, border_style="blue")
+    table.add_column("File Path", style="bright_cyan", no_wrap=True)
+    table.add_column("Original", style="red dim")
+    table.add_column("New", style="bright_green")
+
+    for edit in files_to_edit:
+        table.add_row(edit.path, edit.original_snippet, edit.new_snippet)
+    
+    console.print(table)
+
+def is_binary_file(file_path: str, peek_size: int = 1024) -> bool:
+    try:
+        with open(file_path, 'rb') as f:
+            chunk = f.read(peek_size)
+        # If there is a null byte in the sample, treat it as binary
+        if b'\0' in chunk:
+            return True
+        return False
+    except Exception:
+        # If we fail to read, just treat it as binary to be safe
+        return True
+
+def current_root() -> str:
+    """Return the working root of the current task (the process cwd outside batch mode)."""
+    return workspace_root.get() or os.getcwd()
+
+def normalize_path(path_str: str) -> str:
+    """Return a canonical, absolute version of the path with security checks."""
+    path = Path(current_root(), path_str).resolve()
+    
+    # Prevent directory traversal attacks
+    if ".." in path.parts:
+        raise ValueError(f"Invalid path: {path_str} contains parent directory references")
+    
+    return str(path)
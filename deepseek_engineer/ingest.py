@@ -0,0 +1,272 @@
+# --------------------------------------------------------------------------------
+# Directory ingestion
+# --------------------------------------------------------------------------------
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .files import file_cache, normalize_path
+
+EXCLUDED_FILES = {
+    # Python specific
+    ".DS_Store", "Thumbs.db", ".gitignore", ".python-version",
+    "uv.lock", ".uv", "uvenv", ".uvenv", ".venv", "venv",
+    "__pycache__", ".pytest_cache", ".coverage", ".mypy_cache",
+    # Node.js / Web specific
+    "node_modules", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
+    ".next", ".nuxt", "dist", "build", ".cache", ".parcel-cache",
+    ".turbo", ".vercel", ".output", ".contentlayer",
+    # Build outputs
+    "out", "coverage", ".nyc_output", "storybook-static",
+    # Environment and config
+    ".env", ".env.local", ".env.development", ".env.production",
+    # Misc
+    ".git", ".svn", ".hg", "CVS"
+}
+EXCLUDED_EXTENSIONS = {
+    # Binary and media files
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp", ".avif",
+    ".mp4", ".webm", ".mov", ".mp3", ".wav", ".ogg",
+    ".zip", ".tar", ".gz", ".7z", ".rar",
+    ".exe", ".dll", ".so", ".dylib", ".bin",
+    # Documents
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    # Python specific
+    ".pyc", ".pyo", ".pyd", ".egg", ".whl",
+    # UV specific
+    ".uv", ".uvenv",
+    # Database and logs
+    ".db", ".sqlite", ".sqlite3", ".log",
+    # IDE specific
+    ".idea", ".vscode",
+    # Web specific
+    ".map", ".chunk.js", ".chunk.css",
+    ".min.js", ".min.css", ".bundle.js", ".bundle.css",
+    # Cache and temp files
+    ".cache", ".tmp", ".temp",
+    # Font files
+    ".ttf", ".otf", ".woff", ".woff2", ".eot"
+}
+ADD_MAX_FILES = int(os.getenv("DEEPSEEK_ADD_MAX_FILES", "1000"))  # Reasonable limit for files to add
+MAX_FILE_SIZE = 5_000_000  # 5MB limit
+INGEST_WORKERS = max(1, int(os.getenv("DEEPSEEK_INGEST_WORKERS", "16")))
+
+def translate_gitignore_pattern(pattern: str) -> str:
+    """Translate the glob part of a .gitignore pattern into a regular expression."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            close = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if close == -1:
+                parts.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:close]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = close + 1
+        elif c == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return "".join(parts)
+
+class GitIgnore:
+    """Compiled rules of one .gitignore file, matched against paths relative to its directory."""
+
+    def __init__(self, lines: List[str]):
+        self.rules: List[Tuple["re.Pattern[str]", bool, bool]] = []  # (regex, negated, directories only)
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # Patterns with a slash are anchored to this directory, others match at any depth
+            anchored = "/" in line
+            prefix = "" if anchored else "(?:.*/)?"
+            regex = "^" + prefix + translate_gitignore_pattern(line.lstrip("/")) + "$"
+            self.rules.append((re.compile(regex), negated, dir_only))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["GitIgnore"]:
+        try:
+            with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="replace") as f:
+                ignore = cls(f.readlines())
+        except OSError:
+            return None
+        return ignore if ignore.rules else None
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True (ignored), False (re-included) or None when no rule applies."""
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negated
+        return result
+
+class PathMatcher:
+    """Precompiled exclusion rules for directory ingestion.
+
+    Combines the fixed name and extension sets with the .gitignore files found
+    while walking; deeper .gitignore files override their parents like git does.
+    """
+
+    def __init__(self, excluded_names=EXCLUDED_FILES, excluded_extensions=EXCLUDED_EXTENSIONS, use_gitignore: bool = True):
+        self.excluded_names = frozenset(excluded_names)
+        self.excluded_extensions = frozenset(excluded_extensions)
+        self.use_gitignore = use_gitignore
+
+    def excluded_name(self, name: str) -> bool:
+        return name.startswith(".") or name in self.excluded_names
+
+    def excluded_extension(self, name: str) -> bool:
+        # Only the last suffix counts, so compound entries such as .min.js never match
+        return os.path.splitext(name)[1].lower() in self.excluded_extensions
+
+    @staticmethod
+    def ignored(gitignores: List[Tuple[str, GitIgnore]], path: str, is_dir: bool) -> bool:
+        ignored = False
+        for base, ignore in gitignores:
+            result = ignore.match(path[len(base):].lstrip(os.sep).replace(os.sep, "/"), is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+def iter_directory_files(directory_path: str, matcher: PathMatcher, skipped: List[str],
+                         max_file_size: int = MAX_FILE_SIZE):
+    """Yield (path, is_symlink, stat_result) for every candidate file below 'directory_path'.
+
+    Walks with os.scandir in os.walk order (files of a directory before its
+    subdirectories) and reuses each DirEntry's cached type and stat data.
+    Excluded entries are recorded in 'skipped'; excluded directories are pruned.
+    """
+    stack = [(directory_path, [])]
+    while stack:
+        current, gitignores = stack.pop()
+        if matcher.use_gitignore:
+            ignore = GitIgnore.load(current)
+            if ignore is not None:
+                gitignores = gitignores + [(current, ignore)]
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            skipped.append(current)
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not matcher.excluded_name(entry.name) and not matcher.ignored(gitignores, entry.path, True):
+                        subdirectories.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                if (matcher.excluded_name(entry.name) or matcher.excluded_extension(entry.name)
+                        or matcher.ignored(gitignores, entry.path, False)):
+                    skipped.append(entry.path)
+                    continue
+                stat_result = entry.stat()
+            except OSError:
+                skipped.append(entry.path)
+                continue
+            if stat_result.st_size > max_file_size:
+                skipped.append(f"{entry.path} (exceeds size limit)")
+                continue
+            yield entry.path, entry.is_symlink(), stat_result
+
+        for subdirectory in reversed(subdirectories):
+            stack.append((subdirectory, gitignores))
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool for CPU-bound indexing, started without forking this process.
+
+    Pools are created from tool worker threads and background refresh threads, and
+    forking a multi-threaded process can deadlock the child on a lock another thread
+    held; forkserver (spawn where it is unavailable) starts workers from a clean process.
+    """
+    import multiprocessing
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+def _read_candidate(path: str, is_symlink: bool, stat_result: os.stat_result) -> Tuple[str, Optional[str]]:
+    if is_symlink:
+        path = normalize_path(path)
+        return path, file_cache.read_text(path, skip_binary=True, resolved=True)
+    return path, file_cache.read_text(path, skip_binary=True, resolved=True, stat_result=stat_result)
+
+def ingest_directory(directory_path: str, max_files: int = ADD_MAX_FILES, matcher: Optional[PathMatcher] = None,
+                     workers: int = INGEST_WORKERS, on_progress=None) -> Tuple[List[Tuple[str, str]], List[str], bool]:
+    """Read the text files below a normalized directory in a single pass.
+
+    Files are read on a thread pool in batches, each exactly once, with binary
+    detection on the same buffer. Returns (added (path, content) pairs in walk
+    order, skipped paths, whether max_files was reached).
+    """
+    matcher = matcher or PathMatcher()
+    skipped: List[str] = []
+    added: List[Tuple[str, str]] = []
+    candidates = iter_directory_files(directory_path, matcher, skipped)
+    batch_size = max(64, workers * 4)  # Bounds the reads wasted past max_files
+    limit_reached = False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deepseek-ingest") as executor:
+        while not limit_reached:
+            batch = []
+            for candidate in candidates:
+                batch.append(candidate)
+                if len(batch) >= batch_size:
+                    break
+            if not batch:
+                break
+            futures = [executor.submit(_read_candidate, *candidate) for candidate in batch]
+            for (original_path, _, _), future in zip(batch, futures):
+                if len(added) >= max_files:
+                    limit_reached = True
+                    for remaining in futures:
+                        remaining.cancel()
+                    break
+                try:
+                    path, content = future.result()
+                except (OSError, ValueError):
+                    skipped.append(original_path)
+                    continue
+                if content is None:
+                    skipped.append(original_path)
+                    continue
+                added.append((path, content))
+            if on_progress:
+                on_progress(len(added), len(skipped))
+    return added, skipped, limit_reached
@@ -0,0 +1,13 @@
+# --------------------------------------------------------------------------------
+# Define our schema using Pydantic for type safety
+# --------------------------------------------------------------------------------
+from pydantic import BaseModel
+
+class FileToCreate(BaseModel):
+    path: str
+    content: str
+
+class FileToEdit(BaseModel):
+    path: str
+    original_snippet: str
+    new_snippet: str
@@ -0,0 +1,204 @@
+# --------------------------------------------------------------------------------
+# Ranged, pattern and outline reads
+# --------------------------------------------------------------------------------
+import os
+import re
+import mmap
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .tracing import tracer
+
+LINE_INDEX_FILES = int(os.getenv("DEEPSEEK_LINE_INDEX_FILES", "64"))  # Line indexes kept in memory
+PATTERN_CONTEXT_LINES = 10
+PATTERN_MAX_MATCHES = 20
+OUTLINE_MAX_ENTRIES = 500
+OUTLINE_LINE_CHARS = 160
+
+# Top-level definitions across common languages: unindented lines starting with a
+# definition keyword, after optional export/visibility/async modifiers
+OUTLINE_PATTERN = re.compile(
+    rb"^(?:export\s+(?:default\s+)?)?(?:pub(?:\([^)\n]*\))?\s+)?"
+    rb"(?:(?:async|unsafe|abstract|public|private|protected|static|final|sealed|data|inline)\s+)*"
+    rb"(?:def|class|function\*?|func|fn|struct|enum|trait|impl|interface|type|module|mod|namespace|object|const|let|var)\b[^\n]*",
+    re.MULTILINE,
+)
+HEADING_PATTERN = re.compile(rb"^#{1,6}\s[^\n]*", re.MULTILINE)
+HEADING_EXTENSIONS = {".md", ".markdown", ".mdx"}
+
+Source = Union[mmap.mmap, bytes]
+
+class LineIndex:
+    """Byte offsets of every line start in a file, plus its size as the final entry.
+
+    Line n (1-based) spans offsets[n - 1]:offsets[n], so any line range or the
+    line of a byte position is found without decoding the file.
+    """
+
+    def __init__(self, offsets: "array[int]"):
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, source: Source) -> "LineIndex":
+        if not isinstance(source, mmap.mmap):
+            return cls(array("Q", accumulate(map(len, source.splitlines(keepends=True)), initial=0)))
+        source.seek(0)
+        return cls(array("Q", accumulate(map(len, iter(source.readline, b"")), initial=0)))
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def line_of(self, position: int) -> int:
+        return max(1, min(bisect_right(self.offsets, position), self.line_count))
+
+    def byte_range(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        return self.offsets[start_line - 1], self.offsets[end_line]
+
+class LineIndexCache:
+    """Line indexes keyed by resolved path and validated like FileCache entries."""
+
+    def __init__(self, max_files: int = LINE_INDEX_FILES):
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], LineIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, signature: Tuple[int, int, int], source: Source) -> LineIndex:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+        index = LineIndex.build(source)
+        with self._lock:
+            self._entries[key] = (signature, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+        return index
+
+line_index_cache = LineIndexCache()
+
+@contextmanager
+def mapped_file(path: str) -> Iterator[Tuple[Source, LineIndex]]:
+    """Yield a read-only mapping of 'path' and its cached line index."""
+    key = os.path.realpath(path)
+    with open(key, "rb") as f:
+        st = os.fstat(f.fileno())
+        source: Source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+    try:
+        yield source, line_index_cache.get(key, (st.st_mtime_ns, st.st_size, st.st_ino), source)
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+def _decode(data: bytes) -> str:
+    tracer.count_bytes(read=len(data))
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def read_lines(path: str, start_line: int = 1, end_line: Optional[int] = None) -> str:
+    """Return lines start_line..end_line (1-based, inclusive) of 'path' with a header."""
+    with mapped_file(path) as (source, index):
+        total = index.line_count
+        start = max(1, start_line)
+        end = total if end_line is None else min(end_line, total)
+        if start > end:
+            return f"'{path}' has {total} lines; requested lines {start_line}-{end_line if end_line is not None else 'end'} are empty"
+        text = _decode(source[slice(*index.byte_range(start, end))])
+    return f"Lines {start}-{end} of {total} in '{path}':\n\n{text}"
+
+def read_bytes(path: str, start_byte: int = 0, end_byte: Optional[int] = None) -> str:
+    """Return bytes start_byte..end_byte (end exclusive) of 'path', noting the lines they cover."""
+    with mapped_file(path) as (source, index):
+        size = len(source)
+        start = max(0, start_byte)
+        end = size if end_byte is None else min(end_byte, size)
+        if start >= end:
+            return f"'{path}' has {size} bytes; requested range {start_byte}-{end_byte if end_byte is not None else 'end'} is empty"
+        text = _decode(source[start:end])
+        first, last = index.line_of(start), index.line_of(end - 1)
+    return f"Bytes {start}-{end} of {size} (lines {first}-{last}) in '{path}':\n\n{text}"
+
+def read_around(path: str, pattern: str, context_lines: int = PATTERN_CONTEXT_LINES) -> str:
+    """Return the lines around each match of 'pattern' (a regex, or literal text if it is not one).
+
+    Overlapping windows are merged; at most PATTERN_MAX_MATCHES matching lines are used.
+    """
+    try:
+        regex = re.compile(pattern.encode("utf-8"), re.MULTILINE)
+    except re.error:
+        regex = re.compile(re.escape(pattern.encode("utf-8")))
+    context_lines = max(0, context_lines)
+    with mapped_file(path) as (source, index):
+        lines: List[int] = []
+        truncated = False
+        for match in regex.finditer(source):
+            line = index.line_of(match.start())
+            if lines and lines[-1] == line:
+                continue
+            if len(lines) == PATTERN_MAX_MATCHES:
+                truncated = True
+                break
+            lines.append(line)
+        if not lines:
+            return f"No matches for '{pattern}' in '{path}' ({index.line_count} lines)"
+
+        windows: List[List[int]] = []
+        for line in lines:
+            start, end = max(1, line - context_lines), min(index.line_count, line + context_lines)
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1][1] = end
+            else:
+                windows.append([start, end])
+        sections = [
+            f"Lines {start}-{end}:\n{_decode(source[slice(*index.byte_range(start, end))])}" for start, end in windows
+        ]
+        total = index.line_count
+    more = f" (first {PATTERN_MAX_MATCHES} shown)" if truncated else ""
+    header = f"Matches for '{pattern}' in '{path}' ({total} lines) at lines {', '.join(map(str, lines))}{more}:"
+    return "\n\n".join([header] + sections)
+
+def outline(path: str) -> str:
+    """Return the top-level definitions of 'path' (headings for Markdown) with their line numbers.
+
+    The match is a keyword heuristic on unindented lines, so it works across
+    languages without parsing; nested definitions such as methods are not listed.
+    """
+    regex = HEADING_PATTERN if os.path.splitext(path)[1].lower() in HEADING_EXTENSIONS else OUTLINE_PATTERN
+    with mapped_file(path) as (source, index):
+        entries = []
+        for match in regex.finditer(source):
+            if len(entries) == OUTLINE_MAX_ENTRIES:
+                entries.append("...")
+                break
+            text = _decode(match.group().rstrip())
+            if len(text) > OUTLINE_LINE_CHARS:
+                text = text[:OUTLINE_LINE_CHARS] + "…"
+            entries.append(f"{index.line_of(match.start()):>6}: {text}")
+        total = index.line_count
+    if not entries:
+        return f"No top-level definitions found in '{path}' ({total} lines); read a line range instead"
+    return f"Outline of '{path}' ({total} lines):\n" + "\n".join(entries)
+
+def read_file_view(path: str, options: Dict[str, Any]) -> Optional[str]:
+    """Serve a partial read tool call, or return None when the whole file was asked for."""
+    if options.get("outline"):
+        return outline(path)
+    if options.get("pattern"):
+        context_lines = options.get("context_lines")
+        return read_around(path, options["pattern"], PATTERN_CONTEXT_LINES if context_lines is None else int(context_lines))
+    if options.get("start_line") is not None or options.get("end_line") is not None:
+        end_line = options.get("end_line")
+        return read_lines(path, int(options.get("start_line") or 1), int(end_line) if end_line is not None else None)
+    if options.get("start_byte") is not None or options.get("end_byte") is not None:
+        end_byte = options.get("end_byte")
+        return read_bytes(path, int(options.get("start_byte") or 0), int(end_byte) if end_byte is not None else None)
+    return None
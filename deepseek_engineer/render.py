@@ -0,0 +1,115 @@
+# --------------------------------------------------------------------------------
+# Stream rendering
+# --------------------------------------------------------------------------------
+import os
+import time
+import asyncio
+from typing import List
+
+from rich.console import Console
+
+from .ui import console
+
+RENDER_FPS = max(1.0, float(os.getenv("DEEPSEEK_RENDER_FPS", "30")))
+# "full" streams the chain of thought; "collapsed" shows a one-line live progress indicator
+REASONING_DISPLAY = os.getenv("DEEPSEEK_REASONING_DISPLAY", "full").lower()
+
+class StreamRenderer:
+    """Buffers streamed reasoning and content deltas and writes them at a capped frame rate.
+
+    Deltas are collected in lists and flushed to the console at most RENDER_FPS times a
+    second, or as soon as a delta contains a newline, so a long response costs a few
+    hundred console writes instead of one per token. The final strings are built with
+    a single join. Pending text is flushed by a timer on the running event loop, so
+    output never stalls while the stream pauses.
+    """
+
+    def __init__(self, output: Console = None, fps: float = RENDER_FPS,
+                 collapse_reasoning: bool = None, clock=time.monotonic):
+        self.console = output or console
+        self.frame_interval = 1.0 / fps
+        self.collapse_reasoning = REASONING_DISPLAY == "collapsed" if collapse_reasoning is None else collapse_reasoning
+        self.clock = clock
+        self.reasoning_parts: List[str] = []
+        self.content_parts: List[str] = []
+        self.reasoning_started = False
+        self._reasoning_chars = 0
+        self._reasoning_began_at = 0.0
+        self._pending: List[str] = []
+        self._last_flush = 0.0
+        self._timer = None
+        self._status = None
+
+    @property
+    def reasoning_text(self) -> str:
+        return "".join(self.reasoning_parts)
+
+    @property
+    def content_text(self) -> str:
+        return "".join(self.content_parts)
+
+    def add_reasoning(self, text: str) -> None:
+        if not self.reasoning_started:
+            self.reasoning_started = True
+            self._reasoning_began_at = self.clock()
+            if self.collapse_reasoning:
+                self._status = self.console.status("[bold blue]💭 Reasoning...[/bold blue]")
+                self._status.start()
+            else:
+                self.console.print("\n[bold blue]💭 Reasoning:[/bold blue]")
+        self.reasoning_parts.append(text)
+        self._reasoning_chars += len(text)
+        if self._status is not None:
+            now = self.clock()
+            if now - self._last_flush >= self.frame_interval:
+                self._last_flush = now
+                self._status.update(f"[bold blue]💭 Reasoning...[/bold blue] [dim]~{self._reasoning_chars // 4:,} tokens, {now - self._reasoning_began_at:.1f}s[/dim]")
+            return
+        self._write(text)
+
+    def add_content(self, text: str) -> None:
+        if self.reasoning_started:
+            self._end_reasoning()
+            self.console.print("\n[bold bright_blue]🤖 Assistant>[/bold bright_blue] ", end="")
+        self.content_parts.append(text)
+        self._write(text)
+
+    def _end_reasoning(self) -> None:
+        self.flush()
+        self.reasoning_started = False
+        if self._status is not None:
+            self._status.stop()
+            self._status = None
+            elapsed = self.clock() - self._reasoning_began_at
+            self.console.print(f"[bold blue]💭 Reasoned[/bold blue] [dim]for {elapsed:.1f}s (~{self._reasoning_chars // 4:,} tokens)[/dim]")
+        else:
+            self.console.print("\n")  # Add spacing after reasoning
+
+    def _write(self, text: str) -> None:
+        self._pending.append(text)
+        if "\n" in text or self.clock() - self._last_flush >= self.frame_interval:
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # Without a loop the next delta or finish() flushes
+            delay = max(0.0, self.frame_interval - (self.clock() - self._last_flush))
+            self._timer = loop.call_later(delay, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_flush = self.clock()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self.console.print(text, end="", markup=False, highlight=False, emoji=False, soft_wrap=True)
+
+    def finish(self) -> None:
+        """Flush pending output and stop any live indicator."""
+        if self.reasoning_started and self._status is not None:
+            self._end_reasoning()
+        self.flush()
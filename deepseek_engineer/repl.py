@@ -0,0 +1,127 @@
+# --------------------------------------------------------------------------------
+# Main interactive loop
+# --------------------------------------------------------------------------------
+import asyncio
+from typing import Optional
+
+from rich.panel import Panel
+
+from .commands import (
+    try_handle_add_command, try_handle_cache_command, try_handle_map_command, try_handle_resume_command,
+    try_handle_save_command, try_handle_stats_command,
+)
+from .compaction import compactor
+from .context import conversation_history
+from .sessions import SESSION_KEEP, SESSIONS_ENABLED, session_log
+from .transport import close_client, preconnect
+from .turns import run_cancellable_turn
+from .ui import console, get_prompt_session
+
+def print_welcome():
+    # Create a beautiful gradient-style welcome panel
+    welcome_text = """[bold bright_blue]🐋 DeepSeek Engineer[/bold bright_blue] [bright_cyan]with Function Calling[/bright_cyan]
+[dim blue]Powered by DeepSeek-R1 with Chain-of-Thought Reasoning[/dim blue]"""
+    
+    console.print(Panel.fit(
+        welcome_text,
+        border_style="bright_blue",
+        padding=(1, 2),
+        title="[bold bright_cyan]🤖 AI Code Assistant[/bold bright_cyan]",
+        title_align="center"
+    ))
+    
+    # Create an elegant instruction panel
+    instructions = """[bold bright_blue]📁 File Operations:[/bold bright_blue]
+  • [bright_cyan]/add path/to/file[/bright_cyan] - Include a single file in conversation
+  • [bright_cyan]/add path/to/folder[/bright_cyan] - Include all files in a folder
+  • [bright_cyan]/map [path][/bright_cyan] - Include a compact map of the Python modules, classes and functions
+  • [dim]The AI can automatically read and create files using function calls[/dim]
+
+[bold bright_blue]🎯 Commands:[/bold bright_blue]
+  • [bright_cyan]/cache[/bright_cyan] - Show file cache hit/miss counters
+  • [bright_cyan]/stats[/bright_cyan] - Show timings of the last turn, tool calls and history size
+  • [bright_cyan]/save [name][/bright_cyan] - Keep this session; [bright_cyan]/resume [name][/bright_cyan] - List or continue a session
+  • [bright_cyan]Ctrl-C[/bright_cyan] while a response streams - Cancel the turn and keep the session
+  • [bright_cyan]exit[/bright_cyan] or [bright_cyan]quit[/bright_cyan] - End the session
+  • Just ask naturally - the AI will handle file operations automatically!"""
+    
+    console.print(Panel(
+        instructions,
+        border_style="blue",
+        padding=(1, 2),
+        title="[bold blue]💡 How to Use[/bold blue]",
+        title_align="left"
+    ))
+    if session_log.recording:
+        console.print(f"[dim]💾 Recording this session to {session_log.path}; unsaved sessions beyond the "
+                      f"{SESSION_KEEP} most recent are pruned[/dim]")
+    console.print()
+
+async def main_async():
+    print_welcome()
+    prompt_session = get_prompt_session()
+
+    while True:
+        # Warm up the connection pool and condense older turns in the background while the user types
+        warm_up = asyncio.create_task(preconnect())
+        compactor.schedule()
+        try:
+            user_input = (await prompt_session.prompt_async("🔵 You> ")).strip()
+        except (EOFError, KeyboardInterrupt):
+            console.print("\n[bold yellow]👋 Exiting gracefully...[/bold yellow]")
+            break
+        finally:
+            if not warm_up.done():
+                warm_up.cancel()
+
+        if not user_input:
+            continue
+
+        if user_input.lower() in ["exit", "quit"]:
+            console.print("[bold bright_blue]👋 Goodbye! Happy coding![/bold bright_blue]")
+            break
+
+        if try_handle_add_command(user_input):
+            continue
+
+        if try_handle_map_command(user_input):
+            continue
+
+        if try_handle_save_command(user_input):
+            continue
+
+        if try_handle_resume_command(user_input):
+            continue
+
+        if try_handle_cache_command(user_input):
+            continue
+
+        if try_handle_stats_command(user_input):
+            continue
+
+        compactor.apply()
+        response_data = await run_cancellable_turn(user_input)
+        
+        if response_data and response_data.get("error"):
+            console.print(f"[bold red]❌ Error: {response_data['error']}[/bold red]")
+
+    console.print("[bold blue]✨ Session finished. Thank you for using DeepSeek Engineer![/bold blue]")
+
+def start_session_log(name: Optional[str] = None) -> None:
+    """Record the conversation to the session log when DEEPSEEK_SESSIONS=1 or a session 'name' is given.
+
+    Session 'name' is resumed if it exists.
+    """
+    if not SESSIONS_ENABLED and not name:
+        return
+    if session_log.attach(conversation_history, name):
+        console.print(f"[bold blue]✓[/bold blue] Resumed session '[bright_cyan]{name}[/bright_cyan]' "
+                      f"[dim]({len(conversation_history):,} messages)[/dim]")
+
+async def run_session(session: Optional[str] = None):
+    try:
+        start_session_log(session)
+        await main_async()
+    finally:
+        compactor.cancel()
+        await close_client()
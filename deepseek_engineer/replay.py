@@ -0,0 +1,194 @@
+# --------------------------------------------------------------------------------
+# Record/replay cache for chat completion streams
+# --------------------------------------------------------------------------------
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .files import CACHE_DIR, atomic_write
+from .ui import console
+
+# "off", "record" (always call the API and store the stream), "replay" (serve only from the
+# cache, failing on a miss) or "auto" (serve hits, record misses)
+REPLAY_MODE = os.getenv("DEEPSEEK_REPLAY", "off").lower()
+REPLAY_DIR = os.getenv("DEEPSEEK_REPLAY_DIR") or os.path.join(CACHE_DIR, "replay")
+REPLAY_TIMING = os.getenv("DEEPSEEK_REPLAY_TIMING", "fast").lower()  # "fast" or "recorded"
+REPLAY_MAX_BYTES = int(os.getenv("DEEPSEEK_REPLAY_MAX_BYTES", str(512 * 1024 * 1024)))
+REPLAY_VERSION = 1
+REPLAY_MODES = ("off", "record", "replay", "auto")
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when a request has no recording."""
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Stable hash of a chat completion request (model, messages, tools and every other parameter)."""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+
+def _chunk_from_dict(data: Dict[str, Any]):
+    from openai.types.chat import ChatCompletionChunk
+
+    return ChatCompletionChunk.model_validate(data)
+
+class ReplayStream:
+    """Serves recorded chunks with the same interface as a live stream."""
+
+    def __init__(self, records: List[Tuple[float, Dict[str, Any]]], recorded_timing: bool):
+        self.records = records
+        self.recorded_timing = recorded_timing
+        self.closed = False
+
+    async def __aiter__(self):
+        previous = self.records[0][0] if self.records else 0.0
+        for offset, data in self.records:
+            if self.closed:
+                return
+            if self.recorded_timing and offset > previous:
+                await asyncio.sleep(offset - previous)
+            previous = offset
+            yield _chunk_from_dict(data)
+
+    async def close(self) -> None:
+        self.closed = True
+
+class RecordingStream:
+    """Wraps a live stream and stores its chunks once it has been read to the end.
+
+    A stream closed early (a cancelled turn) or broken by an error is not stored.
+    """
+
+    def __init__(self, stream, cache: "ReplayCache", key: str, request: Dict[str, Any], started: float):
+        self.stream = stream
+        self.cache = cache
+        self.key = key
+        self.request = request
+        self.started = started
+        self.records: List[Tuple[float, Dict[str, Any]]] = []
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.records.append((time.monotonic() - self.started, chunk.model_dump(exclude_unset=True)))
+            yield chunk
+        await asyncio.to_thread(self.cache.store, self.key, self.request, self.records)
+
+    async def close(self) -> None:
+        await self.stream.close()
+
+class ReplayCache:
+    """On-disk recordings of streamed responses, one gzip JSON-lines file per request hash.
+
+    The first line is a header; every other line is [seconds since the request was
+    sent, chunk]. Files are touched on every hit, and the least recently used are
+    deleted once the directory grows beyond max_bytes.
+    """
+
+    def __init__(self, mode: str = REPLAY_MODE, directory: str = REPLAY_DIR, timing: str = REPLAY_TIMING,
+                 max_bytes: int = REPLAY_MAX_BYTES):
+        if mode not in REPLAY_MODES:
+            console.print(f"[yellow dim]⚠ Unknown DEEPSEEK_REPLAY mode '{mode}'; recording and replay are off[/yellow dim]")
+            mode = "off"
+        self.mode = mode
+        self.directory = directory
+        self.recorded_timing = timing == "recorded"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == "replay"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.jsonl.gz")
+
+    def load(self, key: str) -> Optional[List[Tuple[float, Dict[str, Any]]]]:
+        import gzip
+
+        path = self.path_for(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != REPLAY_VERSION:
+                    return None
+                records = [tuple(json.loads(line)) for line in f]
+            os.utime(path)
+        except (OSError, ValueError, EOFError):
+            return None
+        return records
+
+    def store(self, key: str, request: Dict[str, Any], records: List[Tuple[float, Dict[str, Any]]]) -> None:
+        import gzip
+
+        header = {"version": REPLAY_VERSION, "model": request.get("model"), "recorded_at": time.time(),
+                  "chunks": len(records)}
+        lines = [json.dumps(header)] + [json.dumps([round(offset, 4), data], ensure_ascii=False) for offset, data in records]
+        payload = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), compresslevel=6)
+        path = self.path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, [payload])
+        except OSError as e:
+            console.print(f"[yellow dim]⚠ Could not store the recorded response: {e}[/yellow dim]")
+            return
+        with self._lock:
+            self.recorded += 1
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used recordings until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    async def open(self, request: Dict[str, Any], open_live: Callable[[], Awaitable[Any]]):
+        """Return a stream for 'request': a recording when there is one (replay/auto), else the live stream."""
+        key = request_key(request)
+        if self.mode in ("replay", "auto"):
+            records = await asyncio.to_thread(self.load, key)
+            if records is not None:
+                with self._lock:
+                    self.hits += 1
+                stream = ReplayStream(records, self.recorded_timing)
+                if self.recorded_timing and records:
+                    await asyncio.sleep(records[0][0])  # Time to the first chunk
+                return stream
+            with self._lock:
+                self.misses += 1
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recorded response for request {key[:12]} in {self.directory} "
+                                 f"(record it with DEEPSEEK_REPLAY=record or auto)")
+        started = time.monotonic()
+        return RecordingStream(await open_live(), self, key, request, started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+replay_cache = ReplayCache()
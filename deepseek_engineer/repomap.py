@@ -0,0 +1,286 @@
+# --------------------------------------------------------------------------------
+# Repository map
+# --------------------------------------------------------------------------------
+import os
+import ast
+import copy
+import pickle
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .files import CACHE_DIR, atomic_write, current_root, normalize_path
+from .ingest import PathMatcher, iter_directory_files, process_pool
+from .tracing import tracer
+from .ui import console
+
+REPO_MAP_TOKENS = int(os.getenv("DEEPSEEK_REPO_MAP_TOKENS", "4000"))
+REPO_MAP_WORKERS = max(1, int(os.getenv("DEEPSEEK_REPO_MAP_WORKERS", str(os.cpu_count() or 1))))
+INLINE_PARSE_FILES = 64  # Fewer changed files than this are parsed without the process pool
+PARSE_CHUNK_FILES = 32
+SIGNATURE_CHARS = 160
+DOC_CHARS = 100
+MAP_VERSION = 1
+PYTHON_EXTENSIONS = (".py", ".pyi")
+
+class Definition(NamedTuple):
+    kind: str  # "class", "def" or "async def"
+    name: str
+    signature: str
+    doc: str
+    line: int
+    depth: int  # 0 for module level, 1 for class members
+
+class ModuleSummary(NamedTuple):
+    doc: str
+    definitions: List[Definition]
+    references: Dict[str, int]  # Identifier -> uses (names, attributes and imported names)
+    imports: List[str]  # Absolute module names imported
+    error: Optional[str]
+
+def _first_line(doc: Optional[str]) -> str:
+    line = (doc or "").strip().split("\n", 1)[0].strip()
+    return line if len(line) <= DOC_CHARS else line[:DOC_CHARS] + "…"
+
+def _signature(node, method: bool = False) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases + node.keywords)
+        text = f"class {node.name}({bases})" if bases else f"class {node.name}"
+    else:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        arguments = node.args
+        if method and arguments.args and arguments.args[0].arg in ("self", "cls"):
+            # The receiver carries no information in a map
+            arguments = copy.copy(arguments)
+            arguments.args = arguments.args[1:]
+        text = f"{prefix} {node.name}({ast.unparse(arguments)})"
+        if node.returns is not None:
+            text += f" -> {ast.unparse(node.returns)}"
+    return text if len(text) <= SIGNATURE_CHARS else text[:SIGNATURE_CHARS] + "…"
+
+def _definition(node, depth: int) -> Definition:
+    kind = "class" if isinstance(node, ast.ClassDef) else "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return Definition(kind, node.name, _signature(node, depth > 0), _first_line(ast.get_docstring(node)), node.lineno, depth)
+
+def summarize_source(source: bytes) -> ModuleSummary:
+    """Parse one module into its definitions, the identifiers it uses and what it imports."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return ModuleSummary("", [], {}, [], str(e))
+    definitions: List[Definition] = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions.append(_definition(node, 0))
+            if isinstance(node, ast.ClassDef):
+                definitions.extend(
+                    _definition(member, 1) for member in node.body
+                    if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                )
+    references: Counter = Counter()
+    imports: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            references[node.id] += 1
+        elif isinstance(node, ast.Attribute):
+            references[node.attr] += 1
+        elif isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            references.update(alias.name for alias in node.names)
+            if node.module and not node.level:
+                imports.append(node.module)
+    return ModuleSummary(_first_line(ast.get_docstring(tree)), definitions, dict(references), imports, None)
+
+def _summarize_chunk(sources: List[bytes]) -> List[ModuleSummary]:
+    return [summarize_source(source) for source in sources]
+
+def module_name(relative_path: str) -> str:
+    parts = os.path.splitext(relative_path)[0].split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+class RepoMap:
+    """AST summaries of the Python modules below 'root', cached on disk by content hash.
+
+    Files whose mtime and size are unchanged reuse their recorded hash; the
+    others are hashed, and only contents without a cached summary are parsed,
+    on a process pool for large batches.
+    """
+
+    def __init__(self, root: str, cache_dir: str = CACHE_DIR):
+        self.root = root
+        digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"repomap-{digest}.pickle")
+        self.files: Dict[str, Tuple[int, int, str]] = {}  # relative path -> (mtime_ns, size, content hash)
+        self.summaries: Dict[str, ModuleSummary] = {}  # content hash -> summary
+        self.last_build: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return
+        if saved.get("version") == MAP_VERSION and saved.get("root") == self.root:
+            self.files, self.summaries = saved["files"], saved["summaries"]
+
+    def _save(self) -> None:
+        payload = pickle.dumps({"version": MAP_VERSION, "root": self.root, "files": self.files,
+                                "summaries": self.summaries}, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            atomic_write(self.cache_path, [payload])
+        except OSError as e:
+            console.print(f"[yellow dim]⚠ Could not save the repository map cache: {e}[/yellow dim]")
+
+    def _parse(self, sources: List[bytes]) -> List[ModuleSummary]:
+        if REPO_MAP_WORKERS == 1 or len(sources) < INLINE_PARSE_FILES:
+            return _summarize_chunk(sources)
+        chunks = [sources[i:i + PARSE_CHUNK_FILES] for i in range(0, len(sources), PARSE_CHUNK_FILES)]
+        with process_pool(REPO_MAP_WORKERS) as executor:
+            return [summary for chunk in executor.map(_summarize_chunk, chunks) for summary in chunk]
+
+    def update(self) -> Dict[str, ModuleSummary]:
+        """Bring the cache up to date and return the summary of every module by relative path."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            skipped: List[str] = []
+            files: Dict[str, Tuple[int, int, str]] = {}
+            pending: Dict[str, bytes] = {}  # content hash -> source still to parse
+            hashed = 0
+            for path, _, stat_result in iter_directory_files(self.root, PathMatcher(), skipped):
+                if not path.endswith(PYTHON_EXTENSIONS):
+                    continue
+                relative = os.path.relpath(path, self.root)
+                signature = (stat_result.st_mtime_ns, stat_result.st_size)
+                entry = self.files.get(relative)
+                if entry is not None and entry[:2] == signature and entry[2] in self.summaries:
+                    files[relative] = entry
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        source = f.read()
+                except OSError:
+                    continue
+                tracer.count_bytes(read=len(source))
+                hashed += 1
+                digest = hashlib.sha1(source).hexdigest()
+                files[relative] = signature + (digest,)
+                if digest not in self.summaries:
+                    pending[digest] = source
+            for digest, summary in zip(pending, self._parse(list(pending.values()))):
+                self.summaries[digest] = summary
+            changed = bool(hashed) or files.keys() != self.files.keys()
+            self.files = files
+            live = {entry[2] for entry in files.values()}
+            if len(live) != len(self.summaries):
+                self.summaries = {digest: summary for digest, summary in self.summaries.items() if digest in live}
+            if changed:
+                self._save()
+            self.last_build = {"modules": len(files), "hashed": hashed, "parsed": len(pending)}
+            return {relative: self.summaries[entry[2]] for relative, entry in files.items()}
+
+def rank_modules(modules: Dict[str, ModuleSummary]) -> List[Tuple[float, str, Dict[str, int]]]:
+    """Score each module and its definitions by how often other modules refer to them.
+
+    A definition scores the uses of its name in other modules; a module scores the
+    sum of its definitions plus a bonus for every module that imports it.
+    Returns (module score, path, definition name -> score), best first.
+    """
+    total_references: Counter = Counter()
+    for summary in modules.values():
+        total_references.update(summary.references)
+    importers: Counter = Counter()
+    for summary in modules.values():
+        for name in set(summary.imports):
+            importers[name] += 1
+    ranked = []
+    for path, summary in modules.items():
+        scores = {
+            definition.name: total_references[definition.name] - summary.references.get(definition.name, 0)
+            for definition in summary.definitions
+        }
+        score = sum(scores.values()) + 5 * importers[module_name(path)]
+        ranked.append((score, path, scores))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
+
+def render_repo_map(root: str, modules: Dict[str, ModuleSummary], max_tokens: int = REPO_MAP_TOKENS,
+                    prefix: str = "") -> str:
+    """Render the ranked map, one line per module and definition, cut to 'max_tokens'.
+
+    Private definitions that nothing else references are left out.
+    """
+    budget = max_tokens * 4  # Same four-characters-per-token estimate as the context manager
+    selected = {path: summary for path, summary in modules.items() if path.startswith(prefix)}
+    lines: List[str] = []
+    used = 0
+    shown = 0
+    for _, path, scores in rank_modules(selected):
+        summary = selected[path]
+        block = [f"{path} — {summary.doc}" if summary.doc else path]
+        if summary.error:
+            block.append(f"  (could not parse: {summary.error})")
+        parent_kept = True
+        for definition in summary.definitions:
+            if definition.depth == 0:
+                parent_kept = not definition.name.startswith("_") or scores[definition.name] > 0
+                keep = parent_kept
+            else:
+                keep = parent_kept and (definition.name == "__init__" or not definition.name.startswith("_")
+                                        or scores[definition.name] > 0)
+            if keep:
+                doc = f" — {definition.doc}" if definition.doc else ""
+                block.append(f"{'  ' * (definition.depth + 1)}{definition.line}: {definition.signature}{doc}")
+        cost = sum(len(line) + 1 for line in block)
+        if used + cost > budget:
+            # Fit what we can of the first module that overflows, then stop
+            for line in block:
+                if used + len(line) + 1 > budget:
+                    break
+                lines.append(line)
+                used += len(line) + 1
+            break
+        lines.extend(block)
+        used += cost
+        shown += 1
+    omitted = len(selected) - shown
+    header = (f"Repository map of '{root}' ({len(selected)} Python modules ranked by references, "
+              f"~{used // 4 + 1:,} tokens; line numbers for ranged reads)")
+    if omitted:
+        header += f"; {omitted} lower-ranked modules omitted, raise max_tokens or narrow the path"
+    return header + ":\n\n" + "\n".join(lines)
+
+_maps: Dict[str, RepoMap] = {}
+_maps_lock = threading.Lock()
+
+def get_repo_map(root: str) -> RepoMap:
+    with _maps_lock:
+        repo_map = _maps.get(root)
+        if repo_map is None:
+            repo_map = _maps[root] = RepoMap(root)
+        return repo_map
+
+def build_repo_map(path: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+    """Return the map of the Python modules in the workspace, optionally only those below 'path'."""
+    root = normalize_path(current_root())
+    prefix = ""
+    if path:
+        scope = normalize_path(path)
+        if not os.path.exists(scope):
+            raise FileNotFoundError(f"No such file or directory: '{path}'")
+        if scope != root and not scope.startswith(root.rstrip(os.sep) + os.sep):
+            # Outside the workspace: map that directory on its own
+            root, scope = scope, scope
+        if scope != root:
+            prefix = os.path.relpath(scope, root) + (os.sep if os.path.isdir(scope) else "")
+    with tracer.span("repo_map", path=path or root):
+        modules = get_repo_map(root).update()
+        return render_repo_map(root, modules, REPO_MAP_TOKENS if max_tokens is None else max(200, int(max_tokens)), prefix)
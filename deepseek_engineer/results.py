@@ -0,0 +1,154 @@
+# --------------------------------------------------------------------------------
+# Tool result budgets and paging
+# --------------------------------------------------------------------------------
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+from .context import ContentParts, FileContent, FileDiff, content_length
+
+def _tool_limits() -> Dict[str, int]:
+    """Per-tool result limits from DEEPSEEK_RESULT_CHARS_<TOOL>, e.g. DEEPSEEK_RESULT_CHARS_READ_MULTIPLE_FILES."""
+    prefix = "DEEPSEEK_RESULT_CHARS_"
+    return {key[len(prefix):].lower(): int(value) for key, value in os.environ.items()
+            if key.startswith(prefix) and value.strip()}
+
+TOOL_RESULT_CHARS = int(os.getenv("DEEPSEEK_TOOL_RESULT_CHARS", "32000"))  # Largest result sent whole (~8k tokens)
+TURN_RESULT_CHARS = int(os.getenv("DEEPSEEK_TURN_RESULT_CHARS", "96000"))  # All tool results of one turn together
+TOOL_RESULT_LIMITS = _tool_limits()
+RESULT_PAGE_CHARS = int(os.getenv("DEEPSEEK_RESULT_PAGE_CHARS", "16000"))
+RESULT_STORE_CHARS = int(os.getenv("DEEPSEEK_RESULT_STORE_CHARS", "64000000"))  # Paged results kept for read_more
+PREVIEW_HEAD_CHARS = 6000
+PREVIEW_TAIL_CHARS = 2000
+MIN_PREVIEW_CHARS = 1000  # Preview size once the turn budget is used up
+UNPAGED_TOOLS = {"read_more"}  # Already bounded by RESULT_PAGE_CHARS
+
+def result_text(content: Union[str, ContentParts]) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else part.text if isinstance(part, FileContent)
+                   else part.diff if isinstance(part, FileDiff) else "" for part in content)
+
+def _line_cut(text: str, position: int, earliest: int) -> int:
+    """Move 'position' back to just after a newline, unless that would go before 'earliest'."""
+    if position >= len(text):
+        return len(text)
+    newline = text.rfind("\n", earliest, position)
+    return newline + 1 if newline >= 0 else position
+
+class StoredResult:
+    """A full tool result kept for read_more, split into pages at line boundaries."""
+
+    def __init__(self, tool: str, text: str, page_chars: int = RESULT_PAGE_CHARS):
+        self.tool = tool
+        self.text = text
+        self.offsets: List[int] = [0]
+        while self.offsets[-1] < len(text):
+            start = self.offsets[-1]
+            self.offsets.append(_line_cut(text, start + page_chars, start + page_chars // 2))
+
+    @property
+    def pages(self) -> int:
+        return max(1, len(self.offsets) - 1)
+
+    def page(self, number: int) -> str:
+        return self.text[self.offsets[number - 1]:self.offsets[number]] if self.offsets[1:] else ""
+
+class ResultStore:
+    """Oversized tool results by handle, evicting the oldest beyond RESULT_STORE_CHARS."""
+
+    def __init__(self, max_chars: int = RESULT_STORE_CHARS):
+        self.max_chars = max_chars
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._chars = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def put(self, stored: StoredResult) -> str:
+        with self._lock:
+            self._counter += 1
+            handle = f"r{self._counter}"
+            self._results[handle] = stored
+            self._chars += len(stored.text)
+            while self._chars > self.max_chars and len(self._results) > 1:
+                _, evicted = self._results.popitem(last=False)
+                self._chars -= len(evicted.text)
+        return handle
+
+    def get(self, handle: str) -> Optional[StoredResult]:
+        with self._lock:
+            return self._results.get(handle)
+
+    def discard(self, handle: str) -> None:
+        with self._lock:
+            stored = self._results.pop(handle, None)
+            if stored is not None:
+                self._chars -= len(stored.text)
+
+result_store = ResultStore()
+
+def preview(handle: str, stored: StoredResult, budget: int) -> str:
+    """Head and tail of a stored result with instructions for paging through the rest."""
+    text = stored.text
+    head_chars = min(PREVIEW_HEAD_CHARS, max(MIN_PREVIEW_CHARS, budget * 3 // 4))
+    tail_chars = min(PREVIEW_TAIL_CHARS, max(0, budget - head_chars))
+    head = text[:_line_cut(text, head_chars, head_chars // 2)]
+    tail_start = max(len(head), len(text) - tail_chars)
+    newline = text.find("\n", tail_start)
+    if tail_chars and 0 <= newline < len(text) - 1:
+        tail_start = newline + 1
+    tail = text[tail_start:] if tail_chars else ""
+    omitted = len(text) - len(head) - len(tail)
+    note = (f"[Result of {stored.tool} is {len(text):,} chars, too large to include whole. Stored as handle "
+            f"'{handle}' in {stored.pages} page(s); call read_more(handle=\"{handle}\", page=N) for page N "
+            f"(1-{stored.pages}), or narrow the call (line ranges, pattern, path).]")
+    parts = [note, head]
+    if omitted:
+        parts.append(f"[... {omitted:,} chars omitted ...]")
+    if tail:
+        parts.append(tail)
+    return "\n".join(parts)
+
+def read_more(handle: str, page: int = 1) -> str:
+    """Return page 'page' (1-based) of a stored tool result."""
+    stored = result_store.get(handle)
+    if stored is None:
+        return f"Result '{handle}' is no longer stored; run the original tool call again (narrowed if possible)"
+    if not 1 <= page <= stored.pages:
+        return f"Result '{handle}' has pages 1-{stored.pages}; page {page} does not exist"
+    return f"Page {page} of {stored.pages} of result '{handle}' ({stored.tool}):\n\n{stored.page(page)}"
+
+class ResultBudget:
+    """Bounds the tool results of one turn.
+
+    A result above its tool's limit, or above what is left of the turn budget, is
+    stored under a handle and replaced by a preview; results are fitted in the
+    order they are added to the history, so the outcome does not depend on which
+    tool finished first. Results of at most MIN_PREVIEW_CHARS, such as status and
+    error messages, and results no larger than their preview are always sent whole.
+    """
+
+    def __init__(self, turn_chars: int = TURN_RESULT_CHARS, tool_chars: int = TOOL_RESULT_CHARS,
+                 limits: Dict[str, int] = TOOL_RESULT_LIMITS):
+        self.remaining = turn_chars
+        self.tool_chars = tool_chars
+        self.limits = limits
+        self.paged = 0
+
+    def fit(self, tool: str, content: Union[str, ContentParts]) -> Union[str, ContentParts]:
+        length = content_length(content)
+        limit = min(self.limits.get(tool, self.tool_chars), max(0, self.remaining))
+        if tool in UNPAGED_TOOLS or length <= max(limit, MIN_PREVIEW_CHARS):
+            self.remaining -= length
+            return content
+        stored = StoredResult(tool, result_text(content))
+        handle = result_store.put(stored)
+        shown = preview(handle, stored, limit)
+        if len(shown) >= length:
+            result_store.discard(handle)
+            self.remaining -= length
+            return content
+        self.remaining -= len(shown)
+        self.paged += 1
+        return shown
@@ -0,0 +1,128 @@
+# --------------------------------------------------------------------------------
+# Per-phase model routing
+# --------------------------------------------------------------------------------
+import os
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+# Opt-in: with routing off every request goes to DEEPSEEK_MODEL, as it did before routing
+ROUTING_ENABLED = os.getenv("DEEPSEEK_ROUTING", "0").lower() in ("1", "true", "yes", "on")
+# The model every request used before routing; savings are estimated against it
+BASELINE_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-reasoner")
+BASELINE_MAX_TOKENS = int(os.getenv("DEEPSEEK_MAX_TOKENS", "64000"))
+QA_MAX_CHARS = int(os.getenv("DEEPSEEK_QA_MAX_CHARS", "240"))  # Longer messages are always planned
+
+# phase -> (default model, default completion token cap); DEEPSEEK_MODEL_<PHASE> and
+# DEEPSEEK_MAX_TOKENS_<PHASE> override them
+PHASE_DEFAULTS: Dict[str, Tuple[str, int]] = {
+    "plan": (BASELINE_MODEL, BASELINE_MAX_TOKENS),  # New user request that may need tools
+    "follow_up": ("deepseek-chat", 8000),  # Answer after tool results, no new user text
+    "qa": ("deepseek-chat", 8000),  # Short question that asks for no file work
+}
+
+# Words and path-like tokens that suggest the request needs tools or careful reasoning
+ACTION_PATTERN = re.compile(
+    r"\b(?:make|create|write|edit|modify|change|update|fix|implement|refactor|rename|add|remove|delete|move|"
+    r"generate|build|migrate|debug|read|open|review|analy[sz]e|test|run|design|plan|optimi[sz]e)\w*\b"
+    r"|[\w-]+\.[A-Za-z0-9]{1,5}\b|[/\\]|```",
+    re.IGNORECASE,
+)
+# Tool results that mean the follow-up has to work out what went wrong
+TOOL_FAILURE_PATTERN = re.compile(r"^(?:Error\b|No files were changed)", re.MULTILINE)
+
+class Route(NamedTuple):
+    phase: str
+    model: str
+    max_tokens: int
+    reason: str
+
+def _result_text(content: Union[str, List[Any]]) -> str:
+    # Only the text around file bodies matters here: tool errors are plain strings
+    return content if isinstance(content, str) else "".join(part for part in content if isinstance(part, str))
+
+class RoutingPolicy:
+    """Chooses the model and completion token cap for each request of a turn.
+
+    The first request of a turn is planned on the baseline model unless the user
+    message is a short question with no sign of file work; the follow-up after tool
+    execution goes to a cheaper model unless a tool failed. Savings are estimated
+    against the average completion tokens and stream time observed on the baseline
+    model, so they are only reported once a baseline request has been seen.
+    """
+
+    def __init__(self, enabled: bool = ROUTING_ENABLED, baseline_model: str = BASELINE_MODEL,
+                 baseline_max_tokens: int = BASELINE_MAX_TOKENS):
+        self.enabled = enabled
+        self.baseline = Route("baseline", baseline_model, baseline_max_tokens, "routing disabled")
+        defaults = dict(PHASE_DEFAULTS, plan=(baseline_model, baseline_max_tokens))
+        self.routes = {
+            phase: (os.getenv(f"DEEPSEEK_MODEL_{phase.upper()}", model),
+                    int(os.getenv(f"DEEPSEEK_MAX_TOKENS_{phase.upper()}", str(max_tokens))))
+            for phase, (model, max_tokens) in defaults.items()
+        }
+        self.saved_tokens = 0
+        self.saved_ms = 0.0
+        self._baseline_tokens = 0
+        self._baseline_ms = 0.0
+        self._baseline_streams = 0
+        self._lock = threading.Lock()
+
+    def _route(self, phase: str, reason: str) -> Route:
+        if not self.enabled:
+            return self.baseline
+        model, max_tokens = self.routes[phase]
+        return Route(phase, model, max_tokens, reason)
+
+    def initial(self, user_message: str) -> Route:
+        if len(user_message) > QA_MAX_CHARS:
+            return self._route("plan", "long request")
+        match = ACTION_PATTERN.search(user_message)
+        if match:
+            return self._route("plan", f"mentions '{match.group()}'")
+        return self._route("qa", "short question without file work")
+
+    def follow_up(self, tool_results: List[Union[str, List[Any]]]) -> Route:
+        for content in tool_results:
+            if TOOL_FAILURE_PATTERN.search(_result_text(content)):
+                return self._route("plan", "a tool call failed")
+        return self._route("follow_up", "tool results only")
+
+    def observe(self, route: Route, stream: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a finished stream (StreamTrace.to_dict()) and return its route with estimated savings."""
+        tokens = stream.get("completion_tokens") or 0
+        stream_ms = stream.get("stream_ms") or 0.0
+        record = {"phase": route.phase, "model": route.model, "max_tokens": route.max_tokens, "reason": route.reason,
+                  "saved_tokens_est": None, "saved_ms_est": None}
+        with self._lock:
+            if route.model == self.baseline.model:
+                self._baseline_tokens += tokens
+                self._baseline_ms += stream_ms
+                self._baseline_streams += 1
+                record.update(saved_tokens_est=0, saved_ms_est=0.0)
+            elif self._baseline_streams:
+                saved_tokens = max(0, round(self._baseline_tokens / self._baseline_streams) - tokens)
+                saved_ms = max(0.0, self._baseline_ms / self._baseline_streams - stream_ms)
+                self.saved_tokens += saved_tokens
+                self.saved_ms += saved_ms
+                record.update(saved_tokens_est=saved_tokens, saved_ms_est=round(saved_ms, 3))
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "saved_tokens_est": self.saved_tokens,
+                "saved_ms_est": round(self.saved_ms, 3),
+                "baseline_streams": self._baseline_streams,
+            }
+
+router = RoutingPolicy()
+
+def summarize_routes(routes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-turn routing record: the route of each request and the savings they add up to."""
+    return {
+        "routes": routes,
+        "saved_tokens_est": sum(route["saved_tokens_est"] or 0 for route in routes),
+        "saved_ms_est": round(sum(route["saved_ms_est"] or 0.0 for route in routes), 3),
+    }
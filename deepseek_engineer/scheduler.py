@@ -0,0 +1,118 @@
+# --------------------------------------------------------------------------------
+# Concurrent tool call scheduling
+# --------------------------------------------------------------------------------
+import os
+import json
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .files import normalize_path
+from .tools import execute_function_call_dict
+
+# Tools that never modify the filesystem and may run alongside each other
+READ_ONLY_TOOLS = {"read_file", "read_multiple_files", "search_code", "repo_map", "read_more"}
+# Access path of tools that read the whole workspace; conflicts with every write
+WHOLE_WORKSPACE = "*"
+TOOL_WORKERS = max(1, int(os.getenv("DEEPSEEK_TOOL_WORKERS", "8")))
+# Start read-only tool calls as soon as their arguments finish streaming
+EAGER_TOOL_EXECUTION = os.getenv("DEEPSEEK_EAGER_TOOLS", "1").lower() not in ("0", "false", "no", "off")
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="deepseek-tool")
+
+def tool_call_access(tool_call_dict) -> Optional[Tuple[bool, Set[str]]]:
+    """Return (is_write, normalized_paths) for a tool call, or None if it must run as a barrier."""
+    try:
+        function_name = tool_call_dict["function"]["name"]
+        arguments = json.loads(tool_call_dict["function"]["arguments"])
+        if function_name == "read_file":
+            return False, {normalize_path(arguments["file_path"])}
+        if function_name == "read_multiple_files":
+            return False, {normalize_path(p) for p in arguments["file_paths"]}
+        if function_name in ("search_code", "repo_map"):
+            return False, {WHOLE_WORKSPACE}
+        if function_name == "read_more":
+            return False, set()  # Reads a stored result, not the workspace
+        if function_name in ("create_file", "edit_file"):
+            return True, {normalize_path(arguments["file_path"])}
+        if function_name in ("create_multiple_files", "edit_files"):
+            return True, {normalize_path(f["path"]) for f in arguments["files"]}
+    except Exception:
+        pass
+    # Unknown tools and malformed arguments are serialized against everything
+    return None
+
+def tool_call_arguments_complete(tool_call_dict) -> bool:
+    arguments = tool_call_dict["function"]["arguments"]
+    if not tool_call_dict["function"]["name"] or not arguments.rstrip().endswith("}"):
+        return False  # Cheap check first; only attempt a parse once the object could be closed
+    try:
+        json.loads(arguments)
+        return True
+    except ValueError:
+        return False
+
+def tool_calls_conflict(earlier: Optional[Tuple[bool, Set[str]]], later: Optional[Tuple[bool, Set[str]]]) -> bool:
+    if earlier is None or later is None:
+        return True
+    if not (earlier[0] or later[0]):
+        return False  # Two reads never conflict
+    if WHOLE_WORKSPACE in earlier[1] or WHOLE_WORKSPACE in later[1]:
+        return True
+    return not earlier[1].isdisjoint(later[1])
+
+class ToolCallScheduler:
+    """Runs the tool calls of one assistant turn on the shared worker pool.
+
+    Calls must be submitted in their original order. Each call waits only for
+    earlier calls that touch the same path where at least one side writes, so
+    reads of different paths run in parallel while writes and edits to a path
+    keep their original order.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor = None, eager: bool = None):
+        self.executor = executor or tool_executor
+        self.eager = EAGER_TOOL_EXECUTION if eager is None else eager
+        self.submitted: List[Tuple[Future, Optional[Tuple[bool, Set[str]]]]] = []
+        self.futures_by_index: Dict[int, Future] = {}
+
+    def submit(self, tool_call_dict, index: Optional[int] = None) -> Future:
+        access = tool_call_access(tool_call_dict)
+        dependencies = [future for future, earlier in self.submitted if tool_calls_conflict(earlier, access)]
+        # The pool hands out work in submission order, so every dependency is already
+        # running or finished by the time a worker picks this call up; waiting cannot deadlock.
+        # Run in a copy of the caller's context so the tool sees the task's conversation, root and turn trace
+        future = self.executor.submit(contextvars.copy_context().run, self._run, tool_call_dict, dependencies)
+        self.submitted.append((future, access))
+        if index is not None:
+            self.futures_by_index[index] = future
+        return future
+
+    def submit_ready_reads(self, streamed_tool_calls: List[Dict[str, Any]]) -> None:
+        """Start the leading read-only calls whose argument JSON has finished streaming.
+
+        Only an unbroken run of reads from the first call onwards is started early, so
+        submission order is preserved; the first write ends eager execution for the turn
+        and everything after it waits for the end of the stream.
+        """
+        while self.eager and len(self.futures_by_index) < len(streamed_tool_calls):
+            index = len(self.futures_by_index)
+            tool_call = streamed_tool_calls[index]
+            # A call is complete once a later call has started or its arguments parse
+            complete = index < len(streamed_tool_calls) - 1 or tool_call_arguments_complete(tool_call)
+            if not complete:
+                return
+            if tool_call["function"]["name"] not in READ_ONLY_TOOLS:
+                self.eager = False
+                return
+            snapshot = {
+                "id": tool_call["id"],
+                "type": "function",
+                "function": dict(tool_call["function"]),
+            }
+            self.submit(snapshot, index)
+
+    @staticmethod
+    def _run(tool_call_dict, dependencies: List[Future]) -> str:
+        for dependency in dependencies:
+            dependency.exception()  # Wait without propagating the earlier call's failure
+        return execute_function_call_dict(tool_call_dict)
@@ -0,0 +1,262 @@
+# --------------------------------------------------------------------------------
+# Define Function Calling Tools
+# --------------------------------------------------------------------------------
+tools = [
+    {
+        "type": "function",
+        "function": {
+            "name": "read_file",
+            "description": "Read the content of a single file from the filesystem. For large files, request an outline, a line or byte range, or the lines around a pattern instead of the whole file",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "The path to the file to read (relative or absolute)",
+                    },
+                    "outline": {
+                        "type": "boolean",
+                        "description": "Return only the top-level definitions with their line numbers",
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "First line to return (1-based)",
+                    },
+                    "end_line": {
+                        "type": "integer",
+                        "description": "Last line to return (inclusive)",
+                    },
+                    "start_byte": {
+                        "type": "integer",
+                        "description": "First byte offset to return",
+                    },
+                    "end_byte": {
+                        "type": "integer",
+                        "description": "Byte offset to stop at (exclusive)",
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Regular expression; return the lines around each match",
+                    },
+                    "context_lines": {
+                        "type": "integer",
+                        "description": "Lines shown before and after each pattern match (default 10)",
+                    }
+                },
+                "required": ["file_path"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_multiple_files",
+            "description": "Read the content of multiple files from the filesystem",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_paths": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Array of file paths to read (relative or absolute)",
+                    },
+                    "outline": {
+                        "type": "boolean",
+                        "description": "Return only the top-level definitions of each file with their line numbers",
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Regular expression; return the lines around each match in each file",
+                    },
+                    "context_lines": {
+                        "type": "integer",
+                        "description": "Lines shown before and after each pattern match (default 10)",
+                    }
+                },
+                "required": ["file_paths"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "create_file",
+            "description": "Create a new file or overwrite an existing file with the provided content",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "The path where the file should be created",
+                    },
+                    "content": {
+                        "type": "string",
+                        "description": "The content to write to the file",
+                    }
+                },
+                "required": ["file_path", "content"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "create_multiple_files",
+            "description": "Create multiple files at once",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "files": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "path": {"type": "string"},
+                                "content": {"type": "string"}
+                            },
+                            "required": ["path", "content"]
+                        },
+                        "description": "Array of files to create with their paths and content",
+                    }
+                },
+                "required": ["files"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "edit_file",
+            "description": "Edit an existing file by replacing a specific snippet with new content",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "The path to the file to edit",
+                    },
+                    "original_snippet": {
+                        "type": "string",
+                        "description": "The exact text snippet to find and replace",
+                    },
+                    "new_snippet": {
+                        "type": "string",
+                        "description": "The new text to replace the original snippet with",
+                    }
+                },
+                "required": ["file_path", "original_snippet", "new_snippet"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "edit_files",
+            "description": "Apply many snippet replacements across one or more files in a single call. Every edit is validated before anything is written; if any edit fails, no file is changed",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "files": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "path": {"type": "string"},
+                                "edits": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "properties": {
+                                            "original_snippet": {"type": "string"},
+                                            "new_snippet": {"type": "string"}
+                                        },
+                                        "required": ["original_snippet", "new_snippet"]
+                                    },
+                                    "description": "Replacements for this file; each original_snippet must occur exactly once and must not overlap another"
+                                }
+                            },
+                            "required": ["path", "edits"]
+                        },
+                        "description": "Files to edit, each with its list of edits",
+                    }
+                },
+                "required": ["files"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_code",
+            "description": "Search the files of the workspace (same exclusions as /add) through an index and return matching lines as 'path:line: text'. Use it to find definitions and usages before reading files",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Text to search for, or a regular expression when regex is true",
+                    },
+                    "regex": {
+                        "type": "boolean",
+                        "description": "Treat the query as a regular expression (default false)",
+                    },
+                    "case_sensitive": {
+                        "type": "boolean",
+                        "description": "Match case exactly (default true)",
+                    },
+                    "path": {
+                        "type": "string",
+                        "description": "Only search below this directory or in this file",
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of matching lines to return (default and upper limit 50)",
+                    }
+                },
+                "required": ["query"]
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "repo_map",
+            "description": "Get a compact map of the Python modules in the workspace: classes, functions, signatures and docstring first lines with line numbers, most referenced first, cut to a token budget. Use it to orient yourself before reading files",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Only map modules below this directory or this file",
+                    },
+                    "max_tokens": {
+                        "type": "integer",
+                        "description": "Approximate size limit of the map in tokens (default 4000)",
+                    }
+                },
+                "required": []
+            },
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_more",
+            "description": "Read one page of a tool result that was too large to send whole. Oversized results are replaced by a preview naming a handle and the number of pages",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "handle": {
+                        "type": "string",
+                        "description": "Handle from the preview, e.g. 'r3'",
+                    },
+                    "page": {
+                        "type": "integer",
+                        "description": "1-based page number (default 1)",
+                    }
+                },
+                "required": ["handle"]
+            },
+        }
+    }
+]
@@ -0,0 +1,394 @@
+# --------------------------------------------------------------------------------
+# Indexed workspace code search
+# --------------------------------------------------------------------------------
+import os
+import re
+import time
+import json
+import struct
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from .files import CACHE_DIR, atomic_write, current_root, normalize_path, write_listeners
+from .ingest import PathMatcher, iter_directory_files, process_pool
+from .tracing import tracer
+from .ui import console
+
+SEARCH_WORKERS = max(1, int(os.getenv("DEEPSEEK_SEARCH_WORKERS", str(os.cpu_count() or 1))))
+SEARCH_MAX_RESULTS = int(os.getenv("DEEPSEEK_SEARCH_MAX_RESULTS", "50"))
+# A query re-walks the workspace in the background when the last walk is older than this
+SEARCH_REFRESH_SECONDS = float(os.getenv("DEEPSEEK_SEARCH_REFRESH", "5"))
+SEARCH_MAX_CHARS = 8_000  # Result budget in characters, on top of the hit count
+SEARCH_LINE_CHARS = 200
+INLINE_INDEX_FILES = 256  # Fewer changed files than this are indexed without the process pool
+INDEX_CHUNK_FILES = 128
+INDEX_VERSION = 2
+COMPACT_DEAD_RATIO = 0.5  # Posting lists are rewritten once this share of their file ids is stale
+
+_TRIGRAMS = re.compile(rb"(?=(...))", re.DOTALL)
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, "POSSESSIVE_REPEAT", None)}
+_POSTING = struct.Struct("<II")  # (trigram, number of file ids) before each posting list on disk
+
+# (mtime_ns, size, file id); the id is -1 for a binary or unreadable file
+FileEntry = Tuple[int, int, int]
+
+def trigrams(data: bytes) -> Set[int]:
+    """Distinct case-folded byte trigrams of 'data', as 24-bit integers."""
+    return {int.from_bytes(gram, "big") for gram in _TRIGRAMS.findall(data.lower())}
+
+def _index_file(path: str) -> Optional[List[int]]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:1024]:
+        return None
+    return sorted(trigrams(data))
+
+def _index_chunk(paths: List[str]) -> List[Optional[List[int]]]:
+    return [_index_file(path) for path in paths]
+
+def required_literals(pattern: str) -> List[str]:
+    """Literal runs of at least three characters that every match of 'pattern' must contain.
+
+    Walks the parsed regex: literals inside groups and repeats with a minimum of
+    one count, while alternations, classes and optional parts end a run.
+    """
+    literals: List[str] = []
+
+    def walk(items) -> None:
+        run: List[str] = []
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(av))
+                continue
+            if len(run) >= 3:
+                literals.append("".join(run))
+            run = []
+            if op is sre_constants.SUBPATTERN:
+                walk(av[-1])
+            elif op in _REPEATS and av[0] >= 1:
+                walk(av[2])
+        if len(run) >= 3:
+            literals.append("".join(run))
+
+    walk(sre_parse.parse(pattern))
+    return literals
+
+class SearchIndex:
+    """Trigram inverted index of every searchable file below 'root', persisted under CACHE_DIR.
+
+    Each file gets an id, and each case-folded trigram maps to the sorted ids of
+    the files containing it, so a query only opens the files that contain all of
+    its required trigrams. A changed file is indexed under a new id and its old id
+    is marked stale; posting lists are rewritten without stale ids once they make
+    up COMPACT_DEAD_RATIO of all ids. Files are chosen with the same PathMatcher
+    rules as /add and reconciled against mtimes and sizes: only new or changed
+    files are re-indexed (on a process pool for large batches). Files written by
+    the tools are refreshed before the next query; other changes are picked up by
+    a background walk once the last one is older than SEARCH_REFRESH_SECONDS.
+    Candidates are verified against the file, so the index never produces false hits.
+    """
+
+    def __init__(self, root: str, cache_dir: str = CACHE_DIR):
+        self.root = root
+        digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"search-{digest}.idx")
+        self.files: Dict[str, FileEntry] = {}
+        self.paths: List[Optional[str]] = []  # File id -> relative path, None once stale
+        self.postings: Dict[int, array] = {}  # Trigram -> sorted file ids
+        self.stale = 0
+        self.refreshed_at: Optional[float] = None
+        self.last_refresh: Dict[str, float] = {}
+        self._written: Set[str] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        write_listeners.append(self.mark_written)
+
+    # -- persistence --------------------------------------------------------------
+
+    def load(self) -> None:
+        """Read the saved index: a JSON header line, then (trigram, count) and the ids of each posting list."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != INDEX_VERSION or header.get("root") != self.root:
+                    return
+                postings: Dict[int, array] = {}
+                for _ in range(header["postings"]):
+                    gram, count = _POSTING.unpack(f.read(_POSTING.size))
+                    ids = array("I")
+                    ids.frombytes(f.read(count * ids.itemsize))
+                    postings[gram] = ids
+        except (OSError, ValueError, KeyError, struct.error):
+            return
+        with self._lock:
+            self.files = {path: tuple(entry) for path, entry in header["files"].items()}
+            self.paths = header["paths"]
+            self.postings = postings
+            self.stale = sum(path is None for path in self.paths)
+
+    def save(self) -> None:
+        with self._lock:
+            header = json.dumps({"version": INDEX_VERSION, "root": self.root, "files": self.files,
+                                 "paths": self.paths, "postings": len(self.postings)})
+            chunks = [header.encode("utf-8") + b"\n"]
+            for gram, ids in self.postings.items():
+                chunks.append(_POSTING.pack(gram, len(ids)))
+                chunks.append(ids.tobytes())
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            atomic_write(self.cache_path, chunks)
+        except OSError as e:
+            console.print(f"[yellow dim]⚠ Could not save the search index: {e}[/yellow dim]")
+
+    # -- updates (callers hold _lock) ------------------------------------------------
+
+    def _drop(self, relative: str) -> None:
+        entry = self.files.pop(relative, None)
+        if entry is not None and entry[2] >= 0:
+            self.paths[entry[2]] = None
+            self.stale += 1
+
+    def _put(self, relative: str, mtime_ns: int, size: int, grams: Optional[List[int]]) -> None:
+        self._drop(relative)
+        if grams is None:
+            self.files[relative] = (mtime_ns, size, -1)
+            return
+        file_id = len(self.paths)
+        self.paths.append(relative)
+        postings = self.postings
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array("I")
+            ids.append(file_id)
+        self.files[relative] = (mtime_ns, size, file_id)
+
+    def _compact(self) -> None:
+        """Rewrite the posting lists without stale ids once they make up COMPACT_DEAD_RATIO of all ids."""
+        if self.stale < max(1024, len(self.paths) * COMPACT_DEAD_RATIO):
+            return
+        paths = self.paths
+        compacted: Dict[int, array] = {}
+        for gram, ids in self.postings.items():
+            live = array("I", [file_id for file_id in ids if paths[file_id] is not None])
+            if live:
+                compacted[gram] = live
+        self.postings = compacted
+        self.stale = sum(path is None for path in paths)
+
+    # -- refresh ------------------------------------------------------------------
+
+    def mark_written(self, paths: List[str]) -> None:
+        prefix = self.root.rstrip(os.sep) + os.sep
+        with self._lock:
+            self._written.update(path for path in paths if path.startswith(prefix))
+
+    def _index(self, relative_paths: List[str]) -> List[Optional[List[int]]]:
+        paths = [os.path.join(self.root, path) for path in relative_paths]
+        if SEARCH_WORKERS == 1 or len(paths) < INLINE_INDEX_FILES:
+            return _index_chunk(paths)
+        chunks = [paths[i:i + INDEX_CHUNK_FILES] for i in range(0, len(paths), INDEX_CHUNK_FILES)]
+        with process_pool(SEARCH_WORKERS) as executor:
+            return [entry for chunk in executor.map(_index_chunk, chunks) for entry in chunk]
+
+    def refresh(self) -> None:
+        """Walk the workspace and re-index every new or changed file.
+
+        Entries replaced while the walk ran (by _refresh_written() after a tool write)
+        are newer than what the walk saw, so they are kept.
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            skipped: List[str] = []
+            with self._lock:
+                previous = dict(self.files)
+            seen: Set[str] = set()
+            changed: List[Tuple[str, int, int]] = []
+            for path, _, stat_result in iter_directory_files(self.root, PathMatcher(), skipped):
+                relative = os.path.relpath(path, self.root)
+                seen.add(relative)
+                entry = previous.get(relative)
+                if entry is None or entry[:2] != (stat_result.st_mtime_ns, stat_result.st_size):
+                    changed.append((relative, stat_result.st_mtime_ns, stat_result.st_size))
+            walked = time.perf_counter()
+            if len(changed) > INLINE_INDEX_FILES:
+                console.print(f"[dim]🔎 Indexing {len(changed):,} files for code search...[/dim]")
+            indexed = self._index([c[0] for c in changed])
+            with self._lock:
+                for (relative, mtime_ns, size), grams in zip(changed, indexed):
+                    if self.files.get(relative) == previous.get(relative):
+                        self._put(relative, mtime_ns, size, grams)
+                for relative in [path for path in previous if path not in seen]:
+                    if self.files.get(relative) == previous[relative]:
+                        self._drop(relative)
+                self._compact()
+                count = len(self.files)
+            modified = bool(changed) or count != len(previous)
+            if modified:
+                self.save()
+            self.refreshed_at = time.monotonic()
+            self.last_refresh = {
+                "files": count,
+                "reindexed": len(changed),
+                "walk_ms": round((walked - started) * 1000, 1),
+                "index_ms": round((time.perf_counter() - walked) * 1000, 1),
+            }
+
+    def _refresh_written(self) -> None:
+        with self._lock:
+            written, self._written = self._written, set()
+        if not written:
+            return
+        matcher = PathMatcher()
+        updates = []
+        for path in written:
+            relative = os.path.relpath(path, self.root)
+            name = os.path.basename(path)
+            if relative not in self.files and (matcher.excluded_name(name) or matcher.excluded_extension(name)):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                updates.append((relative, None))
+                continue
+            updates.append((relative, (st.st_mtime_ns, st.st_size, _index_file(path))))
+        with self._lock:
+            for relative, update in updates:
+                if update is None:
+                    self._drop(relative)
+                else:
+                    self._put(relative, *update)
+
+    def ensure_fresh(self) -> None:
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+                    self.refresh()
+                    self._loaded = True
+                    return
+        self._refresh_written()
+        stale = self.refreshed_at is None or time.monotonic() - self.refreshed_at > SEARCH_REFRESH_SECONDS
+        if stale and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, name="deepseek-search-refresh", daemon=True).start()
+
+    # -- queries ------------------------------------------------------------------
+
+    def candidates(self, grams: Set[int], prefix: str = "") -> List[str]:
+        """Paths of the files containing every trigram in 'grams' (every indexed file when it is empty)."""
+        with self._lock:
+            paths = self.paths
+            if grams:
+                ids: Optional[Set[int]] = None
+                # Intersect from the shortest posting list, so the working set only shrinks
+                for gram in sorted(grams, key=lambda gram: len(self.postings.get(gram, ()))):
+                    posting = self.postings.get(gram)
+                    if not posting:
+                        return []
+                    ids = set(posting) if ids is None else ids.intersection(posting)
+                    if not ids:
+                        return []
+                found = [paths[file_id] for file_id in ids]
+            else:
+                found = [path for path, entry in self.files.items() if entry[2] >= 0]
+        return sorted(path for path in found if path is not None and path.startswith(prefix))
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = True,
+               path: Optional[str] = None, max_results: int = SEARCH_MAX_RESULTS) -> str:
+        started = time.perf_counter()
+        try:
+            compiled = re.compile(query.encode("utf-8") if regex else re.escape(query.encode("utf-8")),
+                                  re.MULTILINE | (0 if case_sensitive else re.IGNORECASE))
+        except re.error as e:
+            return f"Error: invalid regular expression '{query}': {e}"
+        literals = required_literals(query) if regex else [query]
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal.encode("utf-8"))
+
+        prefix = ""
+        if path:
+            scope = normalize_path(path)
+            if scope != self.root and not scope.startswith(self.root.rstrip(os.sep) + os.sep):
+                return f"Error: '{path}' is outside the workspace '{self.root}'"
+            prefix = "" if scope == self.root else os.path.relpath(scope, self.root)
+            if os.path.isdir(scope):
+                prefix += os.sep
+
+        self.ensure_fresh()
+        hits: List[str] = []
+        chars = 0
+        searched = matched_files = 0
+        truncated = False
+        for relative in self.candidates(grams, prefix):
+            try:
+                with open(os.path.join(self.root, relative), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            searched += 1
+            tracer.count_bytes(read=len(data))
+            line, last, previous_line = 1, 0, 0
+            found = False
+            for match in compiled.finditer(data):
+                start = match.start()
+                line += data.count(b"\n", last, start)
+                last = start
+                if line == previous_line:
+                    continue
+                previous_line = line
+                line_start = data.rfind(b"\n", 0, start) + 1
+                line_end = data.find(b"\n", start)
+                text = data[line_start:line_end if line_end != -1 else len(data)].decode("utf-8", errors="replace").strip()
+                hit = f"{relative}:{line}: {text[:SEARCH_LINE_CHARS]}"
+                if len(hits) >= max_results or chars + len(hit) > SEARCH_MAX_CHARS:
+                    truncated = True
+                    break
+                hits.append(hit)
+                chars += len(hit) + 1
+                found = True
+            matched_files += found
+            if truncated:
+                break
+
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            indexed = len(self.files)
+        summary = f"{searched} of {indexed} indexed files searched in {elapsed:.0f} ms"
+        if not hits:
+            return f"No matches for '{query}' ({summary})"
+        more = "; more matches were cut off, narrow the query or the path" if truncated else ""
+        header = f"{len(hits)} matches for '{query}' in {matched_files} files ({summary}{more}):"
+        return "\n".join([header] + hits)
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(root: Optional[str] = None) -> SearchIndex:
+    root = normalize_path(root or current_root())
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = SearchIndex(root)
+        return index
+
+def search_code(query: str, regex: bool = False, case_sensitive: bool = True,
+                path: Optional[str] = None, max_results: Optional[int] = None) -> str:
+    """Search the current workspace and return 'path:line: text' hits within the result budget."""
+    if not query:
+        return "Error: empty search query"
+    limit = SEARCH_MAX_RESULTS if max_results is None else max(1, min(int(max_results), SEARCH_MAX_RESULTS))
+    return get_search_index().search(query, regex, case_sensitive, path, limit)
@@ -0,0 +1,369 @@
+# --------------------------------------------------------------------------------
+# Persistent sessions
+# --------------------------------------------------------------------------------
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from .context import SPILL_CHARS, BlobRef, ContextStore, FileDiff, TextRef
+from .files import CACHE_DIR
+
+SESSIONS_ENABLED = os.getenv("DEEPSEEK_SESSIONS", "0").lower() in ("1", "true", "yes", "on")  # Opt-in; --session also enables it
+SESSION_DB = os.getenv("DEEPSEEK_SESSION_DB") or os.path.join(CACHE_DIR, "sessions.sqlite3")
+SESSION_KEEP = int(os.getenv("DEEPSEEK_SESSION_KEEP", "20"))  # Unsaved sessions kept for /resume after a crash
+SESSION_LIST_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    saved INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    session INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    role TEXT,
+    body TEXT NOT NULL,
+    PRIMARY KEY (session, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS session_blobs (
+    session INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (session, digest)
+) WITHOUT ROWID;
+"""
+
+def encode_content(content: Any) -> Any:
+    """JSON form of stored message content; blob-backed parts are written by digest."""
+    if not isinstance(content, list):
+        return content
+    encoded = []
+    for part in content:
+        if isinstance(part, BlobRef):
+            encoded.append({"file": part.path, "digest": part.digest, "length": part.length})
+        elif isinstance(part, TextRef):
+            encoded.append({"text": part.digest, "length": part.length})
+        elif isinstance(part, FileDiff):
+            encoded.append({"diff": part.diff, "path": part.path, "digest": part.digest})
+        else:
+            encoded.append(part)
+    return encoded
+
+def decode_content(content: Any) -> Any:
+    if not isinstance(content, list):
+        return content
+    decoded = []
+    for part in content:
+        if isinstance(part, str):
+            decoded.append(part)
+        elif "file" in part:
+            decoded.append(BlobRef(part["file"], part["digest"], part["length"]))
+        elif "text" in part:
+            decoded.append(TextRef(part["text"], part["length"]))
+        else:
+            decoded.append(FileDiff(part["path"], part["diff"], None, part["digest"]))
+    return decoded
+
+def content_digests(content: Any) -> List[str]:
+    if not isinstance(content, list):
+        return []
+    return [part.digest for part in content
+            if isinstance(part, (BlobRef, TextRef)) or (isinstance(part, FileDiff) and part.digest is not None)]
+
+class SessionLog:
+    """Append-only SQLite log of a ContextStore, which also serves as its blob spill backend.
+
+    Every append is written as an event holding the stored message, with file
+    bodies and large texts kept once in a shared, content-addressed blobs table;
+    removals (eviction, cancelled turns) are written as events listing the
+    removed messages, and a compaction digest as an event naming the messages it
+    replaces. Resuming replays the events into the store, so superseded
+    file copies are dropped again exactly as they were. Blobs of SPILL_CHARS or
+    more are not loaded on resume; the store reads them back when a request is
+    built. The database is opened on first write, so startup does not import sqlite3.
+    """
+
+    def __init__(self, path: str = SESSION_DB):
+        self.path = path
+        self.name: Optional[str] = None
+        self.history: Optional[ContextStore] = None
+        self._conn = None
+        self._lock = threading.RLock()
+        self._session_id: Optional[int] = None
+        self._synced = False  # Whether the messages already in history have been written
+        self._pruned = False
+        self._seqs: Dict[int, int] = {}  # id(msg) -> seq of its append event
+        self._next_seq = 0
+        self._linked: Set[str] = set()  # Digests linked to the current session
+
+    # -- database -----------------------------------------------------------------
+
+    def _db(self):
+        if self._conn is None:
+            import sqlite3
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _ensure_session(self) -> int:
+        if self._session_id is not None:
+            return self._session_id
+        import sqlite3
+
+        conn = self._db()
+        if not self._pruned:
+            self._pruned = True
+            self.prune()
+        now = time.time()
+        base = self.name or time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        for attempt in range(1, 100):
+            name = base if attempt == 1 else f"{base}-{attempt}"
+            try:
+                with conn:
+                    cursor = conn.execute(
+                        "INSERT INTO sessions (name, saved, created, updated) VALUES (?, ?, ?, ?)",
+                        (name, int(self.name is not None), now, now),
+                    )
+                break
+            except sqlite3.IntegrityError:
+                if self.name is not None:
+                    raise
+        self.name = name
+        self._session_id = cursor.lastrowid
+        self._seqs.clear()
+        self._next_seq = 0
+        self._linked.clear()
+        return self._session_id
+
+    def _link(self, conn, digest: str) -> None:
+        """Store the blob 'digest' of the attached history and link it to the current session."""
+        if digest in self._linked:
+            return
+        if conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None:
+            text = self.history.blobs.get(digest)
+            conn.execute("INSERT INTO blobs (digest, length, text) VALUES (?, ?, ?)", (digest, len(text), text))
+        conn.execute("INSERT OR IGNORE INTO session_blobs (session, digest) VALUES (?, ?)", (self._session_id, digest))
+        self._linked.add(digest)
+
+    def _write(self, conn, kind: str, role: Optional[str], body: Any) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        conn.execute(
+            "INSERT INTO events (session, seq, kind, role, body) VALUES (?, ?, ?, ?, ?)",
+            (self._session_id, seq, kind, role, json.dumps(body, ensure_ascii=False)),
+        )
+        return seq
+
+    def _append_events(self, messages: List[Dict[str, Any]]) -> None:
+        conn = self._db()
+        with conn:
+            for msg in messages:
+                for digest in content_digests(msg.get("content")):
+                    self._link(conn, digest)
+                stored = dict(msg, content=encode_content(msg.get("content")))
+                self._seqs[id(msg)] = self._write(conn, "append", msg.get("role"), stored)
+            conn.execute("UPDATE sessions SET updated = ? WHERE id = ?", (time.time(), self._session_id))
+
+    @property
+    def recording(self) -> bool:
+        return self.history is not None
+
+    # -- ContextStore hooks -------------------------------------------------------
+
+    def attach(self, history: ContextStore, name: Optional[str] = None) -> bool:
+        """Record 'history' from now on, as session 'name' when given.
+
+        If a session called 'name' exists it is resumed; returns whether it was.
+        """
+        with self._lock:
+            self.history = history
+            self.name = name
+            history.blobs.spill = self
+            history.log = self
+            if name is not None and self.find(name) is not None:
+                self.resume(name)
+                return True
+            return False
+
+    def appended(self, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            self._ensure_session()
+            if self._synced:
+                self._append_events([msg])
+            else:
+                self._synced = True
+                self._append_events(list(self.history))
+
+    def removed(self, messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if not self._synced:
+                return
+            seqs = [self._seqs.pop(id(msg)) for msg in messages if id(msg) in self._seqs]
+            if not seqs:
+                return
+            conn = self._db()
+            with conn:
+                self._write(conn, "delete", None, seqs)
+
+    def replaced(self, messages: List[Dict[str, Any]], msg: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self._synced:
+                return
+            seqs = [self._seqs.pop(id(candidate)) for candidate in messages if id(candidate) in self._seqs]
+            conn = self._db()
+            with conn:
+                for digest in content_digests(msg.get("content")):
+                    self._link(conn, digest)
+                stored = dict(msg, content=encode_content(msg.get("content")))
+                self._seqs[id(msg)] = self._write(conn, "replace", msg.get("role"), {"delete": seqs, "message": stored})
+
+    # -- spill backend ------------------------------------------------------------
+
+    def put_blob(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._ensure_session()
+            conn = self._db()
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO blobs (digest, length, text) VALUES (?, ?, ?)",
+                             (digest, len(text), text))
+                conn.execute("INSERT OR IGNORE INTO session_blobs (session, digest) VALUES (?, ?)",
+                             (self._session_id, digest))
+            self._linked.add(digest)
+
+    def get_blob(self, digest: str) -> str:
+        with self._lock:
+            row = self._db().execute("SELECT text FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(f"Blob {digest} is missing from the session log {self.path}")
+        return row[0]
+
+    # -- sessions -----------------------------------------------------------------
+
+    def find(self, name: str) -> Optional[int]:
+        row = self._db().execute("SELECT id FROM sessions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, name: Optional[str] = None) -> str:
+        """Keep the current session (renamed to 'name' when given) out of pruning; returns its name."""
+        import sqlite3
+
+        with self._lock:
+            if not self._synced:
+                self._ensure_session()
+                self._synced = True
+                self._append_events(list(self.history))
+            conn = self._db()
+            try:
+                with conn:
+                    conn.execute("UPDATE sessions SET saved = 1, name = ? WHERE id = ?",
+                                 (name or self.name, self._session_id))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"A session named '{name}' already exists")
+            self.name = name or self.name
+            return self.name
+
+    def resume(self, name: str) -> int:
+        """Replace the attached history with session 'name' and continue recording into it.
+
+        Returns the number of messages restored.
+        """
+        with self._lock:
+            conn = self._db()
+            session_id = self.find(name)
+            if session_id is None:
+                raise ValueError(f"No session named '{name}'")
+            history = self.history
+            blobs = conn.execute(
+                "SELECT b.digest, b.length, CASE WHEN b.length < ? THEN b.text END "
+                "FROM session_blobs s JOIN blobs b ON b.digest = s.digest WHERE s.session = ?",
+                (SPILL_CHARS, session_id),
+            ).fetchall()
+            events = conn.execute(
+                "SELECT seq, kind, body FROM events WHERE session = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+
+            history.log = None
+            try:
+                history.reset()
+                for digest, length, text in blobs:
+                    history.blobs.adopt(digest, text, length)
+                by_seq: Dict[int, Dict[str, Any]] = {}
+                for seq, kind, body in events:
+                    if kind == "append":
+                        msg = json.loads(body)
+                        msg["content"] = decode_content(msg.get("content"))
+                        history.append(msg)
+                        by_seq[seq] = msg
+                        continue
+                    if kind == "replace":
+                        body = json.loads(body)
+                        msg = body["message"]
+                        msg["content"] = decode_content(msg.get("content"))
+                        replaced = [by_seq.pop(removed, None) for removed in body["delete"]]
+                        replaced = [old for old in replaced if old is not None and any(candidate is old for candidate in history)]
+                        if replaced:
+                            history.replace(replaced, msg)
+                        else:
+                            history.append(msg)
+                        by_seq[seq] = msg
+                        continue
+                    for removed in json.loads(body):
+                        msg = by_seq.pop(removed, None)
+                        if msg is not None and any(candidate is msg for candidate in history):
+                            history.remove(msg)
+                history.blobs.prune()
+            finally:
+                history.log = self
+
+            live = {id(msg) for msg in history}
+            self._session_id = session_id
+            self.name = name
+            self._synced = True
+            self._seqs = {id(msg): seq for seq, msg in by_seq.items() if id(msg) in live}
+            self._next_seq = events[-1][0] + 1 if events else 0
+            self._linked = {digest for digest, _, _ in blobs}
+            return len(history)
+
+    def list_sessions(self, limit: int = SESSION_LIST_LIMIT) -> List[Dict[str, Any]]:
+        """Most recently updated sessions, newest first."""
+        rows = self._db().execute(
+            "SELECT s.name, s.saved, s.updated, "
+            "(SELECT COUNT(*) FROM events e WHERE e.session = s.id AND e.role = 'user') "
+            "FROM sessions s ORDER BY s.updated DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {"name": name, "saved": bool(saved), "updated": updated, "prompts": prompts, "current": name == self.name}
+            for name, saved, updated, prompts in rows
+        ]
+
+    def prune(self, keep: int = SESSION_KEEP) -> None:
+        """Delete all but the 'keep' most recent unsaved sessions, then blobs no session uses."""
+        conn = self._db()
+        with conn:
+            stale = [row[0] for row in conn.execute(
+                "SELECT id FROM sessions WHERE saved = 0 ORDER BY updated DESC LIMIT -1 OFFSET ?", (keep,)
+            )]
+            if not stale:
+                return
+            marks = ",".join("?" * len(stale))
+            for table, column in (("events", "session"), ("session_blobs", "session"), ("sessions", "id")):
+                conn.execute(f"DELETE FROM {table} WHERE {column} IN ({marks})", stale)
+            conn.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM session_blobs)")
+
+session_log = SessionLog()
@@ -0,0 +1,128 @@
+# --------------------------------------------------------------------------------
+# Startup profiling
+# --------------------------------------------------------------------------------
+import sys
+import time
+import builtins
+import importlib.util
+from contextlib import contextmanager
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Heavy modules that must not be imported before the prompt is ready; they load on
+# the first API call, the first table render or the background connection warm-up
+DEFERRED_MODULES = ("openai", "httpx", "pydantic", "rich.table", "sqlite3")
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+class ImportProfiler:
+    """Times first-time imports while active, like ``python -X importtime``.
+
+    Wraps builtins.__import__, so every import statement executed inside the
+    block is seen; imports of modules that are already loaded are passed through
+    untimed. Each record holds self time (excluding nested imports) and
+    cumulative time. Named phases can be timed with phase().
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.records: List[ImportRecord] = []
+        self.phases: Dict[str, float] = {}
+        self.total_seconds = 0.0
+        self.deferred_loaded: List[str] = []
+        self._nested: List[float] = []  # Time spent in nested imports, per open import
+        self._original_import = None
+        self._started = 0.0
+
+    def __enter__(self) -> "ImportProfiler":
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        self._started = self.clock()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.total_seconds = self.clock() - self._started
+        builtins.__import__ = self._original_import
+        self.deferred_loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    @contextmanager
+    def phase(self, name: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + self.clock() - start
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = self._first_import(name, globals, fromlist, level)
+        if module is None:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._nested.append(0.0)
+        start = self.clock()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = self.clock() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.records.append(ImportRecord(module, elapsed - nested, elapsed, len(self._nested)))
+
+    @staticmethod
+    def _first_import(name: str, globals, fromlist, level: int) -> Optional[str]:
+        """Return the module an import statement is about to load, or None if it is loaded already."""
+        try:
+            if level:
+                package = (globals or {}).get("__package__") or ""
+                name = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return None
+        module = sys.modules.get(name)
+        if module is None:
+            return name
+        for item in fromlist or ():
+            if item != "*" and not hasattr(module, item) and f"{name}.{item}" not in sys.modules:
+                return f"{name}.{item}"
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": self.total_seconds * 1000,
+            "import_ms": sum(r.cumulative_seconds for r in self.records if r.depth == 0) * 1000,
+            "phases_ms": {name: seconds * 1000 for name, seconds in self.phases.items()},
+            "imports": [
+                {"module": r.module, "self_ms": r.self_seconds * 1000,
+                 "cumulative_ms": r.cumulative_seconds * 1000, "depth": r.depth}
+                for r in self.records
+            ],
+            "deferred_loaded": self.deferred_loaded,
+        }
+
+def print_startup_report(profiler: ImportProfiler, limit: int = 20) -> None:
+    """Print the slowest imports and the startup phases as Rich tables."""
+    from rich.table import Table
+    from .ui import console
+
+    report = profiler.to_dict()
+    imports = Table(title=f"⏱ Slowest imports (top {limit} by cumulative time)", show_header=True,
+                    header_style="bold bright_blue", border_style="blue")
+    imports.add_column("Self ms", justify="right")
+    imports.add_column("Cumulative ms", justify="right")
+    imports.add_column("Module", style="bright_cyan")
+    for record in sorted(profiler.records, key=lambda r: r.cumulative_seconds, reverse=True)[:limit]:
+        imports.add_row(f"{record.self_seconds * 1000:.1f}", f"{record.cumulative_seconds * 1000:.1f}",
+                        "  " * record.depth + record.module)
+    console.print(imports)
+
+    phases = Table(title="🚀 Startup phases", show_header=True, header_style="bold bright_blue", border_style="blue")
+    phases.add_column("Phase", style="bright_cyan")
+    phases.add_column("ms", justify="right")
+    for name, ms in report["phases_ms"].items():
+        phases.add_row(name, f"{ms:.1f}")
+    phases.add_row("[bold]Total[/bold]", f"[bold]{report['total_ms']:.1f}[/bold]")
+    console.print(phases)
+    if profiler.deferred_loaded:
+        console.print(f"[yellow]⚠ Imported before the prompt was ready: {', '.join(profiler.deferred_loaded)}[/yellow]")
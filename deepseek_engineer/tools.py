@@ -0,0 +1,154 @@
+# --------------------------------------------------------------------------------
+# Tool call execution
+# --------------------------------------------------------------------------------
+import json
+from typing import Any, Dict, List, Tuple, Union
+
+from .context import ContentParts, context_manager, conversation_history, file_content_parts, join_content_parts
+from .edits import EditHunk, apply_diff_edit, apply_edit_batch, show_edit_failure
+from .files import create_file, normalize_path, read_local_file
+from .reads import read_file_view
+from .repomap import build_repo_map
+from .results import read_more
+from .search import search_code
+from .tracing import tracer
+from .ui import console
+
+def edit_result_note(path: str, content: str) -> Union[str, ContentParts]:
+    """Tool-result note for an edited file: the change against the version in context, or the whole file.
+
+    Files the model has not seen are sent inside the tool result rather than added as
+    a system message, which would land between the tool_calls message and its results.
+    """
+    if not conversation_history.has_file(path):
+        context_manager.touch_file(path)
+        return ["\n\n"] + file_content_parts(path, content)
+    return conversation_history.file_change_note(path, content)
+
+def edit_multiple_files(files: List[Dict[str, Any]]) -> Union[str, ContentParts]:
+    """Run the edit_files tool: validate every hunk, write all files or none, report per hunk."""
+    batch: Dict[str, Tuple[str, List[EditHunk]]] = {}  # normalized path -> (path as given, hunks)
+    for entry in files:
+        _, hunks = batch.setdefault(normalize_path(entry["path"]), (entry["path"], []))
+        hunks.extend(EditHunk(hunk["original_snippet"], hunk["new_snippet"]) for hunk in entry["edits"])
+    edits, failures = apply_edit_batch([(path, hunks) for path, (_, hunks) in batch.items()])
+    total = sum(len(hunks) for _, hunks in batch.values())
+
+    if failures:
+        failed = {(failure.path, failure.hunk): failure for failure in failures}
+        lines = [f"No files were changed ({len(failures)} of {total} hunks failed; fix them and resend the whole batch):"]
+        for path, (display, hunks) in batch.items():
+            if (path, None) in failed:
+                show_edit_failure(failed[(path, None)])
+                lines.append(f"{display}: {failed[(path, None)]}")
+                continue
+            for index, hunk in enumerate(hunks):
+                failure = failed.get((path, index))
+                if failure is None:
+                    lines.append(f"{display} hunk {index + 1}: ok")
+                    continue
+                show_edit_failure(failure, hunk.original_snippet)
+                lines.append(f"{display} hunk {index + 1}: {failure}")
+                if failure.window is not None:
+                    lines.append(f"Closest match from line {failure.line}:\n{failure.window}")
+        return "\n".join(lines)
+
+    lines = [f"Applied {total} hunks to {len(edits)} files:"]
+    notes = []
+    for edit, (path, (display, hunks)) in zip(edits, batch.items()):
+        match_lines = edit.match_lines()
+        lines.extend(f"{display} hunk {index + 1}: ok (line {match_lines[index]})" for index in range(len(hunks)))
+        notes.append(conversation_history.file_change_note(path, read_local_file(path)))
+        console.print(f"[bold blue]✓[/bold blue] Applied {len(hunks)} edit{'s' if len(hunks) != 1 else ''} to '[bright_cyan]{display}[/bright_cyan]'")
+    return join_content_parts("", ["\n".join(lines)] + notes)
+
+def execute_function_call_dict(tool_call_dict) -> Union[str, ContentParts]:
+    """Execute a function call from a dictionary format and return the result as message content.
+
+    File reads return content parts so the file bodies are stored once by the ContextStore.
+    Each call is traced with its wall time and the bytes it read and wrote.
+    """
+    with tracer.span("tool", tool=tool_call_dict["function"]["name"]):
+        return _execute_function_call_dict(tool_call_dict)
+
+def _execute_function_call_dict(tool_call_dict) -> Union[str, ContentParts]:
+    try:
+        function_name = tool_call_dict["function"]["name"]
+        arguments = json.loads(tool_call_dict["function"]["arguments"])
+        
+        if function_name == "read_file":
+            file_path = arguments["file_path"]
+            normalized_path = normalize_path(file_path)
+            view = read_file_view(normalized_path, arguments)
+            if view is not None:
+                return view
+            content = read_local_file(normalized_path)
+            context_manager.touch_file(normalized_path)
+            return file_content_parts(normalized_path, content)
+            
+        elif function_name == "read_multiple_files":
+            file_paths = arguments["file_paths"]
+            results = []
+            for file_path in file_paths:
+                try:
+                    normalized_path = normalize_path(file_path)
+                    view = read_file_view(normalized_path, arguments)
+                    if view is not None:
+                        results.append(view)
+                        continue
+                    content = read_local_file(normalized_path)
+                    context_manager.touch_file(normalized_path)
+                    results.append(file_content_parts(normalized_path, content))
+                except OSError as e:
+                    results.append(f"Error reading '{file_path}': {e}")
+            return join_content_parts("", ["\n\n" + "="*50, join_content_parts("\n\n", results)])
+            
+        elif function_name == "create_file":
+            file_path = arguments["file_path"]
+            content = arguments["content"]
+            create_file(file_path, content)
+            return join_content_parts("", [
+                f"Successfully created file '{file_path}'",
+                conversation_history.file_change_note(normalize_path(file_path), content),
+            ])
+            
+        elif function_name == "create_multiple_files":
+            files = arguments["files"]
+            created_files = []
+            notes = []
+            for file_info in files:
+                create_file(file_info["path"], file_info["content"])
+                created_files.append(file_info["path"])
+                notes.append(conversation_history.file_change_note(normalize_path(file_info["path"]), file_info["content"]))
+            return join_content_parts("", [f"Successfully created {len(created_files)} files: {', '.join(created_files)}"] + notes)
+            
+        elif function_name == "edit_file":
+            file_path = arguments["file_path"]
+            original_snippet = arguments["original_snippet"]
+            new_snippet = arguments["new_snippet"]
+            
+            normalized_path = normalize_path(file_path)
+            apply_diff_edit(normalized_path, original_snippet, new_snippet)
+            return join_content_parts("", [
+                f"Successfully edited file '{file_path}'",
+                edit_result_note(normalized_path, read_local_file(normalized_path)),
+            ])
+            
+        elif function_name == "edit_files":
+            return edit_multiple_files(arguments["files"])
+            
+        elif function_name == "search_code":
+            return search_code(arguments["query"], arguments.get("regex", False), arguments.get("case_sensitive", True),
+                               arguments.get("path"), arguments.get("max_results"))
+            
+        elif function_name == "repo_map":
+            return build_repo_map(arguments.get("path"), arguments.get("max_tokens"))
+            
+        elif function_name == "read_more":
+            return read_more(arguments["handle"], int(arguments.get("page", 1)))
+            
+        else:
+            return f"Unknown function: {function_name}"
+            
+    except Exception as e:
+        return f"Error executing {function_name}: {str(e)}"
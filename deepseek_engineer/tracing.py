@@ -0,0 +1,250 @@
+# --------------------------------------------------------------------------------
+# Per-turn tracing
+# --------------------------------------------------------------------------------
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from .ui import console
+
+# Opt-in JSONL trace: one line per turn and per /add, for loading into dashboards
+TRACE_FILE = os.getenv("DEEPSEEK_TRACE_FILE") or None
+# Record tracemalloc current/peak memory and the top allocation sites after every turn
+TRACE_MALLOC = os.getenv("DEEPSEEK_TRACE_MALLOC", "0").lower() in ("1", "true", "yes", "on")
+TRACE_MALLOC_TOP = 5
+TRACE_HISTORY = 50  # Turns kept in memory for /stats
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+class Span:
+    """A timed operation; file I/O done on the same thread while it is open is added to it."""
+
+    def __init__(self, name: str, attrs: Dict[str, Any], clock):
+        self.name = name
+        self.attrs = attrs
+        self.clock = clock
+        self.started_at = time.time()
+        self.start = clock()
+        self.duration: Optional[float] = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": _ms(self.start - origin),
+            "wall_ms": _ms(self.duration),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            **self.attrs,
+        }
+
+class StreamTrace:
+    """Timings of one streamed API response, measured from the moment the request is sent."""
+
+    def __init__(self, phase: str, clock, model: Optional[str] = None):
+        self.phase = phase
+        self.model = model
+        self.clock = clock
+        self.sent = clock()
+        self.opened_at: Optional[float] = None
+        self.first: Dict[str, float] = {}  # delta kind -> time of its first delta
+        self.deltas = 0
+        self.completion_tokens: Optional[int] = None
+        self.finished_at: Optional[float] = None
+
+    def opened(self) -> None:
+        self.opened_at = self.clock()
+
+    def delta(self, kind: str) -> None:
+        self.deltas += 1
+        if kind not in self.first:
+            self.first[kind] = self.clock()
+
+    def usage(self, usage) -> None:
+        self.completion_tokens = getattr(usage, "completion_tokens", None)
+
+    def finish(self) -> None:
+        if self.finished_at is None:
+            self.finished_at = self.clock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or self.clock()
+        first_token = min(self.first.values(), default=None)
+        tokens = self.completion_tokens or self.deltas
+        generating = end - first_token if first_token is not None else 0.0
+        return {
+            "phase": self.phase,
+            "model": self.model,
+            "request_ms": _ms(self.opened_at - self.sent if self.opened_at else None),
+            "first_reasoning_ms": _ms(self.first["reasoning"] - self.sent if "reasoning" in self.first else None),
+            "first_content_ms": _ms(self.first["content"] - self.sent if "content" in self.first else None),
+            "stream_ms": _ms(end - self.sent),
+            "deltas": self.deltas,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(tokens / generating, 1) if generating > 0 else None,
+        }
+
+class TurnTrace:
+    def __init__(self, number: int, clock):
+        self.number = number
+        self.clock = clock
+        self.started_at = time.time()
+        self.origin = clock()
+        self.streams: List[StreamTrace] = []
+        self.spans: List[Span] = []
+        self.attrs: Dict[str, Any] = {}  # Extra fields for the turn record (see Tracer.annotate)
+
+class Tracer:
+    """Collects spans for the current turn and keeps recent turns for /stats.
+
+    Turns are started and ended by stream_openai_response; spans opened while a
+    turn is active (tool calls, edits) are attached to it, and spans outside a turn
+    (such as /add) become standalone events. Finished records are optionally
+    appended to a JSONL trace file.
+    """
+
+    def __init__(self, trace_file: Optional[str] = TRACE_FILE, trace_malloc: bool = TRACE_MALLOC,
+                 clock=time.perf_counter):
+        self.trace_file = trace_file
+        self.trace_malloc = trace_malloc
+        self.clock = clock
+        self.turns: Deque[Dict[str, Any]] = deque(maxlen=TRACE_HISTORY)
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=TRACE_HISTORY)
+        # The open turn and the last finished one belong to the task (batch mode runs several)
+        self._current: ContextVar[Optional[TurnTrace]] = ContextVar("current_turn", default=None)
+        self._last_turn: ContextVar[Optional[Dict[str, Any]]] = ContextVar("last_turn", default=None)
+        self.turn_count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._write_failed = False
+
+    @property
+    def current(self) -> Optional[TurnTrace]:
+        return self._current.get()
+
+    @current.setter
+    def current(self, turn: Optional[TurnTrace]) -> None:
+        self._current.set(turn)
+
+    @property
+    def last_turn(self) -> Optional[Dict[str, Any]]:
+        """Record of the last turn finished in the current context."""
+        return self._last_turn.get()
+
+    # -- spans --------------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        span = Span(name, attrs, self.clock)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        turn = self.current
+        try:
+            yield span
+        finally:
+            span.duration = self.clock() - span.start
+            stack.pop()
+            if turn is not None:
+                with self._lock:
+                    turn.spans.append(span)
+            else:
+                self.record_event({"started_at": span.started_at, **span.to_dict(span.start)})
+
+    def count_bytes(self, read: int = 0, written: int = 0) -> None:
+        """Attribute file I/O to every span open on the calling thread."""
+        for span in getattr(self._local, "stack", ()):
+            span.bytes_read += read
+            span.bytes_written += written
+
+    # -- turns --------------------------------------------------------------------
+
+    def start_turn(self) -> TurnTrace:
+        if self.trace_malloc:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self.turn_count += 1
+        self.current = TurnTrace(self.turn_count, self.clock)
+        return self.current
+
+    def stream(self, phase: str, model: Optional[str] = None) -> StreamTrace:
+        """Mark an API request as sent and return the trace for its response stream."""
+        stream = StreamTrace(phase, self.clock, model)
+        if self.current is not None:
+            self.current.streams.append(stream)
+        return stream
+
+    def annotate(self, **attrs) -> None:
+        """Add fields to the record of the current turn."""
+        if self.current is not None:
+            self.current.attrs.update(attrs)
+
+    def end_turn(self, status: str, history_stats: Dict[str, int], cache_usage: Dict[str, int]) -> Dict[str, Any]:
+        turn = self.current
+        self.current = None
+        if turn is None:
+            return {}
+        for stream in turn.streams:
+            stream.finish()
+        with self._lock:
+            spans = list(turn.spans)
+        record = {
+            "type": "turn",
+            "turn": turn.number,
+            "started_at": turn.started_at,
+            "status": status,
+            "wall_ms": _ms(self.clock() - turn.origin),
+            "streams": [stream.to_dict() for stream in turn.streams],
+            "tools": [span.to_dict(turn.origin) for span in spans if span.name == "tool"],
+            "spans": [span.to_dict(turn.origin) for span in spans if span.name != "tool"],
+            "history": history_stats,
+            "prompt_cache": dict(cache_usage),
+            **turn.attrs,
+        }
+        if self.trace_malloc:
+            record["tracemalloc"] = self._malloc_snapshot()
+        self.turns.append(record)
+        self._last_turn.set(record)
+        self._write(record)
+        return record
+
+    def record_event(self, record: Dict[str, Any]) -> None:
+        record = {"type": record.get("name", "event"), "started_at": time.time(), **record}
+        self.events.append(record)
+        self._write(record)
+
+    def _malloc_snapshot(self) -> Dict[str, Any]:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:TRACE_MALLOC_TOP]
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [{"location": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count} for stat in top],
+        }
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if not self.trace_file:
+            return
+        line = json.dumps(record, default=str) + "\n"
+        try:
+            with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            if not self._write_failed:
+                self._write_failed = True
+                console.print(f"[yellow dim]⚠ Could not write trace file '{self.trace_file}': {e}[/yellow dim]")
+
+tracer = Tracer()
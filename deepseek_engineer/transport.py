@@ -0,0 +1,194 @@
+# --------------------------------------------------------------------------------
+# HTTP transport: connection pool, warm-up, retries and rate limiting
+# --------------------------------------------------------------------------------
+import os
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from typing import TYPE_CHECKING
+
+from .replay import replay_cache
+from .ui import console
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+POOL_MAX_CONNECTIONS = int(os.getenv("DEEPSEEK_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("DEEPSEEK_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("DEEPSEEK_POOL_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("DEEPSEEK_HTTP2", "0").lower() in ("1", "true", "yes", "on")
+PRECONNECT_ENABLED = os.getenv("DEEPSEEK_PRECONNECT", "1").lower() not in ("0", "false", "no", "off")
+MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = float(os.getenv("DEEPSEEK_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("DEEPSEEK_RETRY_MAX_DELAY", "20"))
+RATE_LIMIT_RPS = float(os.getenv("DEEPSEEK_RATE_LIMIT_RPS", "0"))  # 0 disables the client-side limiter
+RATE_LIMIT_BURST = int(os.getenv("DEEPSEEK_RATE_LIMIT_BURST", "5"))
+
+def retryable_errors() -> tuple:
+    import httpx
+    import openai
+
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError, httpx.TransportError)
+
+def build_http_client(http2: bool = HTTP2_ENABLED) -> "httpx.AsyncClient":
+    """Create the pooled keep-alive transport shared by every API request."""
+    import httpx
+
+    if http2 and importlib.util.find_spec("h2") is None:
+        console.print("[yellow dim]⚠ DEEPSEEK_HTTP2 needs the 'h2' package (pip install httpx[http2]); using HTTP/1.1[/yellow dim]")
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(600.0, connect=10.0),
+        follow_redirects=True,
+    )
+
+class TokenBucket:
+    """Client-side rate limiter shared by concurrent requests (rate tokens per second, up to capacity)."""
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.tokens = float(self.capacity)
+        self.updated = clock()
+        self._lock = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # Waiters are served in arrival order
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def retry_delay(attempt: int, error: Exception = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-provided Retry-After."""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, min(RETRY_MAX_DELAY, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date values are rare for this API; fall back to backoff
+    return delay
+
+class PrefetchedStream:
+    """A chat completion stream whose first chunk has already been received."""
+
+    def __init__(self, stream, first_chunk):
+        self.stream = stream
+        self.first_chunk = first_chunk
+
+    async def __aiter__(self):
+        if self.first_chunk is not None:
+            yield self.first_chunk
+        async for chunk in self.stream:
+            yield chunk
+
+    async def close(self) -> None:
+        await self.stream.close()
+
+rate_limiter = TokenBucket(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+http_client = None
+client = None
+client_lock = threading.Lock()  # get_client() runs on the event loop and on preconnect's worker thread
+last_request_at = 0.0
+
+def get_client() -> "AsyncOpenAI":
+    """Return the API client, importing openai and opening the connection pool on first use.
+
+    Importing openai takes longer than the rest of startup combined, so it is deferred
+    until the first request or the background warm-up, whichever comes first.
+    """
+    global client, http_client
+    if client is not None:
+        return client
+    with client_lock:
+        if client is None:
+            from openai import AsyncOpenAI
+
+            http_client = build_http_client()
+            client = AsyncOpenAI(
+                api_key=os.getenv("DEEPSEEK_API_KEY"),
+                base_url=DEEPSEEK_BASE_URL,
+                http_client=http_client,
+                max_retries=0,  # Retries are handled by create_chat_stream
+            )  # Configure for DeepSeek API
+    return client
+
+async def close_client() -> None:
+    if http_client is not None:
+        await http_client.aclose()
+
+async def create_chat_stream(**kwargs):
+    """Open a streaming chat completion, through the record/replay cache when DEEPSEEK_REPLAY is set."""
+    if replay_cache.enabled:
+        return await replay_cache.open(kwargs, lambda: open_chat_stream(**kwargs))
+    return await open_chat_stream(**kwargs)
+
+async def open_chat_stream(**kwargs):
+    """Open a streaming chat completion with rate limiting and jittered retries.
+
+    Failures are retried until the first chunk arrives, which covers 429s, 5xx
+    responses and connections dropped before any output. Once output has been
+    rendered, a dropped stream is reported to the caller instead of replayed.
+    """
+    global last_request_at
+    api = get_client()
+    retryable = retryable_errors()
+    for attempt in range(MAX_RETRIES + 1):
+        await rate_limiter.acquire()
+        last_request_at = time.monotonic()
+        stream = None
+        try:
+            stream = await api.chat.completions.create(**kwargs)
+            first_chunk = None
+            async for chunk in stream:
+                first_chunk = chunk
+                break
+            return PrefetchedStream(stream, first_chunk)
+        except retryable as e:
+            if stream is not None:
+                await stream.close()
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = retry_delay(attempt, e)
+            console.print(f"[yellow dim]⚠ {type(e).__name__}: retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})[/yellow dim]")
+            await asyncio.sleep(delay)
+        except BaseException:
+            if stream is not None:
+                await stream.close()
+            raise
+
+async def preconnect() -> None:
+    """Open (or refresh) a pooled connection to the API while the user is typing.
+
+    Skipped when a request went out recently enough that its keep-alive connection
+    is still pooled. Errors are ignored; the real request will report them.
+    """
+    if not PRECONNECT_ENABLED or replay_cache.offline or time.monotonic() - last_request_at < POOL_KEEPALIVE_EXPIRY / 2:
+        return
+    try:
+        # The first warm-up also imports the client on a worker thread, off the prompt's event loop
+        api = client or await asyncio.to_thread(get_client)
+        await http_client.head(str(api.base_url), timeout=10.0)
+    except Exception:
+        pass
@@ -0,0 +1,335 @@
+# --------------------------------------------------------------------------------
+# Streaming turns
+# --------------------------------------------------------------------------------
+import time
+import signal
+import asyncio
+import concurrent.futures
+from typing import Any, Dict, List, Optional
+
+from .context import context_manager, conversation_history, history_stats
+from .render import StreamRenderer
+from .results import ResultBudget
+from .routing import router, summarize_routes
+from .scheduler import ToolCallScheduler
+from .schema import tools
+from .tracing import tracer
+from .transport import create_chat_stream
+from .ui import console
+
+def trim_conversation_history():
+    """Trim conversation history to the prompt token budget while preserving tool call sequences"""
+    context_manager.trim(conversation_history)
+
+CANCELLED_TOOL_RESULT = "Cancelled: the user interrupted the turn before this call ran"
+
+async def settle_interrupted_tools(pending, result_budget: ResultBudget) -> None:
+    """Answer every tool call of a cancelled turn, so the history matches what actually ran.
+
+    Calls that have not started are cancelled; calls already running are waited for,
+    since their side effects happen either way, and their results are recorded.
+    """
+    started = [future for _, future in pending if not future.cancel()]
+    try:
+        await asyncio.to_thread(concurrent.futures.wait, started)
+    except asyncio.CancelledError:
+        pass  # Interrupted again: calls still running are reported as unfinished
+    for tool_call, future in pending:
+        if not future.done():
+            content = "Interrupted: the call was still running when the user cancelled the turn; check its effects"
+        elif future.cancelled() or isinstance(future.exception(), concurrent.futures.CancelledError):
+            content = CANCELLED_TOOL_RESULT
+        elif future.exception() is not None:
+            content = f"Error: {str(future.exception())}"
+        else:
+            content = result_budget.fit(tool_call["function"]["name"], future.result())
+        conversation_history.append({"role": "tool", "tool_call_id": tool_call["id"], "content": content})
+
+def record_cache_usage(turn_usage: Dict[str, int], usage) -> None:
+    """Accumulate DeepSeek's prompt cache counters from a streamed usage chunk."""
+    turn_usage["hit"] += getattr(usage, "prompt_cache_hit_tokens", None) or 0
+    turn_usage["miss"] += getattr(usage, "prompt_cache_miss_tokens", None) or 0
+
+def report_cache_usage(turn_usage: Dict[str, int]) -> None:
+    prompt_tokens = turn_usage["hit"] + turn_usage["miss"]
+    if not prompt_tokens:
+        return
+    ratio = turn_usage["hit"] / prompt_tokens
+    console.print(f"[dim]📊 Prompt cache: {turn_usage['hit']:,} hit / {turn_usage['miss']:,} miss tokens ({ratio:.1%} hit)[/dim]")
+
+async def stream_openai_response(user_message: str):
+    """Run one conversation turn: stream the reply, execute tool calls and stream the follow-up.
+
+    Cancelling the task aborts the open HTTP stream and rolls the history back to the
+    last consistent point: before the user message, or after the assistant's tool
+    calls once they are recorded. Tool calls interrupted by the cancellation are still
+    answered: calls already running are waited for and their results kept (their side
+    effects cannot be undone, so the model keeps seeing them), the others are
+    recorded as cancelled.
+    """
+    tracer.start_turn()
+    status = "error"
+    turn_usage = {"hit": 0, "miss": 0}
+    # Add the user message to conversation history
+    conversation_history.append({"role": "user", "content": user_message})
+    
+    # Trim conversation history if it's getting too long
+    trim_conversation_history()
+    checkpoint = len(conversation_history) - 1  # Trimming may have shifted the user message
+
+    # Remove the old file guessing logic since we'll use function calls
+    open_streams = []
+    renderers: List[StreamRenderer] = []
+    routes = []
+    unanswered = []  # (tool call, future) pairs of the recorded tool calls without a result yet
+    result_budget = ResultBudget()
+    try:
+        route = router.initial(user_message)
+        stream_trace = tracer.stream("initial", route.model)
+        stream = await create_chat_stream(
+            model=route.model,
+            messages=conversation_history.to_messages(),
+            tools=tools,
+            max_completion_tokens=route.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        open_streams.append(stream)
+        stream_trace.opened()
+
+        console.print("\n[bold bright_blue]🐋 Seeking...[/bold bright_blue]")
+        renderer = StreamRenderer()
+        renderers.append(renderer)
+        tool_calls = []
+        scheduler = ToolCallScheduler()
+
+        async for chunk in stream:
+            # The final chunk carries usage and no choices
+            if chunk.usage:
+                record_cache_usage(turn_usage, chunk.usage)
+                stream_trace.usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            # Handle reasoning content if available
+            if hasattr(chunk.choices[0].delta, 'reasoning_content') and chunk.choices[0].delta.reasoning_content:
+                stream_trace.delta("reasoning")
+                renderer.add_reasoning(chunk.choices[0].delta.reasoning_content)
+            elif chunk.choices[0].delta.content:
+                stream_trace.delta("content")
+                renderer.add_content(chunk.choices[0].delta.content)
+            elif chunk.choices[0].delta.tool_calls:
+                stream_trace.delta("tool_calls")
+                # Handle tool calls
+                for tool_call_delta in chunk.choices[0].delta.tool_calls:
+                    if tool_call_delta.index is not None:
+                        # Ensure we have enough tool_calls
+                        while len(tool_calls) <= tool_call_delta.index:
+                            tool_calls.append({
+                                "id": "",
+                                "type": "function",
+                                "function": {"name": "", "arguments": ""}
+                            })
+                        
+                        if tool_call_delta.id:
+                            tool_calls[tool_call_delta.index]["id"] = tool_call_delta.id
+                        if tool_call_delta.function:
+                            if tool_call_delta.function.name:
+                                tool_calls[tool_call_delta.index]["function"]["name"] += tool_call_delta.function.name
+                            if tool_call_delta.function.arguments:
+                                tool_calls[tool_call_delta.index]["function"]["arguments"] += tool_call_delta.function.arguments
+
+                # Side-effect-free calls can start while the model keeps streaming
+                scheduler.submit_ready_reads(tool_calls)
+
+        renderer.finish()
+        stream_trace.finish()
+        routes.append(router.observe(route, stream_trace.to_dict()))
+        console.print()  # New line after streaming
+        final_content = renderer.content_text
+
+        # Store the assistant's response in conversation history
+        assistant_message = {
+            "role": "assistant",
+            "content": final_content if final_content else None
+        }
+        
+        if tool_calls:
+            # Convert our tool_calls format to the expected format
+            formatted_tool_calls = []
+            for i, tc in enumerate(tool_calls):
+                if tc["function"]["name"]:  # Only add if we have a function name
+                    # Ensure we have a valid tool call ID
+                    tool_id = tc["id"] if tc["id"] else f"call_{i}_{int(time.time() * 1000)}"
+                    
+                    formatted_tool_calls.append({
+                        "index": i,
+                        "id": tool_id,
+                        "type": "function",
+                        "function": {
+                            "name": tc["function"]["name"],
+                            "arguments": tc["function"]["arguments"]
+                        }
+                    })
+            
+            if formatted_tool_calls:
+                # Important: When there are tool calls, content should be None or empty
+                if not final_content:
+                    assistant_message["content"] = None
+                    
+                stream_indices = [tc.pop("index") for tc in formatted_tool_calls]
+                assistant_message["tool_calls"] = formatted_tool_calls
+                conversation_history.append(assistant_message)
+                checkpoint = len(conversation_history)
+                
+                # Execute the remaining tool calls concurrently, then add results in the original call order
+                console.print(f"\n[bold bright_cyan]⚡ Executing {len(formatted_tool_calls)} function call(s)...[/bold bright_cyan]")
+                pending = []
+                results = []
+                for index, tool_call in zip(stream_indices, formatted_tool_calls):
+                    future = scheduler.futures_by_index.get(index)
+                    if future is None:
+                        future = scheduler.submit(tool_call, index)
+                        console.print(f"[bright_blue]→ {tool_call['function']['name']}[/bright_blue]")
+                    else:
+                        console.print(f"[bright_blue]→ {tool_call['function']['name']}[/bright_blue] [dim](started during stream)[/dim]")
+                    pending.append((tool_call, future))
+                unanswered = list(pending)
+
+                for tool_call, future in pending:
+                    try:
+                        # Tools run on worker threads; awaiting keeps the event loop responsive
+                        result = await asyncio.wrap_future(future)
+                        paged = result_budget.paged
+                        result = result_budget.fit(tool_call["function"]["name"], result)
+                        if result_budget.paged > paged:
+                            console.print(f"[dim]📄 {tool_call['function']['name']} result is too large to send whole; "
+                                          f"sent a preview the model can page with read_more[/dim]")
+                        
+                        results.append(result)
+                        # Add tool result to conversation in call order
+                        tool_response = {
+                            "role": "tool",
+                            "tool_call_id": tool_call["id"],
+                            "content": result
+                        }
+                        conversation_history.append(tool_response)
+                    except Exception as e:
+                        console.print(f"[red]Error executing {tool_call['function']['name']}: {e}[/red]")
+                        results.append(f"Error: {str(e)}")
+                        # Still need to add a tool response even on error
+                        conversation_history.append({
+                            "role": "tool",
+                            "tool_call_id": tool_call["id"],
+                            "content": f"Error: {str(e)}"
+                        })
+                    unanswered.pop(0)
+                    checkpoint = len(conversation_history)
+                
+                # Get follow-up response after tool execution
+                console.print("\n[bold bright_blue]🔄 Processing results...[/bold bright_blue]")
+                trim_conversation_history()
+                checkpoint = len(conversation_history)
+                
+                follow_up_route = router.follow_up(results)
+                follow_up_trace = tracer.stream("follow_up", follow_up_route.model)
+                follow_up_stream = await create_chat_stream(
+                    model=follow_up_route.model,
+                    messages=conversation_history.to_messages(),
+                    tools=tools,
+                    max_completion_tokens=follow_up_route.max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                
+                open_streams.append(follow_up_stream)
+                follow_up_trace.opened()
+                follow_up_renderer = StreamRenderer()
+                renderers.append(follow_up_renderer)
+                dropped_calls: Dict[int, str] = {}  # Tool calls the follow-up asked for, by stream index
+                
+                async for chunk in follow_up_stream:
+                    if chunk.usage:
+                        record_cache_usage(turn_usage, chunk.usage)
+                        follow_up_trace.usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    # Handle reasoning content if available
+                    if hasattr(chunk.choices[0].delta, 'reasoning_content') and chunk.choices[0].delta.reasoning_content:
+                        follow_up_trace.delta("reasoning")
+                        follow_up_renderer.add_reasoning(chunk.choices[0].delta.reasoning_content)
+                    elif chunk.choices[0].delta.content:
+                        follow_up_trace.delta("content")
+                        follow_up_renderer.add_content(chunk.choices[0].delta.content)
+                    for tool_call_delta in chunk.choices[0].delta.tool_calls or ():
+                        name = tool_call_delta.function.name if tool_call_delta.function else None
+                        dropped_calls[tool_call_delta.index] = dropped_calls.get(tool_call_delta.index) or name or "tool"
+                
+                follow_up_renderer.finish()
+                follow_up_trace.finish()
+                routes.append(router.observe(follow_up_route, follow_up_trace.to_dict()))
+                console.print()
+                follow_up_content = follow_up_renderer.content_text
+                if dropped_calls:
+                    # Only one round of tools runs per turn; say so instead of dropping the calls silently
+                    names = ", ".join(dropped_calls[index] for index in sorted(dropped_calls))
+                    console.print(f"[yellow dim]⚠ The follow-up asked for {len(dropped_calls)} more tool call(s) ({names}), "
+                                  f"which were not run; send another message to continue[/yellow dim]")
+                    tracer.annotate(dropped_tool_calls=[dropped_calls[index] for index in sorted(dropped_calls)])
+                    note = f"[Requested more tool calls that were not run: {names}]"
+                    follow_up_content = f"{follow_up_content}\n\n{note}" if follow_up_content else note
+                
+                # Store follow-up response
+                conversation_history.append({
+                    "role": "assistant",
+                    "content": follow_up_content
+                })
+        else:
+            # No tool calls, just store the regular response
+            conversation_history.append(assistant_message)
+
+        report_cache_usage(turn_usage)
+        status = "ok"
+        return {"success": True}
+
+    except asyncio.CancelledError:
+        status = "cancelled"
+        conversation_history.truncate(checkpoint)
+        if unanswered:
+            await settle_interrupted_tools(unanswered, result_budget)
+        raise
+    except Exception as e:
+        error_msg = f"DeepSeek API error: {str(e)}"
+        console.print(f"\n[bold red]❌ {error_msg}[/bold red]")
+        return {"error": error_msg}
+    finally:
+        for renderer in renderers:
+            renderer.finish()
+        # Closing releases the HTTP connection immediately, including mid-stream
+        for open_stream in open_streams:
+            await open_stream.close()
+        if routes:
+            tracer.annotate(routing=summarize_routes(routes))
+        tracer.end_turn(status, history_stats(), turn_usage)
+
+async def run_cancellable_turn(user_message: str) -> Optional[Dict[str, Any]]:
+    """Run a turn as a task that Ctrl-C cancels without ending the session.
+
+    Returns None when the turn was cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    turn = asyncio.create_task(stream_openai_response(user_message))
+    try:
+        loop.add_signal_handler(signal.SIGINT, turn.cancel)
+        handler_installed = True
+    except (NotImplementedError, RuntimeError):
+        handler_installed = False  # e.g. Windows event loops; Ctrl-C then ends the session
+    try:
+        return await turn
+    except asyncio.CancelledError:
+        if not turn.cancelled():
+            raise  # The REPL itself is being cancelled
+        console.print("\n[bold yellow]⏹ Turn cancelled.[/bold yellow] [dim]History rolled back to the last consistent point.[/dim]")
+        return None
+    finally:
+        if handler_installed:
+            loop.remove_signal_handler(signal.SIGINT)
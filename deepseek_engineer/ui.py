@@ -0,0 +1,26 @@
+# --------------------------------------------------------------------------------
+# Shared console and prompt session
+# --------------------------------------------------------------------------------
+from rich.console import Console
+
+# Rich tables and panels, prompt_toolkit and the API client are imported where they
+# are first used, so drawing the banner does not pay for them
+console = Console()
+
+_prompt_session = None
+
+def get_prompt_session():
+    """Return the prompt session, creating it (and importing prompt_toolkit) on first use."""
+    global _prompt_session
+    if _prompt_session is None:
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.styles import Style as PromptStyle
+
+        _prompt_session = PromptSession(
+            style=PromptStyle.from_dict({
+                'prompt': '#0066ff bold',  # Bright blue prompt
+                'completion-menu.completion': 'bg:#1e3a8a fg:#ffffff',
+                'completion-menu.completion.current': 'bg:#3b82f6 fg:#ffffff bold',
+            })
+        )
+    return _prompt_session
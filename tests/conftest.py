@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+from deepseek_engineer import transport
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+import mock_server  # noqa: E402
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """Point the API client at benchmarks/mock_server.py on a free port."""
+    server = mock_server.serve(scenario={"initial": {"content_tokens": 5}})
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    monkeypatch.setattr(transport, "DEEPSEEK_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(transport, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(transport, "client", None)
+    monkeypatch.setattr(transport, "http_client", None)
+    yield server
+    server.shutdown()
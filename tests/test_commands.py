@@ -0,0 +1,43 @@
+import pytest
+
+from deepseek_engineer import commands
+from deepseek_engineer.context import conversation_history, new_conversation
+from deepseek_engineer.files import workspace_root
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "app.py").write_text("def main():\n    pass\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "util.py").write_text("class Helper:\n    def run(self):\n        pass\n")
+    history = new_conversation()
+    history_token = conversation_history.bind(history)
+    root_token = workspace_root.set(str(tmp_path))
+    yield tmp_path, history
+    workspace_root.reset(root_token)
+    conversation_history._var.reset(history_token)
+
+def map_messages(history):
+    return [msg for msg in history if "map_root" in msg]
+
+def test_newer_map_replaces_the_map_of_the_same_root(workspace):
+    root, history = workspace
+    assert commands.try_handle_map_command("/map")
+    assert commands.try_handle_map_command("/map pkg")
+    assert [msg["map_root"] for msg in map_messages(history)] == [str(root), str(root / "pkg")]
+
+    (root / "app.py").write_text("def main():\n    pass\n\ndef other():\n    pass\n")
+    commands.try_handle_map_command("/map")
+    maps = map_messages(history)
+    assert [msg["map_root"] for msg in maps] == [str(root / "pkg"), str(root)]
+    assert "other" in maps[-1]["content"]
+
+def test_unchanged_map_is_not_added_twice(workspace):
+    _, history = workspace
+    commands.try_handle_map_command("/map")
+    commands.try_handle_map_command("/map")
+    assert len(map_messages(history)) == 1
+
+def test_map_tag_is_not_sent_to_the_api(workspace):
+    _, history = workspace
+    commands.try_handle_map_command("/map")
+    assert all("map_root" not in msg for msg in history.to_messages())
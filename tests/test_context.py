@@ -0,0 +1,141 @@
+import random
+import re
+
+from deepseek_engineer import context
+from deepseek_engineer.context import BlobRef, ContextStore, file_content_parts, unified_file_diff
+
+def store(*messages):
+    return ContextStore([{"role": "system", "content": "prompt"}, *messages], layout="stable")
+
+def tool_result(path, content, call_id="1"):
+    return {"role": "tool", "tool_call_id": call_id, "content": ["Read it:\n"] + file_content_parts(path, content)}
+
+def apply_unified_diff(old, diff):
+    """Rebuild the new text from 'old' and a unified diff, checking every context and removed line."""
+    a = old.splitlines(keepends=True)
+    out, position = [], 0
+    lines = diff.splitlines(keepends=True)[2:]
+    i = 0
+    while i < len(lines):
+        start = int(re.match(r"@@ -(\d+),(\d+)", lines[i]).group(1))
+        count = int(re.match(r"@@ -\d+,(\d+)", lines[i]).group(1))
+        start = start - 1 if count else start
+        out.extend(a[position:start])
+        position = start
+        i += 1
+        while i < len(lines) and not lines[i].startswith("@@"):
+            tag, text = lines[i][0], lines[i][1:]
+            if tag in " -":
+                assert a[position] == text
+                position += 1
+            if tag in " +":
+                out.append(text)
+            i += 1
+    out.extend(a[position:])
+    return "".join(out)
+
+# -- blob dedup -------------------------------------------------------------------
+
+def test_same_file_in_several_messages_is_stored_once():
+    history = store()
+    text = "print('hello')\n" * 100
+    assert history.add_file("/w/a.py", text)
+    assert not history.add_file("/w/a.py", text)
+    history.append(tool_result("/w/a.py", text))
+    stats = history.blobs.stats()
+    assert stats["blobs"] == 1 and stats["bytes"] == len(text)
+    assert all(isinstance(part, BlobRef) for msg in history[1:] for part in msg["content"] if not isinstance(part, str))
+    assert history.to_messages()[-1]["content"].endswith(text)
+
+def test_removing_messages_releases_their_blobs():
+    history = store()
+    history.add_file("/w/a.py", "a\n")
+    history.append(tool_result("/w/b.py", "b\n"))
+    history.truncate(1)
+    assert history.blobs.stats()["blobs"] == 0
+    assert not history.has_file("/w/a.py") and not history.has_file("/w/b.py")
+
+def test_newer_version_drops_stale_copies():
+    history = store()
+    history.add_file("/w/a.py", "old\n")
+    history.append(tool_result("/w/a.py", "old\n"))
+    history.append(tool_result("/w/a.py", "new\n", "2"))
+    messages = history.to_messages()
+    assert [msg["role"] for msg in messages] == ["system", "tool", "tool"]
+    assert "Superseded" in messages[1]["content"] and "old" not in messages[1]["content"]
+    assert messages[2]["content"].endswith("new\n")
+    assert history.has_file("/w/a.py", "new\n")
+    assert history.blobs.stats()["blobs"] == 1
+
+def test_stable_layout_pins_files_after_the_system_prompt():
+    history = store({"role": "user", "content": "hi"})
+    history.add_file("/w/a.py", "a\n")
+    history.append({"role": "assistant", "content": "ok"})
+    history.add_file("/w/b.py", "b\n")
+    assert [msg["content"][:20] for msg in history.to_messages()] == [
+        "prompt", "Content of file '/w/", "Content of file '/w/", "hi", "ok"]
+    history.layout = "interleaved"
+    assert [msg["role"] for msg in history.to_messages()] == ["system", "user", "system", "assistant", "system"]
+
+# -- change notes -------------------------------------------------------------------
+
+def test_change_note_is_empty_for_unseen_or_unchanged_files():
+    history = store()
+    assert history.file_change_note("/w/a.py", "x\n") == ""
+    history.add_file("/w/a.py", "x\n")
+    assert history.file_change_note("/w/a.py", "x\n") == ""
+
+def test_small_change_is_noted_as_a_diff_and_becomes_the_seen_version():
+    history = store()
+    old = "".join(f"line {i}\n" for i in range(300))
+    new = old.replace("line 150\n", "line 150 changed\n")
+    history.add_file("/w/a.py", old)
+    note = history.file_change_note("/w/a.py", new)
+    history.append({"role": "tool", "tool_call_id": "1", "content": ["Edited"] + note})
+    text = history.to_messages()[-1]["content"]
+    assert "-line 150\n+line 150 changed\n" in text and "line 10\n" not in text
+    assert history.has_file("/w/a.py", new)
+    assert history.file_change_note("/w/a.py", new) == ""
+
+def test_large_change_is_sent_in_full():
+    history = store()
+    history.add_file("/w/a.py", "a\nb\n")
+    note = history.file_change_note("/w/a.py", "completely\ndifferent\n")
+    assert note[1].startswith("Content of file '/w/a.py'")
+
+def test_diff_gives_up_beyond_the_changed_line_limit(monkeypatch):
+    monkeypatch.setattr(context, "DIFF_MAX_CHANGED_LINES", 10)
+    old = "".join(f"{i}\n" for i in range(100))
+    assert unified_file_diff("a", old, old.replace("\n5\n", "\nfive\n")) is not None
+    assert unified_file_diff("a", old, "".join(f"{i}!\n" for i in range(100))) is None
+
+def test_patience_diff_round_trips_random_edits():
+    rng = random.Random(3)
+    words = ["{", "}", "pass", "return x", "x += 1"] + [f"def f{i}():" for i in range(50)]
+    for _ in range(200):
+        old = [rng.choice(words) + "\n" for _ in range(rng.randint(0, 80))]
+        new = list(old)
+        for _ in range(rng.randint(1, 6)):
+            position = rng.randint(0, len(new))
+            action = rng.random()
+            if action < 0.4:
+                new.insert(position, rng.choice(words) + "\n")
+            elif action < 0.7 and new:
+                del new[min(position, len(new) - 1)]
+            elif new:
+                block = new[position:position + 5]
+                del new[position:position + 5]
+                new.insert(rng.randint(0, len(new)), "".join(block))
+        old_text, new_text = "".join(old), "".join(new)
+        diff = unified_file_diff("a", old_text, new_text)
+        if old_text == new_text:
+            assert diff == "--- a\n+++ a\n"
+            continue
+        assert apply_unified_diff(old_text, diff) == new_text
+
+def test_diff_aligns_on_unique_lines():
+    old = "".join(f"def f{i}():\n    pass\n" for i in range(20))
+    new = old.replace("def f10():\n", "def f10(x):\n")
+    diff = unified_file_diff("a", old, new)
+    assert diff.count("@@") == 2
+    assert "-def f10():\n+def f10(x):\n" in diff
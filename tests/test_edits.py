@@ -0,0 +1,93 @@
+import pytest
+
+from deepseek_engineer import edits
+from deepseek_engineer.edits import EditFailure, EditHunk, apply_edit_batch, apply_edits, closest_match, locate_hunks
+
+SOURCE = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(50))
+
+@pytest.fixture(params=["text", "mmap"])
+def source_kind(request, monkeypatch):
+    """Run a test on the cached-text path and on the mmap path used for large files."""
+    monkeypatch.setattr(edits, "EDIT_MMAP_BYTES", 1 if request.param == "mmap" else 1 << 30)
+    return request.param
+
+def test_hunks_apply_in_one_write_whatever_their_order(tmp_path, source_kind):
+    path = tmp_path / "a.py"
+    path.write_text(SOURCE)
+    hunks = [EditHunk("def f30():\n", "def f30(x):\n"), EditHunk("    return 2\n", "    return -2\n"),
+             EditHunk("def f49():\n    return 49\n", "")]
+    edits_, failures = apply_edit_batch([(str(path), hunks)])
+    assert failures == []
+    expected = SOURCE.replace("def f30():\n", "def f30(x):\n").replace("    return 2\n", "    return -2\n")
+    assert path.read_text() == expected.replace("def f49():\n    return 49\n", "")
+    assert edits_[0].match_lines() == {0: 91, 1: 8, 2: 148}
+
+def test_locate_hunks_sorts_matches_by_position():
+    hunks = [EditHunk("def f3(", "x"), EditHunk("def f1(", "y")]
+    matches = locate_hunks("a.py", SOURCE, hunks)
+    assert [index for _, _, index in matches] == [1, 0]
+    assert SOURCE[matches[0][0]:matches[0][1]] == "def f1("
+
+def test_repeated_snippet_is_ambiguous(tmp_path, source_kind):
+    path = tmp_path / "a.py"
+    path.write_text(SOURCE)
+    with pytest.raises(EditFailure) as failure:
+        apply_edits(str(path), [EditHunk("    return 1", "    return one")])
+    assert "matches at line 5 and again at line 32" in str(failure.value)
+    assert failure.value.hunk == 0 and failure.value.line == 26
+    assert path.read_text() == SOURCE
+
+def test_overlapping_hunks_are_rejected(tmp_path, source_kind):
+    path = tmp_path / "a.py"
+    path.write_text(SOURCE)
+    hunks = [EditHunk("def f5():\n    return 5\n", "a"), EditHunk("return 5\n\ndef f6", "b")]
+    with pytest.raises(EditFailure) as failure:
+        apply_edits(str(path), hunks)
+    assert str(failure.value) == "Overlaps hunk 1" and failure.value.hunk == 1
+    assert path.read_text() == SOURCE
+
+def test_all_failures_of_a_batch_are_reported_and_nothing_is_written(tmp_path, source_kind):
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    a.write_text(SOURCE)
+    b.write_text("x = 1\n")
+    _, failures = apply_edit_batch([
+        (str(a), [EditHunk("def f7():\n    return 8\n", "z"), EditHunk("def f8", "g8"), EditHunk("", "q")]),
+        (str(b), [EditHunk("x = 1", "x = 2")]),
+        (str(tmp_path / "missing.py"), [EditHunk("a", "b")]),
+    ])
+    assert [(failure.path, failure.hunk, str(failure)) for failure in failures] == [
+        (str(a), 0, "Original snippet not found"),
+        (str(a), 2, "Original snippet is empty"),
+        (str(tmp_path / "missing.py"), None, "Could not read file: No such file or directory"),
+    ]
+    assert a.read_text() == SOURCE and b.read_text() == "x = 1\n"
+
+def test_closest_match_window_points_at_the_near_miss(tmp_path, source_kind):
+    path = tmp_path / "a.py"
+    path.write_text(SOURCE)
+    with pytest.raises(EditFailure) as failure:
+        apply_edits(str(path), [EditHunk("def f20():\n    return 21\n", "")])
+    assert failure.value.line == 61 - edits.EDIT_WINDOW_LINES
+    window = failure.value.window.splitlines()
+    assert window[6] == "def f20():" and len(window) <= 2 * edits.EDIT_WINDOW_LINES + 2
+
+def test_closest_match_prefers_the_longest_prefix_then_the_first_line():
+    text = "alpha beta\n    gamma delta\n"
+    assert closest_match(text, "gamma delta epsilon") == text.index("gamma")
+    assert closest_match(text, "\tgamma delta\nmore") == text.index("gamma")
+    assert closest_match(text, "zzz") is None
+    assert closest_match(text.encode(), b"beta!") == 6
+
+def test_crlf_file_keeps_its_line_endings(tmp_path, source_kind):
+    # Large files with carriage returns fall back to the text path too
+    path = tmp_path / "win.py"
+    path.write_bytes(b"a = 1\r\nb = 2\r\nc = 3\r\n")
+    apply_edits(str(path), [EditHunk("b = 2\nc = 3\n", "b = 20\nc = 30\n")])
+    assert path.read_bytes() == b"a = 1\r\nb = 20\r\nc = 30\r\n"
+    assert edits.file_cache.read_text(str(path)) == "a = 1\nb = 20\nc = 30\n"
+
+def test_lf_file_is_written_unchanged_apart_from_the_edit(tmp_path):
+    path = tmp_path / "unix.py"
+    path.write_bytes(b"a = 1\nb = 2\n")
+    apply_edits(str(path), [EditHunk("b = 2", "b = 3")])
+    assert path.read_bytes() == b"a = 1\nb = 3\n"
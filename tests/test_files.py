@@ -0,0 +1,99 @@
+import os
+import stat
+
+import pytest
+
+from deepseek_engineer import files
+from deepseek_engineer.files import FileCache, atomic_write, finish_writes, stage_write
+
+def test_unchanged_file_is_served_from_the_cache(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\n")
+    cache = FileCache()
+    first = cache.read_text(str(path))
+    assert cache.read_text(str(path)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_change_outside_the_tool_is_picked_up(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\n")
+    cache = FileCache()
+    cache.read_text(str(path))
+    path.write_text("two, longer\n")
+    assert cache.read_text(str(path)) == "two, longer\n"
+    # Same size and mtime but a new inode, as after a rename over the file
+    replacement = tmp_path / "b.txt"
+    replacement.write_text("TWO, LONGER\n")
+    st = path.stat()
+    os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(replacement, path)
+    assert cache.read_text(str(path)) == "TWO, LONGER\n"
+    assert cache.misses == 3
+
+def test_update_matches_what_a_fresh_read_returns(tmp_path):
+    path = tmp_path / "crlf.txt"
+    content = "a\r\nb\rc\n"
+    path.write_bytes(content.encode())
+    cache = FileCache()
+    cache.update(str(path), content)
+    assert cache.read_text(str(path)) == FileCache().read_text(str(path)) == "a\nb\nc\n"
+    assert cache.hits == 1
+
+def test_binary_and_invalid_utf8_files(tmp_path):
+    binary = tmp_path / "x.bin"
+    binary.write_bytes(b"\0\1\2")
+    latin = tmp_path / "latin.txt"
+    latin.write_bytes("café".encode("latin-1"))
+    cache = FileCache()
+    assert cache.read_text(str(binary), skip_binary=True) is None
+    assert cache.read_text(str(latin), skip_binary=True) is None
+    with pytest.raises(UnicodeDecodeError):
+        cache.read_text(str(latin))
+
+def test_cache_evicts_least_recently_used_files(tmp_path):
+    cache = FileCache(max_bytes=10)
+    for name in "abc":
+        (tmp_path / name).write_text(name * 4)
+    cache.read_text(str(tmp_path / "a"))
+    cache.read_text(str(tmp_path / "b"))
+    cache.read_text(str(tmp_path / "a"))
+    cache.read_text(str(tmp_path / "c"))
+    assert cache.stats()["files"] == 2 and cache.current_bytes == 8
+    cache.read_text(str(tmp_path / "a"))
+    assert cache.hits == 2
+
+def test_atomic_write_replaces_the_file_and_keeps_its_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    os.chmod(path, 0o751)
+    written = atomic_write(str(path), [b"new ", b"content"], like=os.stat(path))
+    assert written == 11 and path.read_text() == "new content"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o751
+    assert os.listdir(tmp_path) == ["script.sh"]
+
+def test_new_file_gets_default_permissions(tmp_path):
+    path = tmp_path / "new.txt"
+    atomic_write(str(path), [b"x"])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~files._UMASK
+
+def test_failed_write_leaves_the_original_untouched(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("original")
+
+    def chunks():
+        yield b"partial"
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(str(path), chunks())
+    assert path.read_text() == "original"
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+def test_staged_writes_notify_listeners_once_all_are_in_place(tmp_path, monkeypatch):
+    seen = []
+    monkeypatch.setattr(files, "write_listeners", [lambda paths: seen.append((paths, [open(p).read() for p in paths]))])
+    targets = [str(tmp_path / "a"), str(tmp_path / "b")]
+    staged = [(stage_write(target, [target.encode()])[0], target) for target in targets]
+    assert not any(os.path.exists(target) for target in targets)
+    finish_writes(staged)
+    assert seen == [(targets, targets)]
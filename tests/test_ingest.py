@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from deepseek_engineer.ingest import GitIgnore, PathMatcher, ingest_directory, iter_directory_files
+
+@pytest.mark.parametrize("pattern, path, is_dir, expected", [
+    ("*.log", "debug.log", False, True),
+    ("*.log", "deep/nested/debug.log", False, True),
+    ("*.log", "debug.log.txt", False, None),
+    ("/build", "build", True, True),
+    ("/build", "src/build", True, None),
+    ("docs/*.md", "docs/a.md", False, True),
+    ("docs/*.md", "docs/sub/a.md", False, None),
+    ("docs/**/*.md", "docs/sub/deeper/a.md", False, True),
+    ("**/cache", "a/b/cache", True, True),
+    ("tmp/", "tmp", True, True),
+    ("tmp/", "tmp", False, None),
+    ("file?.txt", "file1.txt", False, True),
+    ("file?.txt", "file10.txt", False, None),
+    ("[abc].py", "b.py", False, True),
+    ("[!abc].py", "b.py", False, None),
+    ("[!abc].py", "d.py", False, True),
+    ("\\#notes", "#notes", False, True),
+    ("\\!important", "!important", False, True),
+    ("# comment", "# comment", False, None),
+])
+def test_gitignore_patterns(pattern, path, is_dir, expected):
+    assert GitIgnore([pattern]).match(path, is_dir) is expected
+
+def test_later_negation_reincludes():
+    ignore = GitIgnore(["*.log", "!keep.log", "# comment", ""])
+    assert ignore.match("a.log", False) is True
+    assert ignore.match("keep.log", False) is False
+    assert ignore.match("a.py", False) is None
+
+def write(root, relative, text="x\n"):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+def walk(root, matcher=None):
+    skipped = []
+    found = [os.path.relpath(path, root) for path, _, _ in iter_directory_files(root, matcher or PathMatcher(), skipped)]
+    return found, skipped
+
+def test_nested_gitignore_overrides_its_parent(tmp_path):
+    root = str(tmp_path)
+    write(root, ".gitignore", "*.gen\nignored_dir/\n")
+    write(root, "a.py")
+    write(root, "a.gen")
+    write(root, "ignored_dir/b.py")
+    write(root, "pkg/.gitignore", "!keep.gen\n")
+    write(root, "pkg/keep.gen")
+    write(root, "pkg/other.gen")
+    found, _ = walk(root)
+    assert found == ["a.py", os.path.join("pkg", "keep.gen")]
+
+def test_fixed_exclusions_and_gitignore_switch(tmp_path):
+    root = str(tmp_path)
+    write(root, ".gitignore", "*.py\n")
+    write(root, "a.py")
+    write(root, "image.PNG")
+    write(root, "node_modules/lib.js")
+    write(root, ".hidden/secret.txt")
+    write(root, "notes.txt")
+    found, skipped = walk(root)
+    assert found == ["notes.txt"]
+    assert os.path.join(root, "image.PNG") in skipped
+    found, _ = walk(root, PathMatcher(use_gitignore=False))
+    assert found == ["a.py", "notes.txt"]
+
+def test_only_the_last_suffix_is_matched_against_excluded_extensions():
+    matcher = PathMatcher()
+    assert matcher.excluded_extension("x.PNG") and matcher.excluded_extension("archive.tar.gz")
+    assert not matcher.excluded_extension("app.min.js") and not matcher.excluded_extension("style.bundle.css")
+
+def test_ingest_reads_text_files_and_skips_binary_ones(tmp_path):
+    root = str(tmp_path)
+    write(root, "a.py", "print('a')\n")
+    write(root, "sub/b.txt", "b\n")
+    with open(os.path.join(root, "data.dat"), "wb") as f:
+        f.write(b"\0binary")
+    added, skipped, limited = ingest_directory(root, workers=2)
+    assert [(os.path.relpath(path, root), content) for path, content in added] == [
+        ("a.py", "print('a')\n"), (os.path.join("sub", "b.txt"), "b\n")]
+    assert os.path.join(root, "data.dat") in skipped and not limited
+
+def test_ingest_stops_at_max_files(tmp_path):
+    root = str(tmp_path)
+    for i in range(5):
+        write(root, f"f{i}.txt")
+    added, _, limited = ingest_directory(root, max_files=3, workers=1)
+    assert len(added) == 3 and limited
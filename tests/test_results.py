@@ -0,0 +1,27 @@
+from deepseek_engineer.results import MIN_PREVIEW_CHARS, ResultBudget, read_more, result_store
+
+def test_short_result_passes_once_turn_budget_is_used_up():
+    budget = ResultBudget(turn_chars=100, tool_chars=100)
+    paged = budget.fit("read_file", "x\n" * 5000)
+    assert paged.startswith("[Result of read_file")
+    assert budget.remaining <= 0
+
+    status = "Successfully edited file 'a.py'"
+    assert budget.fit("edit_file", status) == status
+    error = "Error: " + "e" * (MIN_PREVIEW_CHARS - 7)
+    assert budget.fit("edit_file", error) == error
+    assert budget.paged == 1
+
+def test_result_no_larger_than_its_preview_is_sent_whole():
+    budget = ResultBudget(turn_chars=0, tool_chars=0)
+    text = "y" * (MIN_PREVIEW_CHARS + 50)
+    assert budget.fit("search_code", text) == text
+    assert budget.paged == 0
+
+def test_large_result_is_paged_and_readable():
+    budget = ResultBudget(turn_chars=1000, tool_chars=1000)
+    text = "".join(f"line {i}\n" for i in range(20000))
+    shown = budget.fit("read_file", text)
+    handle = shown.split("handle '")[1].split("'")[0]
+    assert result_store.get(handle).text == text
+    assert read_more(handle, 1).startswith("Page 1 of")
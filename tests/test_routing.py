@@ -0,0 +1,64 @@
+import pytest
+
+from deepseek_engineer import routing
+from deepseek_engineer.context import file_content_parts
+from deepseek_engineer.routing import RoutingPolicy, summarize_routes
+
+@pytest.fixture
+def policy(monkeypatch):
+    for phase in routing.PHASE_DEFAULTS:
+        monkeypatch.delenv(f"DEEPSEEK_MODEL_{phase.upper()}", raising=False)
+        monkeypatch.delenv(f"DEEPSEEK_MAX_TOKENS_{phase.upper()}", raising=False)
+    return RoutingPolicy(enabled=True, baseline_model="reasoner", baseline_max_tokens=64000)
+
+@pytest.mark.parametrize("message", [
+    "fix the failing test",
+    "Refactor the parser",
+    "what does utils.py do?",
+    "look at src/app",
+    "make it faster",
+    "why does ```x = 1``` fail?",
+])
+def test_requests_with_file_work_are_planned(policy, message):
+    assert policy.initial(message).phase == "plan"
+
+@pytest.mark.parametrize("message", ["what is a closure?", "thanks!", "How do Python generators differ from lists?"])
+def test_short_questions_go_to_qa(policy, message):
+    route = policy.initial(message)
+    assert (route.phase, route.model, route.max_tokens) == ("qa", "deepseek-chat", 8000)
+
+def test_long_messages_are_planned(policy):
+    route = policy.initial("tell me about it " * 50)
+    assert (route.phase, route.reason) == ("plan", "long request")
+
+def test_follow_up_after_successful_tools_is_cheap(policy):
+    results = ["Successfully created file 'a.py'", file_content_parts("/w/a.py", "Error: not a failure\n")]
+    assert policy.follow_up(results).phase == "follow_up"
+
+@pytest.mark.parametrize("result", ["Error: file not found", "Wrote a.py\nError reading b.py",
+                                    "No files were changed: hunk 1 did not match"])
+def test_failed_tool_sends_follow_up_back_to_planning(policy, result):
+    route = policy.follow_up(["ok", result])
+    assert (route.phase, route.reason) == ("plan", "a tool call failed")
+
+def test_disabled_policy_uses_the_baseline():
+    policy = RoutingPolicy(enabled=False, baseline_model="chosen", baseline_max_tokens=1000)
+    for route in (policy.initial("hi"), policy.initial("fix a.py"), policy.follow_up(["ok"])):
+        assert (route.model, route.max_tokens) == ("chosen", 1000)
+
+def test_phase_overrides_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_MODEL_QA", "custom")
+    monkeypatch.setenv("DEEPSEEK_MAX_TOKENS_QA", "123")
+    route = RoutingPolicy(enabled=True).initial("hello")
+    assert (route.model, route.max_tokens) == ("custom", 123)
+
+def test_savings_are_estimated_against_baseline_streams(policy):
+    cheap = policy.follow_up(["ok"])
+    assert policy.observe(cheap, {"completion_tokens": 10, "stream_ms": 100})["saved_tokens_est"] is None
+    plan = policy.initial("fix a.py")
+    policy.observe(plan, {"completion_tokens": 500, "stream_ms": 4000})
+    policy.observe(plan, {"completion_tokens": 300, "stream_ms": 2000})
+    record = policy.observe(cheap, {"completion_tokens": 50, "stream_ms": 500})
+    assert (record["saved_tokens_est"], record["saved_ms_est"]) == (350, 2500.0)
+    assert policy.stats()["saved_tokens_est"] == 350
+    assert summarize_routes([record, record])["saved_tokens_est"] == 700
@@ -0,0 +1,115 @@
+import os
+import random
+import re
+
+from deepseek_engineer import search
+from deepseek_engineer.search import SearchIndex
+
+WORDS = ["alpha", "Beta", "gamma_delta", "needle", "NeedLe", "render(", "foo.bar", "zeta", "x"]
+
+def build_tree(root, files=60, seed=7):
+    rng = random.Random(seed)
+    for i in range(files):
+        folder = os.path.join(root, f"pkg{i % 5}")
+        os.makedirs(folder, exist_ok=True)
+        lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))) for _ in range(rng.randint(1, 30))]
+        with open(os.path.join(folder, f"mod{i}.py"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+def grep(root, pattern, flags=0):
+    """(relative path, line) of every matching line, found without the index."""
+    compiled = re.compile(pattern, flags)
+    hits = set()
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            with open(path) as f:
+                for line, text in enumerate(f, 1):
+                    if compiled.search(text):
+                        hits.add((os.path.relpath(path, root), line))
+    return hits
+
+def parse(result):
+    hits = set()
+    for line in result.splitlines()[1:]:
+        relative, number, _ = line.split(":", 2)
+        hits.add((relative, int(number)))
+    return hits
+
+def make_index(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    build_tree(str(root))
+    return str(root), SearchIndex(str(root), str(tmp_path / "cache"))
+
+def test_results_match_brute_force_grep(tmp_path, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_MAX_CHARS", 1_000_000)
+    root, index = make_index(tmp_path)
+    queries = [
+        (dict(query="needle"), re.escape("needle"), 0),
+        (dict(query="needle", case_sensitive=False), "needle", re.IGNORECASE),
+        (dict(query="render("), re.escape("render("), 0),
+        (dict(query="foo.bar zeta"), re.escape("foo.bar zeta"), 0),
+        (dict(query=r"gamma_\w+ (alpha|zeta)", regex=True), r"gamma_\w+ (alpha|zeta)", 0),
+        (dict(query=r"Be(ta)+ x", regex=True), r"Be(ta)+ x", 0),
+        (dict(query="absent text"), re.escape("absent text"), 0),
+    ]
+    for query, pattern, flags in queries:
+        result = index.search(max_results=10_000, **query)
+        assert parse(result) == grep(root, pattern, flags), query
+
+def test_query_only_opens_files_with_all_trigrams(tmp_path):
+    root, index = make_index(tmp_path)
+    index.ensure_fresh()
+    grams = search.trigrams(b"gamma_delta zeta")
+    expected = {relative for relative, _ in grep(root, "gamma_delta zeta")}
+    candidates = set(index.candidates(grams))
+    assert expected <= candidates
+    for relative in candidates:
+        with open(os.path.join(root, relative), "rb") as f:
+            assert grams <= search.trigrams(f.read())
+
+def test_index_round_trips_through_cache(tmp_path):
+    root, index = make_index(tmp_path)
+    index.refresh()
+    reloaded = SearchIndex(root, str(tmp_path / "cache"))
+    reloaded.load()
+    assert reloaded.files == index.files
+    assert {gram: list(ids) for gram, ids in reloaded.postings.items()} == \
+           {gram: list(ids) for gram, ids in index.postings.items()}
+
+def test_changed_and_deleted_files_are_reindexed(tmp_path):
+    root, index = make_index(tmp_path)
+    index.ensure_fresh()
+    target = os.path.join(root, "pkg0", "mod0.py")
+    with open(target, "a") as f:
+        f.write("unique marker\n")
+    index.mark_written([target])
+    assert parse(index.search("unique marker")) == {(os.path.join("pkg0", "mod0.py"), grep(root, "unique marker").pop()[1])}
+    os.remove(target)
+    index.refresh()
+    assert index.search("unique marker").startswith("No matches")
+
+def test_write_during_walk_is_not_overwritten(tmp_path, monkeypatch):
+    root, index = make_index(tmp_path)
+    index.refresh()
+    target = os.path.join(root, "pkg1", "mod1.py")
+    walk = search.iter_directory_files
+
+    def walk_then_write(*args, **kwargs):
+        for item in walk(*args, **kwargs):
+            yield item
+        # A tool edit lands and is indexed after the walk has statted the file
+        with open(target, "w") as f:
+            f.write("written during walk\n")
+        index.mark_written([target])
+        index._refresh_written()
+
+    with open(target, "a") as f:
+        f.write("stale line\n")
+    monkeypatch.setattr(search, "iter_directory_files", walk_then_write)
+    index.refresh()
+    monkeypatch.setattr(search, "iter_directory_files", walk)
+    index.refreshed_at, index._loaded = float("inf"), True
+    assert parse(index.search("written during walk")) == {(os.path.join("pkg1", "mod1.py"), 1)}
+    assert os.path.getsize(target) == index.files[os.path.join("pkg1", "mod1.py")][1]
@@ -0,0 +1,103 @@
+from deepseek_engineer.context import SPILL_CHARS, ContextStore, TextRef, file_content_parts
+from deepseek_engineer.sessions import SessionLog
+
+class CountingLog(SessionLog):
+    """SessionLog that counts blob reads from the database."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.reads = []
+
+    def get_blob(self, digest):
+        self.reads.append(digest)
+        return super().get_blob(digest)
+
+def record(tmp_path, name=None):
+    history = ContextStore(layout="stable")
+    log = CountingLog(str(tmp_path / "sessions.sqlite3"))
+    log.attach(history, name)
+    return history, log
+
+def resume(tmp_path, name):
+    history = ContextStore(layout="stable")
+    log = CountingLog(str(tmp_path / "sessions.sqlite3"))
+    assert log.attach(history, name)
+    return history, log
+
+def test_saved_session_resumes_with_the_same_messages(tmp_path):
+    history, log = record(tmp_path)
+    history.append({"role": "system", "content": "prompt"})
+    history.add_file("/w/a.py", "print('a')\n")
+    history.append({"role": "user", "content": "hello"})
+    history.append({"role": "assistant", "content": "hi"})
+    expected = history.to_messages()
+    assert log.save("work") == "work"
+
+    resumed, _ = resume(tmp_path, "work")
+    assert resumed.to_messages() == expected
+    assert resumed.has_file("/w/a.py", "print('a')\n")
+
+def test_removals_and_replacements_are_replayed(tmp_path):
+    history, log = record(tmp_path)
+    history.append({"role": "system", "content": "prompt"})
+    first = {"role": "user", "content": "one"}
+    second = {"role": "assistant", "content": "two"}
+    history.extend([first, second, {"role": "user", "content": "three"}])
+    history.replace([first, second], {"role": "system", "content": "digest"})
+    history.pop()
+    history.append({"role": "user", "content": "four"})
+    log.save("edited")
+
+    resumed, _ = resume(tmp_path, "edited")
+    assert [msg["content"] for msg in resumed] == ["prompt", "digest", "four"]
+
+def test_resumed_session_keeps_recording(tmp_path):
+    history, log = record(tmp_path, "ongoing")
+    history.append({"role": "system", "content": "prompt"})
+    resumed, _ = resume(tmp_path, "ongoing")
+    resumed.append({"role": "user", "content": "later"})
+
+    again, _ = resume(tmp_path, "ongoing")
+    assert [msg["content"] for msg in again] == ["prompt", "later"]
+
+def test_save_rejects_a_taken_name(tmp_path):
+    history, log = record(tmp_path, "taken")
+    history.append({"role": "system", "content": "prompt"})
+    other, other_log = record(tmp_path)
+    other.append({"role": "system", "content": "prompt"})
+    try:
+        other_log.save("taken")
+    except ValueError as e:
+        assert "taken" in str(e)
+    else:
+        raise AssertionError("saving under an existing name succeeded")
+
+def test_spilled_messages_load_lazily_on_resume(tmp_path):
+    history, log = record(tmp_path)
+    big_file = "x = 1\n" * SPILL_CHARS
+    big_text = "y" * (SPILL_CHARS * 2)
+    digest = history.blobs.acquire(big_text)
+    history.append({"role": "system", "content": "prompt"})
+    history.append({"role": "system", "content": file_content_parts("/w/big.py", big_file)})
+    history.append({"role": "tool", "tool_call_id": "1", "content": [TextRef(digest, len(big_text))]})
+    history.blobs.release(digest)
+    assert history.blobs.stats()["spilled_bytes"] == len(big_file) + len(big_text)
+    log.save("big")
+
+    resumed, resumed_log = resume(tmp_path, "big")
+    stats = resumed.blobs.stats()
+    assert stats["bytes"] == 0 and stats["spilled_bytes"] == len(big_file) + len(big_text)
+    assert resumed_log.reads == []
+    messages = resumed.to_messages()
+    assert big_file in messages[1]["content"]
+    assert messages[2]["content"] == big_text
+    assert len(resumed_log.reads) == 2
+
+def test_prune_keeps_saved_and_recent_sessions(tmp_path):
+    names = []
+    for i in range(4):
+        history, log = record(tmp_path)
+        history.append({"role": "user", "content": str(i)})
+        names.append(log.save("kept") if i == 0 else log.name)
+    log.prune(keep=1)
+    assert {session["name"] for session in log.list_sessions()} == {names[0], names[3]}
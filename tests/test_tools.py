@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from deepseek_engineer import edits
+from deepseek_engineer.context import conversation_history, new_conversation
+from deepseek_engineer.files import workspace_root
+from deepseek_engineer.tools import execute_function_call_dict
+
+@pytest.fixture
+def workspace(tmp_path):
+    history = new_conversation()
+    history_token = conversation_history.bind(history)
+    root_token = workspace_root.set(str(tmp_path))
+    yield tmp_path, history
+    workspace_root.reset(root_token)
+    conversation_history._var.reset(history_token)
+
+def call(name, **arguments):
+    return {"id": f"call_{name}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+def run_tool_turn(history, *calls):
+    """Append an assistant tool_calls message and the results of 'calls', as a turn does."""
+    history.append({"role": "user", "content": "go"})
+    history.append({"role": "assistant", "content": None, "tool_calls": list(calls)})
+    results = []
+    for tool_call in calls:
+        result = execute_function_call_dict(tool_call)
+        history.append({"role": "tool", "tool_call_id": tool_call["id"], "content": result})
+        results.append(history.materialize(history[-1])["content"])
+    return results
+
+@pytest.mark.parametrize("layout", ["stable", "interleaved"])
+def test_edit_of_unseen_file_keeps_tool_results_adjacent(workspace, layout):
+    root, history = workspace
+    history.layout = layout
+    body = "".join(f"v{i} = {i}\n" for i in range(200))
+    (root / "a.py").write_text(body)
+    (root / "b.py").write_text("z = 3\n")
+    [first, second] = run_tool_turn(
+        history,
+        call("edit_file", file_path="a.py", original_snippet="v100 = 100\n", new_snippet="v100 = 0\n"),
+        call("edit_file", file_path="b.py", original_snippet="z = 3", new_snippet="z = 30"),
+    )
+    messages = history.to_messages()
+    assistant = next(i for i, msg in enumerate(messages) if msg.get("tool_calls"))
+    assert [msg["role"] for msg in messages[assistant + 1:]] == ["tool", "tool"]
+    edited = body.replace("v100 = 100\n", "v100 = 0\n")
+    assert first.startswith("Successfully edited file 'a.py'") and edited in first
+    assert "z = 30" in second
+    assert history.has_file(str(root / "a.py"), edited)
+
+def test_edit_of_file_in_context_is_reported_as_a_diff(workspace):
+    root, history = workspace
+    (root / "a.py").write_text("".join(f"line {i}\n" for i in range(200)))
+    history.add_file(str(root / "a.py"), (root / "a.py").read_text())
+    [result] = run_tool_turn(history, call("edit_file", file_path="a.py", original_snippet="line 100\n",
+                                           new_snippet="line one hundred\n"))
+    assert "Diff against the version of" in result
+    assert "+line one hundred" in result and "line 150" not in result
+
+def test_file_changed_between_prepare_and_commit_is_reported(workspace, monkeypatch):
+    root, history = workspace
+    (root / "a.py").write_text("a = 1\n")
+    (root / "b.py").write_text("b = 1\n")
+    prepare = edits.prepare_edit
+
+    def prepare_then_touch(path, hunks, failures=None):
+        edit = prepare(path, hunks, failures)
+        if path.endswith("b.py"):
+            (root / "b.py").write_text("b = 1  # changed elsewhere\n")
+        return edit
+
+    monkeypatch.setattr(edits, "prepare_edit", prepare_then_touch)
+    [result] = run_tool_turn(history, call("edit_files", files=[
+        {"path": "a.py", "edits": [{"original_snippet": "a = 1", "new_snippet": "a = 2"}]},
+        {"path": "b.py", "edits": [{"original_snippet": "b = 1", "new_snippet": "b = 2"}]},
+    ]))
+    assert result.splitlines() == [
+        "No files were changed (1 of 2 hunks failed; fix them and resend the whole batch):",
+        "a.py hunk 1: ok",
+        "b.py: File changed on disk while the edit was being prepared",
+    ]
+    assert (root / "a.py").read_text() == "a = 1\n"
+    assert (root / "b.py").read_text() == "b = 1  # changed elsewhere\n"
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import openai
+import pytest
+
+from deepseek_engineer import transport
+from deepseek_engineer.transport import TokenBucket, retry_delay
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class FakeError(Exception):
+    def __init__(self, retry_after=None):
+        self.response = FakeResponse({"retry-after": retry_after} if retry_after else {})
+
+def test_token_bucket_spends_burst_then_waits_for_refill(monkeypatch):
+    clock = FakeClock()
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(transport.asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(3))
+    assert sleeps == []
+    asyncio.run(take(2))
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert clock.now == pytest.approx(1.0)
+
+def test_token_bucket_disabled_without_rate():
+    bucket = TokenBucket(rate=0, capacity=1, clock=FakeClock())
+
+    async def take():
+        await asyncio.wait_for(asyncio.gather(*(bucket.acquire() for _ in range(100))), 1)
+
+    asyncio.run(take())
+
+def test_retry_delay_is_capped_jittered_backoff(monkeypatch):
+    monkeypatch.setattr(transport, "RETRY_BASE_DELAY", 0.5)
+    monkeypatch.setattr(transport, "RETRY_MAX_DELAY", 4.0)
+    for attempt in range(8):
+        bound = min(4.0, 0.5 * 2 ** attempt)
+        delays = [retry_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+
+def test_retry_delay_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(transport, "RETRY_MAX_DELAY", 4.0)
+    assert retry_delay(0, FakeError("3")) >= 3
+    assert retry_delay(0, FakeError("60")) == 4.0
+    assert retry_delay(0, FakeError("Wed, 21 Oct 2015 07:28:00 GMT")) <= transport.RETRY_BASE_DELAY
+
+def set_errors(server, errors):
+    state = server.RequestHandlerClass.state
+    with state.lock:
+        state.set_scenario({"initial": {"content_tokens": 5}, "errors": errors})
+    return state
+
+async def stream_text(**kwargs):
+    stream = await transport.open_chat_stream(
+        model="mock", messages=[{"role": "user", "content": "hi"}], stream=True, **kwargs)
+    text = []
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text.append(chunk.choices[0].delta.content)
+    finally:
+        await stream.close()
+        await transport.close_client()
+    return "".join(text)
+
+@pytest.mark.parametrize("errors", [[429], [500, 503], [429, 502, 429]])
+def test_rate_limits_and_server_errors_are_retried(mock_api, errors):
+    state = set_errors(mock_api, errors)
+    assert asyncio.run(stream_text()).startswith("Considering")
+    assert [r.get("status") for r in state.requests] == errors + [None]
+
+def test_retries_give_up_after_max_retries(mock_api, monkeypatch):
+    monkeypatch.setattr(transport, "MAX_RETRIES", 2)
+    state = set_errors(mock_api, [503, 503, 503, 503])
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(stream_text())
+    assert len(state.requests) == 3
+
+def test_client_errors_are_not_retried(mock_api):
+    state = set_errors(mock_api, [400])
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(stream_text())
+    assert len(state.requests) == 1
+
+def test_concurrent_get_client_creates_one_client(mock_api):
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(transport.get_client())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(c) for c in clients}) == 1
+    assert clients[0]._client is transport.http_client
@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+import time
+
+import pytest
+
+from deepseek_engineer import transport
+from deepseek_engineer.context import conversation_history, new_conversation
+from deepseek_engineer.files import workspace_root
+from deepseek_engineer.results import ResultBudget
+from deepseek_engineer.turns import CANCELLED_TOOL_RESULT, settle_interrupted_tools, stream_openai_response
+
+@pytest.fixture
+def history(tmp_path):
+    history = new_conversation()
+    history_token = conversation_history.bind(history)
+    root_token = workspace_root.set(str(tmp_path))
+    (tmp_path / "a.py").write_text("print('a')\n")
+    yield history
+    workspace_root.reset(root_token)
+    conversation_history._var.reset(history_token)
+
+def use_scenario(server, scenario):
+    state = server.RequestHandlerClass.state
+    with state.lock:
+        state.set_scenario(scenario)
+    return state
+
+async def cancel_when(condition, timeout=5.0):
+    """Run a turn and cancel it once 'condition()' holds."""
+    turn = asyncio.create_task(stream_openai_response("read a.py"))
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            assert asyncio.get_running_loop().time() < deadline, "condition never held"
+            assert not turn.done(), turn.result()
+            await asyncio.sleep(0.01)
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+    finally:
+        await transport.close_client()
+
+READ_CALL = {"name": "read_file", "arguments": {"file_path": "a.py"}, "id": "call_read"}
+
+def test_cancel_before_the_reply_drops_the_user_message(mock_api, history):
+    use_scenario(mock_api, {"initial": {"content_tokens": 5, "first_token_delay": 5}})
+    started = time.monotonic()
+    asyncio.run(cancel_when(lambda: time.monotonic() - started > 0.3))
+    assert [msg["role"] for msg in history] == ["system"]
+
+def test_cancel_during_follow_up_keeps_tool_calls_and_results(mock_api, history):
+    use_scenario(mock_api, {
+        "initial": {"tool_calls": [READ_CALL]},
+        "follow_up": {"content_tokens": 5, "first_token_delay": 5},
+    })
+    asyncio.run(cancel_when(lambda: history[-1]["role"] == "tool"))
+    messages = history.to_messages()
+    assert [msg["role"] for msg in messages] == ["system", "user", "assistant", "tool"]
+    assert messages[2]["tool_calls"][0]["id"] == "call_read"
+    assert messages[3]["tool_call_id"] == "call_read" and "print('a')" in messages[3]["content"]
+
+def test_completed_turn_is_recorded_whole(mock_api, history):
+    use_scenario(mock_api, {"initial": {"tool_calls": [READ_CALL]}, "follow_up": {"content_tokens": 3}})
+
+    async def run():
+        try:
+            return await stream_openai_response("read a.py")
+        finally:
+            await transport.close_client()
+
+    assert asyncio.run(run()) == {"success": True}
+    assert [msg["role"] for msg in history] == ["system", "user", "assistant", "tool", "assistant"]
+
+def test_interrupted_tools_are_answered_in_call_order(history):
+    calls = [{"id": f"call_{i}", "function": {"name": "read_file"}} for i in range(3)]
+    not_started = concurrent.futures.Future()
+    finished = concurrent.futures.Future()
+    finished.set_result("file body")
+    failed = concurrent.futures.Future()
+    failed.set_exception(OSError("gone"))
+    asyncio.run(settle_interrupted_tools(list(zip(calls, [not_started, finished, failed])), ResultBudget()))
+    assert [(msg["tool_call_id"], msg["content"]) for msg in history[1:]] == [
+        ("call_0", CANCELLED_TOOL_RESULT), ("call_1", "file body"), ("call_2", "Error: gone")]